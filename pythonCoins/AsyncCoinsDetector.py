@@ -0,0 +1,107 @@
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+from AsyncCoinsKeeper import AsyncCoinsKeeper
+from WeighingSession import WeighingSession
+from WeightsIO import getFakeMode
+
+
+class AsyncCoinsDetector:
+    """
+    Asynchronous detector of the only fake coin, which drives WeighingSession with AsyncCoinsKeeper.
+    Independent weightings of one round (group0 vs group1 and group0 vs group2 of genCase) are issued at once,
+    so they are done in parallel, if keeper has several scales.
+    """
+
+    def __init__(self, keeper: AsyncCoinsKeeper, pipelined: bool = True):
+        """
+        Args:
+            keeper: asynchronous keeper of coins
+            pipelined: whether independent weightings of one round are issued at once, otherwise one by one
+        """
+        self.keeper = keeper
+        self.pipelined = pipelined
+        self.weightingCount = 0
+
+    async def solver(self) -> Tuple[int, Optional[int]]:
+        """
+        Function finds fake coin.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown.
+        """
+        coinsState = self.keeper.getCoinsState()
+        assert coinsState["n_fake"] + coinsState["n_fake_l"] + coinsState["n_fake_h"] == 1, \
+            "Asynchronous detector finds exactly one fake coin"
+        fakeMode = getFakeMode(coinsState["n_fake"], coinsState["n_fake_l"], coinsState["n_fake_h"])
+
+        session = WeighingSession(self.keeper.coinsNumber, fakeMode)
+        while not session.done:
+            requests = session.roundRequests() if self.pipelined else [session.nextRequest()]
+            outcomes = await asyncio.gather(*(self.keeper.balance(*request) for request in requests))
+            for managingItem in outcomes:
+                session.send(managingItem)
+            self.weightingCount = session.weightingCount
+        return session.result
+
+
+async def solveAsync(keeper: AsyncCoinsKeeper, pipelined: bool = True) -> Tuple[int, Optional[int], int]:
+    """
+    Function finds fake coin asynchronously, result is the same as in CoinsDetector.solve.
+    """
+    detector = AsyncCoinsDetector(keeper, pipelined)
+    index, indicator = await detector.solver()
+    return index, indicator, detector.weightingCount
+
+
+async def solveMany(keepers: Iterable[AsyncCoinsKeeper], concurrency: int = 100, pipelined: bool = True) -> \
+        List[Tuple[int, Optional[int], int]]:
+    """
+    Function runs detection sessions on one event loop, at most concurrency sessions are in progress at once.
+
+    Args:
+        keepers: asynchronous keepers, one per session
+        concurrency: the largest number of sessions in progress
+        pipelined: whether independent weightings of one round are issued at once
+    Returns:
+        results of solveAsync in the order of keepers
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limitedSolve(keeper: AsyncCoinsKeeper) -> Tuple[int, Optional[int], int]:
+        async with limit:
+            return await solveAsync(keeper, pipelined)
+
+    return list(await asyncio.gather(*(limitedSolve(keeper) for keeper in keepers)))
+
+
+if __name__ == "__main__":
+    import time
+
+    from AsyncCoinsKeeper import LatencyCoinsKeeper
+    from CoinsKeeper import CoinsKeeper
+
+    latency = 0.02
+    coinsNumber = 10 ** 4
+    ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=1, seed=0)
+    print(f"one session of {coinsNumber} coins, latency of weighting {latency} s:")
+    for scalesNumber, pipelined in ((1, False), (1, True), (2, True)):
+        t0 = time.perf_counter()
+        index, indicator, weightingCount = asyncio.run(
+            solveAsync(LatencyCoinsKeeper(ck, scalesNumber, latency), pipelined))
+        elapsed = time.perf_counter() - t0
+        print(f"  scales {scalesNumber}, pipelined {pipelined}: fake coin {index}, {weightingCount} weightings "
+              f"in {elapsed:.2f} s")
+
+    sessionsNumber = 1000
+    coinsNumber = 1000
+    keepers = [CoinsKeeper(n_gen=coinsNumber - 1, n_fake=1, seed=seed) for seed in range(sessionsNumber)]
+    print(f"{sessionsNumber} sessions of {coinsNumber} coins on one event loop, 2 scales per session:")
+    for concurrency in (10, 100, 1000):
+        t0 = time.perf_counter()
+        results = asyncio.run(solveMany([LatencyCoinsKeeper(ck, 2, latency, jitter=latency / 2, seed=i)
+                                         for i, ck in enumerate(keepers)], concurrency))
+        elapsed = time.perf_counter() - t0
+        weightingsNumber = sum(weightingCount for _, _, weightingCount in results)
+        print(f"  concurrency {concurrency}: {elapsed:.2f} s, {weightingsNumber / elapsed:.0f} weightings/s")
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Optional, Sequence, Union
+
+from CoinsKeeper import CoinsKeeper
+from InstanceGenerator import Seed, getGenerator
+
+Group = Union[range, Sequence[int]]
+
+
+class AsyncCoinsKeeper:
+    """
+    Asynchronous front of CoinsKeeper for scales with latency. Keeper has scalesNumber scales,
+    so at most scalesNumber weightings are done at once, the rest of them wait for a free scale.
+    """
+
+    def __init__(self, ck: Optional[CoinsKeeper], scalesNumber: int = 1):
+        """
+        Args:
+            ck: keeper of coins, which are weighed, None if subclass weighs coins elsewhere, e.g. remotely
+            scalesNumber: number of scales, which can weigh groups of these coins at the same time
+        """
+        assert scalesNumber > 0, "There must be at least one scale"
+        self.ck = ck
+        self.scalesNumber = scalesNumber
+        # semaphore is created in running event loop on the first weighting
+        self._scales: Optional[asyncio.Semaphore] = None
+
+    @property
+    def coinsNumber(self) -> int:
+        return len(self.ck.weights)
+
+    def getCoinsState(self):
+        return self.ck.getCoinsState()
+
+    async def balance(self, left_indices: Group, right_indices: Group) -> int:
+        '''
+        weighting of two groups of coins on the first free scale, result is the same as in CoinsKeeper.balance.
+        '''
+        if self._scales is None:
+            self._scales = asyncio.Semaphore(self.scalesNumber)
+        async with self._scales:
+            return await self.weighOnScale(left_indices, right_indices)
+
+    async def weighOnScale(self, left_indices: Group, right_indices: Group) -> int:
+        """
+        Function weighs groups on one scale, physical scale is queried here.
+        """
+        return self.ck.balance(left_indices, right_indices)
+
+
+class LatencyCoinsKeeper(AsyncCoinsKeeper):
+    """
+    Asynchronous keeper, which simulates latency of physical scales, it's used to benchmark wall-clock time
+    of asynchronous detection locally.
+    """
+
+    def __init__(self, ck: CoinsKeeper, scalesNumber: int = 1, latency: float = 0.1, jitter: float = 0.0,
+                 seed: Seed = None):
+        """
+        Args:
+            ck: keeper of coins, which are weighed
+            scalesNumber: number of scales, which can weigh groups of these coins at the same time
+            latency: time of one weighting in seconds
+            jitter: upper bound of random extra time of one weighting in seconds
+            seed: seed or numpy random generator of jitter
+        """
+        super().__init__(ck, scalesNumber)
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = getGenerator(seed)
+
+    async def weighOnScale(self, left_indices: Group, right_indices: Group) -> int:
+        delay = self.latency + self.jitter * self.rng.random() if self.jitter else self.latency
+        await asyncio.sleep(delay)
+        return self.ck.balance(left_indices, right_indices)
@@ -0,0 +1,169 @@
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+
+
+class InstanceSpec(NamedTuple):
+    """
+    Description of random instance, which is generated in worker process instead of being sent to it.
+    """
+    n_gen: int = 9
+    n_fake: int = 1
+    n_fake_l: int = 0
+    n_fake_h: int = 0
+    seed: Optional[int] = None
+
+
+class BatchResult(NamedTuple):
+    """
+    Result of solving one instance of batch.
+
+    Attributes:
+        instanceId: ordinal number of instance in batch
+        fakeCoinIndex: index of fake coin
+        fakeCoinWeightIndex: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown
+        weightingCount: number of weightings
+        elapsed: time of solving in seconds, including loading of weights
+    """
+    instanceId: int
+    fakeCoinIndex: int
+    fakeCoinWeightIndex: Optional[int]
+    weightingCount: int
+    elapsed: float
+
+    @property
+    def direction(self) -> str:
+        if self.fakeCoinWeightIndex == -1:
+            return "lighter"
+        if self.fakeCoinWeightIndex == 1:
+            return "heavier"
+        return "unknown"
+
+
+Instance = Union[CoinsKeeper, str, InstanceSpec]
+
+
+def makeKeeper(instance: Instance, keeperOptions: Optional[Dict[str, int]] = None) -> CoinsKeeper:
+    """
+    Function returns keeper for instance: keeper itself, keeper which reads weights file
+    or keeper with generated weights.
+
+    Args:
+        instance: keeper, name of weights file or description of random instance
+        keeperOptions: numbers of fake coins for text weights files, e.g. {'n_fake': 0, 'n_fake_l': 1}
+    """
+    if isinstance(instance, CoinsKeeper):
+        return instance
+    if isinstance(instance, InstanceSpec):
+        return CoinsKeeper(n_gen=instance.n_gen, n_fake=instance.n_fake, n_fake_l=instance.n_fake_l,
+                           n_fake_h=instance.n_fake_h, seed=instance.seed)
+    return CoinsKeeper(weights=instance, **(keeperOptions or {}))
+
+
+def chunked(items: Iterable, chunksize: int) -> Iterator[list]:
+    """
+    Generator which splits items into lists of chunksize items, items are consumed lazily.
+    """
+    items = iter(items)
+    chunk = list(itertools.islice(items, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(items, chunksize))
+
+
+def solveChunk(chunk: List[Tuple[int, Instance]], keeperOptions: Optional[Dict[str, int]] = None) -> \
+        List[BatchResult]:
+    """
+    Function solves chunk of instances one by one, it's executed in worker processes.
+
+    Args:
+        chunk: list of pairs (instance id, instance)
+        keeperOptions: numbers of fake coins for text weights files
+    """
+    results = []
+    for instanceId, instance in chunk:
+        t0 = time.perf_counter()
+        fakeCoinIndex, fakeCoinWeightIndex, weightingCount = solve(makeKeeper(instance, keeperOptions))
+        results.append(BatchResult(instanceId, fakeCoinIndex, fakeCoinWeightIndex, weightingCount,
+                                   time.perf_counter() - t0))
+    return results
+
+
+def solveBatch(instances: Iterable[Instance], workers: Optional[int] = None, chunksize: int = 64,
+               keeperOptions: Optional[Dict[str, int]] = None) -> Iterator[BatchResult]:
+    """
+    Generator which solves many independent instances across process pool.
+    Instances are consumed lazily and sent to workers in chunks, at most two chunks per worker are in flight,
+    so memory doesn't depend on batch size. Results are yielded as soon as their chunk is solved,
+    so they can come in any order, use BatchResult.instanceId to match them.
+
+    Args:
+        instances: keepers, names of weights files or descriptions of random instances
+        workers: number of worker processes, os.cpu_count() by default; 1 solves instances in current process
+        chunksize: number of instances sent to worker at once
+        keeperOptions: numbers of fake coins for text weights files
+    Yields:
+        result of each instance
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(enumerate(instances), chunksize)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from solveChunk(chunk, keeperOptions)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(solveChunk, chunk, keeperOptions))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Function which is served as console interface of batch solver"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve many coins instances across process pool")
+    parser.add_argument("files", nargs="*", help="weights files (.txt or .bin)")
+    parser.add_argument("--random", type=int, default=0, metavar="K", help="number of random instances")
+    parser.add_argument("--coins", type=int, default=1000, help="coins number of random instances")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first random instance")
+    modeGroup = parser.add_mutually_exclusive_group()
+    modeGroup.add_argument("--lighter", action="store_true", help="fake coin is lighter than genuine ones")
+    modeGroup.add_argument("--heavier", action="store_true", help="fake coin is heavier than genuine ones")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="number of instances sent to worker at once")
+    args = parser.parse_args(argv)
+
+    fakeCounts = {"n_fake": int(not (args.lighter or args.heavier)), "n_fake_l": int(args.lighter),
+                  "n_fake_h": int(args.heavier)}
+    randomInstances = (InstanceSpec(n_gen=args.coins - 1, seed=None if args.seed is None else args.seed + i,
+                                    **fakeCounts) for i in range(args.random))
+    instances = itertools.chain(args.files, randomInstances)
+
+    print("instance,fake_index,direction,weightings,elapsed_s")
+    t0 = time.perf_counter()
+    solved = 0
+    for result in solveBatch(instances, workers=args.workers, chunksize=args.chunksize, keeperOptions=fakeCounts):
+        print(f"{result.instanceId},{result.fakeCoinIndex},{result.direction},{result.weightingCount},"
+              f"{result.elapsed:e}")
+        solved += 1
+    elapsed = time.perf_counter() - t0
+    print(f"solved {solved} instances in {elapsed:.3f} secs, {solved / elapsed:.0f} instances/s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
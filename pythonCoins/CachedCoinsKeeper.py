@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from CoinsKeeper import CoinsKeeper
+
+# group of coins as sorted disjoint runs (start, stop) of consecutive indices
+CanonicalGroup = Tuple[Tuple[int, int], ...]
+
+
+class CacheStats(NamedTuple):
+    """
+    Statistics of cache of weighting results.
+
+    Attributes:
+        entries: number of cached weightings
+        hits: number of weightings answered from cache
+        derived: number of weightings derived from cached ones by transitivity
+        misses: number of weightings, which were passed to keeper
+        bypassed: number of weightings of groups, which aren't cached, see CachedCoinsKeeper
+        evictions: number of cached weightings dropped to keep cache size
+        invalidations: number of times cache was dropped, because weights were changed
+    """
+    entries: int
+    hits: int
+    derived: int
+    misses: int
+    bypassed: int
+    evictions: int
+    invalidations: int
+
+    @property
+    def hitRate(self) -> float:
+        answered = self.hits + self.derived
+        total = answered + self.misses + self.bypassed
+        return answered / total if total else 0.0
+
+
+def canonicalGroup(indices: Union[range, Sequence[int]], coinsNumber: int, maxRuns: Optional[int] = None) -> \
+        Optional[CanonicalGroup]:
+    """
+    Function returns group of coins as sorted runs of consecutive indices, so the same coins have the same key
+    whatever order and form of group are. None is returned for group with repeated coin, since its weight
+    counts that coin several times, and for group of more than maxRuns runs.
+    """
+    if isinstance(indices, range) and indices.step == 1:
+        return ((indices.start, indices.stop),) if len(indices) else ()
+    if len(indices) == 0:
+        return ()
+
+    indices = np.sort(np.asarray(indices, dtype=np.intp))
+    if indices[0] < 0:
+        # negative indices count coins from the end, as in numpy
+        indices = np.sort(indices % coinsNumber)
+    steps = np.diff(indices)
+    if len(steps) and not steps.all():
+        return None
+    breaks = np.flatnonzero(steps != 1) + 1
+    if maxRuns is not None and len(breaks) >= maxRuns:
+        return None
+    starts = indices[np.concatenate(([0], breaks))]
+    stops = indices[np.concatenate((breaks - 1, [len(indices) - 1]))] + 1
+    return tuple(zip(starts.tolist(), stops.tolist()))
+
+
+class CachedCoinsKeeper:
+    """
+    Keeper, which memoizes results of balance of wrapped keeper, e.g. when detections on the same coins
+    are replayed or audited and every weighting costs operation of physical scale.
+
+    Weighting is keyed by canonical forms of both groups, pair of groups is ordered, so weighting of swapped
+    groups is answered from the same entry with opposite sign. The least recently used entries are evicted,
+    when there are more than maxsize of them. Cache is dropped, when weightsVersion of keeper is changed,
+    i.e. when weights are assigned or updated through keeper; changes of weights array in place
+    must be followed by invalidate call.
+
+    Cached results form graph of groups, where each weighting is edge. If transitive is set, result of
+    weighting, which isn't cached, is derived from path of cached results, e.g. A < B and B = C give A < C,
+    which is sound for any weights. Nothing else is derived, e.g. sums of groups aren't combined.
+
+    Any other attribute is taken from wrapped keeper, so cached keeper is passed to CoinsDetector as is.
+    """
+
+    def __init__(self, ck: CoinsKeeper, maxsize: int = 1 << 16, transitive: bool = True, maxRuns: int = 1024,
+                 maxDerivationNodes: int = 256):
+        """
+        Args:
+            ck: wrapped keeper
+            maxsize: the largest number of cached weightings
+            transitive: whether results are derived from cached ones by transitivity
+            maxRuns: groups of more runs of consecutive coins aren't cached, since keys of them take much memory
+            maxDerivationNodes: the largest number of groups visited to derive one result
+        """
+        assert maxsize > 0, "Cache must hold at least one weighting"
+        self.ck = ck
+        self.maxsize = maxsize
+        self.transitive = transitive
+        self.maxRuns = maxRuns
+        self.maxDerivationNodes = maxDerivationNodes
+        # (groupA, groupB) with groupA < groupB -> result of balance(groupA, groupB)
+        self.results: "OrderedDict[Tuple[CanonicalGroup, CanonicalGroup], int]" = OrderedDict()
+        # group -> {other group: result of balance(group, other group)}
+        self.graph: Dict[CanonicalGroup, Dict[CanonicalGroup, int]] = {}
+        self.version = ck.weightsVersion
+        self.hits = self.derived = self.misses = self.bypassed = self.evictions = self.invalidations = 0
+
+    def __getattr__(self, name: str):
+        # it's called only for attributes, which aren't found in cached keeper
+        return getattr(self.ck, name)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(len(self.results), self.hits, self.derived, self.misses, self.bypassed, self.evictions,
+                          self.invalidations)
+
+    def invalidate(self):
+        """
+        Function drops all cached results.
+        """
+        self.results.clear()
+        self.graph.clear()
+        self.version = self.ck.weightsVersion
+        self.invalidations += 1
+
+    def balance(self, left_indices, right_indices):
+        '''
+        weighting of two groups of coins, result is the same as in CoinsKeeper.balance,
+        but keeper weighs only groups, which result isn't cached and can't be derived.
+        '''
+        if self.ck.weightsVersion != self.version:
+            self.invalidate()
+
+        coinsNumber = len(self.ck.weights)
+        groupL = canonicalGroup(left_indices, coinsNumber, self.maxRuns)
+        groupR = canonicalGroup(right_indices, coinsNumber, self.maxRuns)
+        if groupL is None or groupR is None:
+            self.bypassed += 1
+            return self.ck.balance(left_indices, right_indices)
+
+        if groupL == groupR:
+            self.derived += 1
+            return 0
+        key, sign = ((groupL, groupR), 1) if groupL < groupR else ((groupR, groupL), -1)
+
+        managingItem = self.results.get(key)
+        if managingItem is not None:
+            self.results.move_to_end(key)
+            self.hits += 1
+            return sign * managingItem
+
+        if self.transitive and groupL in self.graph and groupR in self.graph:
+            managingItem = self.derive(groupL, groupR)
+            if managingItem is not None:
+                self.derived += 1
+                return managingItem
+
+        self.misses += 1
+        managingItem = self.ck.balance(left_indices, right_indices)
+        self.store(key, sign * managingItem)
+        return managingItem
+
+    def balanceRanges(self, left_start: int, left_stop: int, right_start: int, right_stop: int):
+        '''
+        weighting of two contiguous groups of coins, it's answered from cache as in balance method.
+        '''
+        return self.balance(range(left_start, left_stop), range(right_start, right_stop))
+
+    def store(self, key: Tuple[CanonicalGroup, CanonicalGroup], managingItem: int):
+        groupA, groupB = key
+        self.results[key] = managingItem
+        self.graph.setdefault(groupA, {})[groupB] = managingItem
+        self.graph.setdefault(groupB, {})[groupA] = -managingItem
+        if len(self.results) > self.maxsize:
+            (groupA, groupB), _ = self.results.popitem(last=False)
+            for group, other in ((groupA, groupB), (groupB, groupA)):
+                edges = self.graph[group]
+                del edges[other]
+                if not edges:
+                    del self.graph[group]
+            self.evictions += 1
+
+    def derive(self, groupL: CanonicalGroup, groupR: CanonicalGroup) -> Optional[int]:
+        """
+        Function returns result of balance(groupL, groupR), which follows from cached results, or None.
+        Right group is heavier, if there is path from left group to it, where every next group is
+        not lighter and at least one is heavier; groups are equal, if there is path of equal groups.
+        """
+        for direction in (1, -1):
+            # breadth-first search over pairs (group, whether strictly heavier group was passed)
+            frontier = [(groupL, False)]
+            visited = {frontier[0]}
+            while frontier and len(visited) <= self.maxDerivationNodes:
+                nextFrontier = []
+                for group, strict in frontier:
+                    for other, managingItem in self.graph[group].items():
+                        if managingItem == -direction:
+                            continue
+                        state = (other, strict or managingItem == direction)
+                        if other == groupR:
+                            # equal groups are found by the first search
+                            return direction if state[1] else 0
+                        if state not in visited:
+                            visited.add(state)
+                            nextFrontier.append(state)
+                frontier = nextFrontier
+        return None
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsDetector import solve
+
+    class CountingCoinsKeeper(CoinsKeeper):
+        """
+        Keeper, which counts weightings, as if each of them was operation of physical scale.
+        """
+        weightingsNumber = 0
+
+        def balance(self, left_indices, right_indices):
+            self.weightingsNumber += 1
+            return super().balance(left_indices, right_indices)
+
+    replays = 20
+    strategies = ("classic", "compiled", "optimal", "static")
+    print(f"{replays} replays of detections with {len(strategies)} strategies on the same coins:")
+    print("| coins | scale weightings without cache | scale weightings with cache | hit rate | us/detection with cache |")
+    print("|------:|-------------------------------:|----------------------------:|---------:|------------------------:|")
+    for coinsNumber in (12, 1000, 10 ** 5):
+        ck = CountingCoinsKeeper(n_gen=coinsNumber - 1, seed=coinsNumber)
+        cached = CachedCoinsKeeper(CountingCoinsKeeper(n_gen=ck.n_gen, weights=ck.weights))
+        t0 = time.perf_counter()
+        for _ in range(replays):
+            for strategy in strategies:
+                assert solve(cached, strategy)[:2] == solve(ck, strategy)[:2]
+        elapsed = time.perf_counter() - t0
+        print(f"| {coinsNumber} | {ck.weightingsNumber} | {cached.ck.weightingsNumber} | {cached.stats().hitRate:.3f} | "
+              f"{elapsed / replays / len(strategies) * 1e6:.1f} |")
+
+    # audit of single coins against their neighbours and against each other: most of later comparisons follow
+    # from earlier ones by transitivity
+    ck = CountingCoinsKeeper(n_gen=99, seed=0)
+    cached = CachedCoinsKeeper(CountingCoinsKeeper(n_gen=ck.n_gen, weights=ck.weights))
+    for i in range(99):
+        cached.balance([i], [i + 1])
+    rng = np.random.default_rng(0)
+    for i, j in rng.integers(0, 100, size=(1000, 2)):
+        assert cached.balance([int(i)], [int(j)]) == ck.balance([int(i)], [int(j)])
+    print(f"audit of 1000 random pairs of 100 coins after 99 neighbour weightings: {cached.stats()}")
@@ -1,12 +1,23 @@
 import math
-from typing import Dict, List, Tuple, Optional
+import time
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple, Optional, TextIO, Union
 
-from colorama import Fore, Style
+from CoinsKeeper import CoinsKeeper
+from WeighingEvents import Verbosity, WeighingEvent, WeighingRenderer, formatGroup
 
-import pandas as pd
+if TYPE_CHECKING:
+    from DetectorObservers import DetectorObserver
 
-from CoinsKeeper import CoinsKeeper
-from benchmark import benchmark
+# strategies of CoinsDetector and methods, which find the only fake coin with them;
+# each method imports module of its strategy, so detector with classic strategy doesn't import any of them
+STRATEGY_ALGORITHMS = {
+    "classic": "classicAlgorithm",
+    "compiled": "compiledAlgorithm",
+    "optimal": "optimalAlgorithm",
+    "search": "searchAlgorithm",
+    "scale": "scaleAlgorithm",
+    "static": "staticAlgorithm",
+}
 
 
 class CoinsDetector:
@@ -14,7 +25,33 @@ class CoinsDetector:
     Class which contains all required methods and information in order to find fake coin among genuine ones.
     """
 
-    def __init__(self, ck: CoinsKeeper):
+    def __init__(self, ck: CoinsKeeper, verbosity: Verbosity = Verbosity.SILENT, strategy: str = "classic",
+                 strategyCacheDir: Optional[str] = None, searchObjective: str = "worst",
+                 observers: Sequence["DetectorObserver"] = ()):
+        """
+        Args:
+            ck: keeper of coins weights
+            verbosity: level of output, see Verbosity; nothing is rendered by default, full output of
+                console interface is opted in explicitly
+            strategy: 'classic' to run partCaseAlgorithm or genCaseAlgorithm,
+                'compiled' to execute cached plan of StrategyCompiler, see compiledAlgorithm,
+                'optimal' to find fake coin and its direction in the least number of weightings, see optimalAlgorithm,
+                'search' to take weightings from exhaustive search, see searchAlgorithm,
+                'scale' to measure total mass of coins with digital scale, see scaleAlgorithm,
+                'static' to do fixed non-adaptive weightings and decode their outcomes, see staticAlgorithm
+            strategyCacheDir: directory of on-disk cache of compiled plans, they are cached only in memory if it's None
+            searchObjective: 'worst' or 'expected' objective of search strategy, see StrategySearch,
+                it's checked only for search strategy
+            observers: observers of weightings, rounds, phases and results, see DetectorObservers
+        """
+        if strategy not in STRATEGY_ALGORITHMS:
+            raise ValueError(f"Unknown strategy: {strategy}, expected one of {', '.join(STRATEGY_ALGORITHMS)}")
+        if strategy == "search":
+            from StrategySearch import OBJECTIVES
+
+            if searchObjective not in OBJECTIVES:
+                raise ValueError(f"Unknown search objective: {searchObjective}, "
+                                 f"expected one of {', '.join(OBJECTIVES)}")
         self.ck = ck
         self.coinsState: Dict[str, int] = self.ck.getCoinsState()
 
@@ -24,9 +61,22 @@ class CoinsDetector:
         self.fakeCoinIsUnknown = True if self.coinsState["n_fake"] >= 1 else False
 
         self.coinsNumber = sum(self.coinsState.values())
+        self.fakesNumber = self.coinsState["n_fake"] + self.coinsState["n_fake_l"] + self.coinsState["n_fake_h"]
         # self.left_pan: List[int] = None
         # self.right_pan: List[int] = None
         self.weightingCount = 0
+        self.elapsed: float = 0.0
+
+        self.strategy = strategy
+        self.strategyCacheDir = strategyCacheDir
+        self.searchObjective = searchObjective
+
+        self.verbosity = verbosity
+        self.renderer = WeighingRenderer(self.coinsNumber, verbosity)
+        # events are emitted only if verbosity isn't silent
+        self.weighingEvents: List[WeighingEvent] = []
+        # hooks are called and balance is timed only if there are observers
+        self.observers: List["DetectorObserver"] = list(observers)
 
     # def getLeftPan(self):
     #     return self.left_pan
@@ -34,84 +84,340 @@ class CoinsDetector:
     # def getRightPan(self):
     #     return self.right_pan
 
-    def weightingProcess(self, groupL: List[int], groupR: List[int], managingItem: int):
+    def weighGroups(self, groupL: range, groupR: range) -> int:
         """
-        Displays weighting two groups of coins.
+        Weights two groups of coins using the method balance from CoinsKeeper class and registers the weighting.
 
         Args:
-            groupL: first group of coins indices
-            groupR: second group of coins indices
-            managingItem: value that describes result of weighting:
-                if managingItem == -1, groupL is heavier than groupR
+            groupL: first group of coins indices as range
+            groupR: second group of coins indices as range
+        Returns:
+            managingItem: result of CoinsKeeper.balance
+        """
+        if self.observers:
+            return self.observedWeighGroups(groupL, groupR)
+        managingItem = self.ck.balance(groupL, groupR)
+        self.weightingCount += 1
+        if self.verbosity > Verbosity.SILENT:
+            self.weightingProcess(groupL=groupL, groupR=groupR, managingItem=managingItem)
+        return managingItem
 
-                if managingItem == 0, groupL is equal to groupR by weight
+    def observedWeighGroups(self, groupL: range, groupR: range) -> int:
+        """
+        Weights two groups of coins as weighGroups does, time of CoinsKeeper.balance is measured
+        and the weighting is passed to observers.
+        """
+        t0 = time.perf_counter_ns()
+        managingItem = self.ck.balance(groupL, groupR)
+        latencyNs = time.perf_counter_ns() - t0
+        self.weightingCount += 1
+        event = WeighingEvent(self.weightingCount, groupL, groupR, managingItem)
+        for observer in self.observers:
+            observer.onWeighing(event, latencyNs)
+        if self.verbosity > Verbosity.SILENT:
+            self.weightingProcess(groupL=groupL, groupR=groupR, managingItem=managingItem)
+        return managingItem
+
+    def notifyRound(self, currIndices: Union[range, Sequence[int]]):
+        """
+        Passes number of remaining candidates to observers.
+        """
+        for observer in self.observers:
+            observer.onRound(len(currIndices))
 
-                if managingItem == 1, groupL is lighter than groupR
+    def notifyPhase(self, name: str, elapsedNs: int):
+        for observer in self.observers:
+            observer.onPhase(name, elapsedNs)
+
+    def measureGroup(self, indices: Union[range, Sequence[int]], multiplicities: Optional[Sequence[int]] = None) -> \
+            int:
         """
-        print("Weighting---------------")
-        indices = [i for i in range(self.coinsNumber)]
-        indecesStr = list(map(str, indices))
+        Measures total mass of group of coins using the method weigh from CoinsKeeper class and registers
+        the measurement, it's counted as weighting.
 
-        indecesStr[groupL[0]] = f"({Fore.GREEN}" + indecesStr[groupL[0]]
-        indecesStr[groupL[-1]] = indecesStr[groupL[-1]] + f"{Style.RESET_ALL})"
+        Args:
+            indices: group of coins indices
+            multiplicities: how many times each coin is put on the scale, each coin is put once if it's None
+        Returns:
+            mass: result of CoinsKeeper.weigh
+        """
+        if self.observers:
+            t0 = time.perf_counter_ns()
+            mass = self.ck.weigh(indices, multiplicities)
+            latencyNs = time.perf_counter_ns() - t0
+            self.weightingCount += 1
+            for observer in self.observers:
+                observer.onMeasurement(indices, mass, latencyNs)
+        else:
+            mass = self.ck.weigh(indices, multiplicities)
+            self.weightingCount += 1
+        if self.verbosity >= Verbosity.WINDOWED:
+            coded = "" if multiplicities is None else " with coded multiplicities"
+            self.renderer.write(f"Measurement {self.weightingCount}: {formatGroup(indices)}{coded}, mass {mass}")
+        return mass
+
+    def weightingProcess(self, groupL: range, groupR: range, managingItem: int):
+        """
+        Emits weighting event of two groups of coins and displays it according to verbosity level.
 
-        indecesStr[groupR[0]] = f"({Fore.GREEN}" + indecesStr[groupR[0]]
-        indecesStr[groupR[-1]] = indecesStr[groupR[-1]] + f"{Style.RESET_ALL})"
+        Args:
+            groupL: first group of coins indices as range
+            groupR: second group of coins indices as range
+            managingItem: value that describes result of weighting:
+                if managingItem == -1, groupL is heavier than groupR
 
-        formattedStr = ", ".join(indecesStr)
+                if managingItem == 0, groupL is equal to groupR by weight
 
-        print(f"Indices of coins: {formattedStr}\n")
-        if managingItem == 1:
-            print(f"{groupL} < {groupR}\nLeft group is lighter than right group")
-        elif managingItem == -1:
-            print(f"{groupL} > {groupR}\nLeft group is heavier than right group")
-        else:
-            print(f"{groupL} = {groupR}\nLeft group is equal to right group by weight")
-        print("------------------------\n")
+                if managingItem == 1, groupL is lighter than groupR
+        """
+        event = WeighingEvent(self.weightingCount, groupL, groupR, managingItem)
+        self.weighingEvents.append(event)
+        self.renderer.render(event)
 
-    def solver(self):
+    def solver(self) -> Tuple[Union[int, List[int]], Optional[int]]:
         """
         Function executes algorithms of finding fake coins and print the result, according to coins information:
 
+        if there are several fake coins, multipleFakesAlgorithm method will be executed;
+
         if it's unknown if fake coin is lighter or heavier, genCaseAlgorithm method will be executed;
 
         if we know whether fake coin is lighter or heavier, partCaseAlgorithm method will be executed;
+
+        Returns:
+            index: index of fake coin, sorted list of indices if there are several fake coins;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown.
         """
-        if self.fakeCoinIsLighter or self.fakeCoinIsHeavier:
+        summary = self.verbosity >= Verbosity.SUMMARY
+        self.weighingEvents = []
+        fakeCoinIndex, fakeCoinWeightIndex = None, None
+        algorithmName = None
+
+        strategy = self.strategy
+        if strategy == "scale" and not self.scaleIsAvailable():
+            # only pan balance is available, so comparison algorithm is used
+            strategy = "classic"
+
+        if self.fakesNumber > 1:
+            if summary:
+                print(f"Coins number = {self.coinsNumber}")
+                print(f"Fake coins number = {self.fakesNumber}")
+                print()
+
+            self.weightingCount = 0
+            t0 = time.perf_counter()
+            fakeCoinIndex = self.multipleFakesAlgorithm()
+            self.elapsed = time.perf_counter() - t0
+            fakeCoinWeightIndex = -1 if self.fakeCoinIsLighter else 1
+            algorithmName = "multipleFakesAlgorithm"
+
+            if summary:
+                print(f"multipleFakesAlgorithm elapsed {self.elapsed:e} secs")
+                print(f"In the end weighting number equals {self.weightingCount}")
+                print(f"{'lighter' if self.fakeCoinIsLighter else 'heavier'} fake coins have indices: {fakeCoinIndex}")
+
+        elif self.fakeCoinIsLighter or self.fakeCoinIsHeavier:
             n = math.ceil(math.log10(self.coinsNumber) / math.log10(3))
 
-            print(f"Expected number of weighting: {n}")
-            print(f"Coins number = {self.coinsNumber}")
-            print()
+            if summary:
+                print(f"Expected number of weighting: {n}")
+                print(f"Coins number = {self.coinsNumber}")
+                print()
 
             self.weightingCount = 0
-            fakeCoinIndex = self.partCaseAlgorithm(n)
-            print(f"In the end weighting number equals {self.weightingCount}")
-
-            if self.fakeCoinIsLighter:
-                print(f"lighter fake coin has index: {fakeCoinIndex}")
-            else:
-                print(f"heavier fake coin has index: {fakeCoinIndex}")
+            t0 = time.perf_counter()
+            fakeCoinIndex, _ = getattr(self, STRATEGY_ALGORITHMS[strategy])()
+            self.elapsed = time.perf_counter() - t0
+            fakeCoinWeightIndex = -1 if self.fakeCoinIsLighter else 1
+            algorithmName = "partCaseAlgorithm" if strategy == "classic" else f"{strategy}Algorithm"
+
+            if summary:
+                print(f"{algorithmName} elapsed {self.elapsed:e} secs")
+                print(f"In the end weighting number equals {self.weightingCount}")
+
+                if self.fakeCoinIsLighter:
+                    print(f"lighter fake coin has index: {fakeCoinIndex}")
+                else:
+                    print(f"heavier fake coin has index: {fakeCoinIndex}")
 
         elif self.fakeCoinIsUnknown:
             n = math.ceil((math.log10(self.coinsNumber) / math.log10(3)) + 1)
 
-            print(f"{n=}")
-            print(f"Coins number = {self.coinsNumber}")
-            print()
+            if summary:
+                print(f"{n=}")
+                print(f"Coins number = {self.coinsNumber}")
+                print()
 
             self.weightingCount = 0
-            fakeCoinIndex, fakeCoinWeightIndex = self.genCaseAlgorithm(n)
-            print(f"In the end weighting number equals {self.weightingCount}")
+            t0 = time.perf_counter()
+            fakeCoinIndex, fakeCoinWeightIndex = getattr(self, STRATEGY_ALGORITHMS[strategy])()
+            self.elapsed = time.perf_counter() - t0
+            algorithmName = "genCaseAlgorithm" if strategy == "classic" else f"{strategy}Algorithm"
+
+            if summary:
+                print(f"{algorithmName} elapsed {self.elapsed:e} secs")
+                print(f"In the end weighting number equals {self.weightingCount}")
+
+                if fakeCoinWeightIndex == -1:
+                    print(f"lighter fake coin has index: {fakeCoinIndex}")
+                elif fakeCoinWeightIndex == 1:
+                    print(f"heavier fake coin has index: {fakeCoinIndex}")
+                elif fakeCoinWeightIndex is None:
+                    print(f"can't find if fake coin is lighter or heavier")
+
+        if self.observers and algorithmName is not None:
+            elapsedNs = int(self.elapsed * 1e9)
+            self.notifyPhase(algorithmName, elapsedNs)
+            for observer in self.observers:
+                observer.onSolved(fakeCoinIndex, fakeCoinWeightIndex, self.weightingCount, elapsedNs)
+        return fakeCoinIndex, fakeCoinWeightIndex
+
+    def getFakeMode(self) -> int:
+        """
+        Function returns fake mode of coins, one of WeightsIO.FAKE_MODE_* values.
+        """
+        from WeightsIO import getFakeMode
+
+        return getFakeMode(self.coinsState["n_fake"], self.coinsState["n_fake_l"], self.coinsState["n_fake_h"])
+
+    def classicAlgorithm(self) -> Tuple[int, Optional[int]]:
+        """
+        In this function fake coin is found by original algorithms: partCaseAlgorithm, if it's known whether
+        fake coin is lighter or heavier, and genCaseAlgorithm otherwise.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown.
+        """
+        if self.fakeCoinIsLighter or self.fakeCoinIsHeavier:
+            n = math.ceil(math.log10(self.coinsNumber) / math.log10(3))
+            return self.partCaseAlgorithm(n), -1 if self.fakeCoinIsLighter else 1
+        n = math.ceil((math.log10(self.coinsNumber) / math.log10(3)) + 1)
+        return self.genCaseAlgorithm(n)
+
+    def compiledAlgorithm(self) -> Tuple[int, Optional[int]]:
+        """
+        In this function weightings are taken from plan, which is compiled once per coins number and fake mode
+        and is cached, see StrategyCompiler. Splits are the same as in partCaseAlgorithm and genCaseAlgorithm,
+        but weightings continue until one candidate is left, so number of them isn't capped.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown.
+        """
+        from StrategyCompiler import executeStrategy, getStrategy
+
+        fakeMode = self.getFakeMode()
+        t0 = time.perf_counter_ns()
+        strategy = getStrategy(self.coinsNumber, fakeMode, self.strategyCacheDir)
+        if self.observers:
+            self.notifyPhase("getStrategy", time.perf_counter_ns() - t0)
+        return executeStrategy(strategy, self.weighGroups)
+
+    def optimalAlgorithm(self) -> Tuple[int, int]:
+        """
+        In this function state of each coin is tracked (unknown, suspected to be light or heavy, genuine)
+        and each weighting is chosen from numbers of coins in each state, see OptimalSolver.
+        Fake coin and its direction are always found in at most log3(2N + 3) weightings.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier.
+        """
+        from OptimalSolver import optimalAlgorithm
+
+        return optimalAlgorithm(self.coinsNumber, self.weighGroups, self.getFakeMode())
+
+    def searchAlgorithm(self) -> Tuple[int, int]:
+        """
+        In this function each weighting is taken from exhaustive search over numbers of coins in each state,
+        which minimizes number of weightings in the worst case or expected number of them, see StrategySearch.
+        Search memo is shared by all detectors of the process, its statistics are printed in summary.
+        Coins number is searched only up to StrategySearch.MAX_SEARCH_COINS, larger instances are solved
+        by optimalAlgorithm.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier.
+        """
+        from OptimalSolver import optimalAlgorithm
+        from StrategySearch import MAX_SEARCH_COINS, getSearch
+
+        if self.coinsNumber > MAX_SEARCH_COINS[self.searchObjective]:
+            if self.verbosity >= Verbosity.SUMMARY:
+                self.renderer.write(f"search: {self.coinsNumber} coins are more than "
+                                    f"{MAX_SEARCH_COINS[self.searchObjective]}, optimalAlgorithm is used")
+            return self.optimalAlgorithm()
+
+        search = getSearch(self.searchObjective)
+        result = optimalAlgorithm(self.coinsNumber, self.weighGroups, self.getFakeMode(), planner=search.planWeighing)
+        if self.verbosity >= Verbosity.SUMMARY:
+            self.renderer.write(f"search: {search.stats()}")
+        return result
+
+    def multipleFakesAlgorithm(self) -> List[int]:
+        """
+        In this function it's considered that there are several fake coins of the same weight and we know
+        if they are lighter or heavier. Fake coins are found by adaptive group testing, see GroupTesting.
+
+        Returns:
+            indices: sorted indices of fake coins
+        """
+        assert not self.fakeCoinIsUnknown, \
+            "Several fake coins can be found only if it's known whether they are lighter or heavier"
+        from GroupTesting import findFakes
 
-            if fakeCoinWeightIndex == -1:
-                print(f"lighter fake coin has index: {fakeCoinIndex}")
-            elif fakeCoinWeightIndex == 1:
-                print(f"heavier fake coin has index: {fakeCoinIndex}")
-            elif fakeCoinWeightIndex is None:
-                print(f"can't find if fake coin is lighter or heavier")
+        return findFakes(self.coinsNumber, self.fakesNumber, self.weighGroups, self.getFakeMode())
+
+    def scaleIsAvailable(self) -> bool:
+        """
+        Function returns whether keeper has digital scale and weight of genuine coin can be found from mean weight,
+        i.e. there are more than 2 * MAX_DEVIATION coins.
+        """
+        if not self.ck.hasScale:
+            return False
+        from DigitalScale import MAX_DEVIATION
+
+        return self.coinsNumber > 2 * MAX_DEVIATION
+
+    def scaleAlgorithm(self) -> Tuple[int, int]:
+        """
+        In this function total masses of coins are measured with digital scale instead of comparing groups:
+        all coins are measured once and coin i is measured i + 1 times, see DigitalScale.
+        Fake coin and its direction are found in two measurements whatever coins number is.
+        Weight of genuine coin is guessed from mean weight, which is wrong for large deviation of fake coin,
+        so found coin is checked with two more measurements and classicAlgorithm is run, if the check fails.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier.
+        """
+        from DigitalScale import scaleAlgorithm
+
+        try:
+            index, indicator = scaleAlgorithm(self.coinsNumber, self.measureGroup, verify=True)
+            if self.fakeCoinIsLighter and indicator != -1 or self.fakeCoinIsHeavier and indicator != 1:
+                raise ValueError(f"Fake coin {index} has wrong direction {indicator}")
+            return index, indicator
+        except ValueError as error:
+            if self.verbosity >= Verbosity.SUMMARY:
+                self.renderer.write(f"scaleAlgorithm failed: {error}, classicAlgorithm is used")
+            return self.classicAlgorithm()
+
+    def staticAlgorithm(self) -> Tuple[int, int]:
+        """
+        In this function all weightings are fixed in advance by ternary codes of coins, like in the classic
+        12 coins solution, so none of them depends on outcomes of others, see StaticSchedule.
+        Fake coin and its direction are found by lookup of outcomes after ceil(log3(2N + 3)) weightings.
+
+        Returns:
+            index: index of fake coin;
+            indicator: -1 if fake coin is lighter, 1 if it's heavier.
+        """
+        from StaticSchedule import staticAlgorithm
+
+        return staticAlgorithm(self.coinsNumber, self.weighGroups, self.getFakeMode())
 
-    @benchmark
     def partCaseAlgorithm(self, n):
         """
         In this function it's considered that we know if fake coins is lighter or heavier
@@ -122,7 +428,8 @@ class CoinsDetector:
             index: index of fake coin
         """
 
-        currIndices = [i for i in range(self.coinsNumber)]
+        # groups are carried as ranges, so slicing them doesn't copy any indices
+        currIndices = range(self.coinsNumber)
 
         for i in range(n):
             currCoinsNumber = len(currIndices)
@@ -147,11 +454,12 @@ class CoinsDetector:
             group1 = currIndices[:b]
 
             currIndices = self.getFakeGroupPartCaseAlg(group1, group2, group3)
+            self.notifyRound(currIndices)
 
         # print(currIndices)
         return currIndices[0]
 
-    def getFakeGroupPartCaseAlg(self, group1: List[int], group2: List[int], group3: Optional[List[int]]) -> List[int]:
+    def getFakeGroupPartCaseAlg(self, group1: range, group2: range, group3: Optional[range]) -> range:
         """
         The method compares weights of two coins group using the method balance from CoinsKeeper class,
         and then decides which group contains a fake coin, depending on whether a fake coin is lighter or heavier.
@@ -162,15 +470,13 @@ class CoinsDetector:
             group3: third group of coins with their indices in it
 
         Returns:
-            group: list of coin's indices which contains a fake coin
+            group: range of coin's indices which contains a fake coin
         """
         # managing_item =
         # 1 if group2 > group1
         # -1 if group2 < group1
         # 0 if group2 == group1
-        managing_item = self.ck.balance(group1, group2)
-        self.weightingCount += 1
-        self.weightingProcess(groupL=group1, groupR=group2, managingItem=managing_item)
+        managing_item = self.weighGroups(group1, group2)
 
         if managing_item == 0:
             return group3
@@ -189,7 +495,6 @@ class CoinsDetector:
             else:
                 return group1
 
-    @benchmark
     def genCaseAlgorithm(self, n):
         """
         In this function it's considered that we don't know if fake coins is lighter or heavier
@@ -199,27 +504,25 @@ class CoinsDetector:
         Returns:
             index: index(integer) of fake coin
         """
-        indices = [i for i in range(self.coinsNumber)]
-        currIndices = [i for i in range(self.coinsNumber)]
+        currIndices = range(self.coinsNumber)
         assert self.coinsNumber > 2, \
             "Can't solver the problem for unknown fake coin weight relation and for 2 coins in total"
         fakeCoinWeightIndex: int = None
+        # weightings may be done before, e.g. when scaleAlgorithm falls back to this one
+        firstWeighting = self.weightingCount
 
-        while self.weightingCount <= (n + 2):
+        while self.weightingCount - firstWeighting <= (n + 2):
             currCoinsNumber = len(currIndices)
             if currCoinsNumber == 1:
                 return currIndices[0], fakeCoinWeightIndex
 
             elif currCoinsNumber == 2:
-                managing_item0 = self.ck.balance(currIndices[:1], currIndices[1:])
-                self.weightingCount += 1
-                self.weightingProcess(currIndices[:1], currIndices[1:], managingItem=managing_item0)
+                managing_item0 = self.weighGroups(currIndices[:1], currIndices[1:])
 
-                genCoinIndex = list(filter(lambda x: x not in currIndices, indices))[0]
-                managing_item1 = self.ck.balance(currIndices[:1], indices[genCoinIndex: genCoinIndex + 1])
-                self.weightingCount += 1
-                self.weightingProcess(currIndices[:1], indices[genCoinIndex: genCoinIndex + 1],
-                                      managingItem=managing_item1)
+                # any coin outside of current range is genuine, the nearest one is taken
+                genCoinIndex = currIndices.start - 1 if currIndices.start > 0 else currIndices.stop
+                genCoin = range(genCoinIndex, genCoinIndex + 1)
+                managing_item1 = self.weighGroups(currIndices[:1], genCoin)
 
                 if managing_item1 == 0:
                     if managing_item0 == 1:
@@ -235,9 +538,9 @@ class CoinsDetector:
                     return currIndices[0], 1
 
             if currCoinsNumber == 3:
-                group0 = [currIndices[0], ]
-                group1 = [currIndices[1], ]
-                group2 = [currIndices[2], ]
+                group0 = currIndices[0:1]
+                group1 = currIndices[1:2]
+                group2 = currIndices[2:3]
                 group3 = None
 
             else:
@@ -263,13 +566,15 @@ class CoinsDetector:
             currIndices, a = self.getFakeGroupGenCaseAlg(group0, group1, group2, group3)
             if a is not None:
                 fakeCoinWeightIndex = a
-            print(f"current indices = {currIndices}")
+            self.notifyRound(currIndices)
+            self.renderer.renderRound(currIndices)
 
-        print(currIndices, fakeCoinWeightIndex)
+        if self.verbosity >= Verbosity.FULL:
+            print(list(currIndices), fakeCoinWeightIndex)
         return currIndices[0], fakeCoinWeightIndex
 
-    def getFakeGroupGenCaseAlg(self, group0: List[int], group1: List[int], group2: List[int], group3: List[int]) -> \
-            Tuple[List[int], Optional[int]]:
+    def getFakeGroupGenCaseAlg(self, group0: range, group1: range, group2: range, group3: Optional[range]) -> \
+            Tuple[range, Optional[int]]:
         """
         The method compares weights of three coins group using the method balance from CoinsKeeper class,
         and then decides which group contains a fake coin.
@@ -292,13 +597,8 @@ class CoinsDetector:
         # - if groupR == groupL
         # managing_item = self.ck.balance(groupL, groupR)
 
-        managing_item0 = self.ck.balance(group0, group1)
-        self.weightingCount += 1
-        self.weightingProcess(groupL=group0, groupR=group1, managingItem=managing_item0)
-
-        managing_item1 = self.ck.balance(group0, group2)
-        self.weightingCount += 1
-        self.weightingProcess(groupL=group0, groupR=group2, managingItem=managing_item1)
+        managing_item0 = self.weighGroups(group0, group1)
+        managing_item1 = self.weighGroups(group0, group2)
 
         # group0, group1, group2 have no difference in weight
         if managing_item0 == 0 and managing_item1 == 0:
@@ -329,21 +629,49 @@ class CoinsDetector:
                 return group0, 1
 
 
-def run(n_gen=9, n_fake=1, n_fake_l=0, n_fake_h=0, weights=None):
+def run(n_gen=9, n_fake=1, n_fake_l=0, n_fake_h=0, weights=None, verbosity: Verbosity = Verbosity.SILENT,
+        weightsView: Optional[str] = "table", weightsOutput: Union[None, str, TextIO] = None,
+        strategy: str = "classic"):
     """
     Function is used to create all required objects and to invoke method solve.
-    Also, print in pretty way coins with their weights and indices.
+    Also, print in pretty way coins with their weights and indices, if verbosity is at least windowed.
+
+    Args:
+        verbosity: level of output, nothing is printed by default, see Verbosity
+        weightsView: 'table' for paginated markdown tables, 'summary' for run-length summary, None for nothing
+        weightsOutput: None for stdout, file name or text stream where weights are written
+        strategy: 'classic', 'compiled', 'optimal', 'search', 'scale' or 'static', see CoinsDetector
+    Returns:
+        result of CoinsDetector.solver
     """
     ck = CoinsKeeper(n_gen=n_gen, n_fake=n_fake, n_fake_l=n_fake_l, n_fake_h=n_fake_h, weights=weights)
-    indices = [i for i in range(len(ck.weights))]
-    df = pd.DataFrame(columns=indices)
-    df.index.name = "indices"
-    df.loc["weights"] = ck.weights
+    if verbosity >= Verbosity.WINDOWED:
+        from WeightsTable import writeWeights
 
-    print(df.to_markdown())
+        writeWeights(ck.weights, view=weightsView, out=weightsOutput)
 
-    cd = CoinsDetector(ck)
-    cd.solver()
+    cd = CoinsDetector(ck, verbosity=verbosity, strategy=strategy)
+    return cd.solver()
+
+
+def solve(ck: CoinsKeeper, strategy: str = "classic", observers: Sequence["DetectorObserver"] = ()) -> \
+        Tuple[Union[int, List[int]], Optional[int], int]:
+    """
+    Core solving path without any output; together with this module it imports nothing but stdlib and numpy,
+    so it's suitable for short-lived processes.
+
+    Args:
+        ck: keeper of coins weights
+        strategy: 'classic', 'compiled', 'optimal', 'search', 'scale' or 'static', see CoinsDetector
+        observers: observers of detection, see DetectorObservers
+    Returns:
+        index: index of fake coin, sorted list of indices if there are several fake coins;
+        indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown;
+        weightingCount: number of weightings.
+    """
+    cd = CoinsDetector(ck, verbosity=Verbosity.SILENT, strategy=strategy, observers=observers)
+    fakeCoinIndex, fakeCoinWeightIndex = cd.solver()
+    return fakeCoinIndex, fakeCoinWeightIndex, cd.weightingCount
 
 
 def main():
@@ -403,19 +731,18 @@ def main():
             n_fake_l = 0
             n_fake_h = 0
 
-        run(n_gen=n_gen, n_fake=n_fake, n_fake_l=n_fake_l, n_fake_h=n_fake_h, weights=filename)
+        run(n_gen=n_gen, n_fake=n_fake, n_fake_l=n_fake_l, n_fake_h=n_fake_h, weights=filename,
+            verbosity=Verbosity.FULL)
 
 
 if __name__ == '__main__':
+    from WeightsTable import writeWeights
+
     ck = CoinsKeeper(n_gen=100000, n_fake=1, n_fake_l=0, n_fake_h=0, weights=None)
-    indices = [i for i in range(len(ck.weights))]
-    df = pd.DataFrame(columns=indices)
-    df.index.name = "indices"
-    df.loc["weights"] = ck.weights
     #
-    print(df.to_markdown())
+    writeWeights(ck.weights, view="summary")
     #
-    cd = CoinsDetector(ck)
+    cd = CoinsDetector(ck, verbosity=Verbosity.WINDOWED)
     cd.solver()
 
     # main()
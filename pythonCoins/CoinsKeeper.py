@@ -1,5 +1,44 @@
-import random
-from typing import List, Union
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from InstanceGenerator import Seed, chooseWeights, generateWeights, getGenerator
+from WeightsIO import getFakeMode, loadBinWeights, loadTxtWeights
+
+
+def isPlainRange(indices: Union[range, Sequence[int]]) -> bool:
+    """
+    Function returns whether indices are range with step 1 and without negative indices, which is summed
+    as one slice; other ranges are summed index by index, so negative indices count coins from the end.
+    """
+    return isinstance(indices, range) and indices.step == 1 and indices.start >= 0
+
+
+def exactDot(values: np.ndarray, multiplicities: Optional[np.ndarray] = None) -> int:
+    """
+    Function returns dot product of two integer arrays, or sum of values if multiplicities is None, as python int.
+    Products are summed with numpy in int64 by blocks, which are short enough for their sums not to overflow;
+    python integers are used, if even one product doesn't fit into int64.
+    """
+    if len(values) == 0:
+        return 0
+    largest = max(int(values.max()), -int(values.min()))
+    if multiplicities is not None:
+        largest *= max(int(multiplicities.max()), -int(multiplicities.min()))
+    blockSize = np.iinfo(np.int64).max // max(largest, 1)
+    if blockSize == 0:
+        if multiplicities is None:
+            return sum(values.tolist())
+        return sum(value * multiplicity for value, multiplicity in zip(values.tolist(), multiplicities.tolist()))
+
+    total = 0
+    for start in range(0, len(values), blockSize):
+        block = slice(start, start + blockSize)
+        if multiplicities is None:
+            total += int(values[block].sum(dtype=np.int64))
+        else:
+            total += int(np.dot(values[block], multiplicities[block]))
+    return total
 
 
 class CoinsKeeper:
@@ -8,8 +47,13 @@ class CoinsKeeper:
     Store method for comparing weights of different groups of coins.
     '''
 
+    # whether total mass of coins can be measured with weigh method, not only compared with balance method
+    hasScale = True
+    # number of changes of weights, caches of weighting results are dropped, when it changes
+    weightsVersion = 0
+
     def __init__(self, n_gen: int = 9, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0,
-                 weights: Union[List[int], str] = None):
+                 weights: Union[List[int], str] = None, seed: Seed = None):
         '''
         Args:
             n_gen: number of genuine coins
@@ -22,73 +66,170 @@ class CoinsKeeper:
 
                 if weights equal 'file.txt', weights will be read from 'file.txt' file;
 
+                if weights equal 'file.bin', weights and numbers of coins will be mapped from binary 'file.bin' file;
+
                 if weights equal 'file', weights will be read from default file, which is set in setWeightsFromTxtFile function.
+            seed: seed or numpy random generator, which is used to generate weights reproducibly
         '''
 
         self.n_gen = n_gen
         self.n_fake = n_fake
         self.n_fake_l = n_fake_l
         self.n_fake_h = n_fake_h
+        self.rng = getGenerator(seed)
 
         if weights is None:
             self.setRandomWeights()
+        elif not isinstance(weights, str):
+            self.weights = weights
         elif weights == "file":
             self.setWeightsFromTxtFile()
+        elif weights.endswith(".bin"):
+            self.setWeightsFromBinFile(filename=weights)
         elif ".txt" in weights:
             self.setWeightsFromTxtFile(filename=weights)
         else:
             self.weights = weights
 
-    def setRandomWeights(self):
+    @property
+    def weights(self) -> np.ndarray:
         """
-        Function is used to generated weight randomly from range (1, 9) according to information about coins,
-        that had been set before.
+        Weights of coins stored as read-only numpy array, since cumulative sums are built from it;
+        weights are changed by assigning new array to this attribute.
         """
-        possWeights = [i for i in range(4, 7)]
+        return self._weights
 
-        genuineCoinWeight = random.choice(possWeights)
-        possWeights.remove(genuineCoinWeight)
-        possWeights = [1, 2, 3] + possWeights + [7, 8, 9]
+    @weights.setter
+    def weights(self, weights: Union[List[int], np.ndarray]):
+        # view keeps array of caller writable, while weights of keeper can't be changed in place
+        self._weights = np.asarray(weights).view()
+        self._weights.setflags(write=False)
+        # cumulative sums are built lazily on the first range query
+        self._prefixSums = None
+        self.weightsVersion += 1
 
-        # It's considered that fake coins can be only in one of these three states
-        if self.n_fake_l >= 1:
-            fakeCoinWeight = random.choice(list(filter(lambda x: x < genuineCoinWeight, possWeights)))
-        elif self.n_fake_h >= 1:
-            fakeCoinWeight = random.choice(list(filter(lambda x: x > genuineCoinWeight, possWeights)))
-        # self.n_fake >= 1
-        else:
-            fakeCoinWeight = random.choice(possWeights)
+    def getPrefixSums(self) -> np.ndarray:
+        """
+        Function returns cumulative sums of weights, where prefixSums[i] is total weight of coins with indices
+        from 0 to i - 1. Cumulative sums are computed once and are reused until weights are changed.
+        """
+        if self._prefixSums is None:
+            prefixSums = np.zeros(len(self._weights) + 1, dtype=np.int64)
+            np.cumsum(self._weights, dtype=np.int64, out=prefixSums[1:])
+            self._prefixSums = prefixSums
+        return self._prefixSums
+
+    def rangeWeight(self, start: int, stop: int) -> int:
+        """
+        Function returns total weight of contiguous group of coins in constant time.
+
+        Args:
+            start: index of the first coin in group
+            stop: index after the last coin in group
+        Raises:
+            IndexError: if bounds are not 0 <= start <= stop <= number of coins
+        """
+        if not 0 <= start <= stop <= len(self._weights):
+            raise IndexError(f"Range [{start}, {stop}) is out of {len(self._weights)} coins")
+        prefixSums = self.getPrefixSums()
+        return int(prefixSums[stop] - prefixSums[start])
 
-        possWeights.remove(fakeCoinWeight)
+    def groupWeight(self, indices: Union[range, Sequence[int]]) -> int:
+        """
+        Function returns total weight of group of coins.
 
-        weights = [genuineCoinWeight, ] * self.n_gen + \
-                  [fakeCoinWeight, ] * self.n_fake + \
-                  [fakeCoinWeight, ] * self.n_fake_l + \
-                  [fakeCoinWeight, ] * self.n_fake_h
-        random.shuffle(weights)
+        Args:
+            indices: coins indices in weights list; range with step 1 is summed in constant time,
+                any other sequence of indices is summed with numpy. Negative indices count coins from the end
+                as in list, e.g. range(-5, 0) is the last five coins.
+        """
+        if isPlainRange(indices):
+            if len(indices) == 0:
+                return 0
+            return self.rangeWeight(indices.start, indices.stop)
 
-        self.weights = weights
+        if len(indices) == 0:
+            return 0
+        return int(self._weights[np.asarray(indices, dtype=np.intp)].sum(dtype=np.int64))
 
-    def setWeightsFromTxtFile(self, filename: str = "coinsWeightsFile.txt"):
+    def chooseRandomWeights(self) -> Tuple[int, int]:
+        """
+        Function is used to choose weights of genuine and fake coins randomly from range (1, 9)
+        according to information about coins, that had been set before.
+
+        Returns:
+            genuineCoinWeight: weight of genuine coin
+            fakeCoinWeight: weight of fake coin
+        """
+        # It's considered that fake coins can be only in one of these three states
+        genuineCoinWeights, fakeCoinWeights = chooseWeights(self.rng, 1, getFakeMode(self.n_fake, self.n_fake_l,
+                                                                                      self.n_fake_h))
+        return int(genuineCoinWeights[0]), int(fakeCoinWeights[0])
+
+    def setRandomWeights(self):
+        """
+        Function is used to generated weight randomly from range (1, 9) according to information about coins,
+        that had been set before. Weights are stored in compact int8 array, fake coins are placed by drawing
+        their indices with random generator of keeper, so no shuffle over all coins is done.
+        """
+        self.weights, _ = generateWeights(self.n_gen, self.n_fake, self.n_fake_l, self.n_fake_h, seed=self.rng)
+
+    def setWeightsFromTxtFile(self, filename: str = "coinsWeightsFile.txt", chunkSize: int = 1 << 22):
         """
         Function is used to read weights from .txt file, where each weights are integer values seperated with coma.
+        Weights may also be separated with whitespaces and span several lines.
+        File is parsed chunk by chunk straight into compact numpy array, statistics of loading
+        with parse throughput are stored in loadStats attribute.
 
         Args:
             filename: file name
+            chunkSize: number of bytes parsed at once
         """
-        with open(filename, "r") as f:
-            weightsStr = f.readline()
-
-        self.weights = list(map(int, weightsStr.split(",")))
+        self.weights, self.loadStats = loadTxtWeights(filename, chunkSize)
         self.n_gen = len(self.weights) - 1
 
+    def setWeightsFromBinFile(self, filename: str):
+        """
+        Function is used to open binary weights file, which is written by WeightsIO.saveBinWeights or
+        WeightsIO.convertTxtToBin. The file is mapped into memory and is used as weights store without copying,
+        numbers of coins are taken from its header. Statistics of loading are stored in loadStats attribute.
+
+        Args:
+            filename: file name
+        """
+        self.weights, coinsState, self.loadStats = loadBinWeights(filename)
+        self.n_gen = coinsState["n_gen"]
+        self.n_fake = coinsState["n_fake"]
+        self.n_fake_l = coinsState["n_fake_l"]
+        self.n_fake_h = coinsState["n_fake_h"]
+
+    def weigh(self, indices: Union[range, Sequence[int]], multiplicities: Optional[Sequence[int]] = None) -> int:
+        '''
+        measuring of total mass of group of coins with digital scale, which is simulated with stored weights.
+
+        Args:
+            indices: coins indices in weights list or range of them.
+            multiplicities: how many times each coin is put on the scale, e.g. how many coins are taken
+                from each stack of identical coins; each coin is taken once if it's None.
+        Returns:
+            total mass of coins, which is exact even if it doesn't fit into int64
+        '''
+        if multiplicities is None:
+            return self.groupWeight(indices)
+
+        if isPlainRange(indices):
+            weights = self._weights[indices.start:indices.stop]
+        else:
+            weights = self._weights[np.asarray(indices, dtype=np.intp)]
+        return exactDot(weights.astype(np.int64), np.asarray(multiplicities, dtype=np.int64))
+
     def balance(self, left_indices, right_indices):
         '''
         weighting of two groups of coins in order to figure out which one is heavier.
 
         Args:
-            left_indices: coins indices in weights list.
-            right_indices: coins indices in weights list.
+            left_indices: coins indices in weights list or range of them.
+            right_indices: coins indices in weights list or range of them.
         Returns:
             1: if weight of right group of coins is heavier than weight of left one;
             0: if weight of right group of coins is equal to weight of left one;
@@ -96,8 +237,8 @@ class CoinsKeeper:
 
         '''
 
-        leftWeight = sum(map(lambda x: self.weights[x], left_indices))
-        rightWeight = sum(map(lambda x: self.weights[x], right_indices))
+        leftWeight = self.groupWeight(left_indices)
+        rightWeight = self.groupWeight(right_indices)
 
         if rightWeight > leftWeight:
             return 1
@@ -107,13 +248,23 @@ class CoinsKeeper:
 
         return 0
 
+    def balanceRanges(self, left_start: int, left_stop: int, right_start: int, right_stop: int):
+        '''
+        weighting of two contiguous groups of coins in constant time, result is the same as in balance method.
+
+        Args:
+            left_start: index of the first coin in left group.
+            left_stop: index after the last coin in left group.
+            right_start: index of the first coin in right group.
+            right_stop: index after the last coin in right group.
+        '''
+        return self.balance(range(left_start, left_stop), range(right_start, right_stop))
+
     def getCoinsState(self):
         """
         Function which return current information about coins.
         """
-        d = self.__dict__.copy()
-        d.pop("weights")
-        return d
+        return {"n_gen": self.n_gen, "n_fake": self.n_fake, "n_fake_l": self.n_fake_l, "n_fake_h": self.n_fake_h}
 
 
 if __name__ == "__main__":
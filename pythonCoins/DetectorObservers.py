@@ -0,0 +1,237 @@
+import bisect
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from WeighingEvents import WeighingEvent
+
+# upper bounds of latency histogram buckets in nanoseconds: from 1 us to about 1 s, doubling
+DEFAULT_LATENCY_BOUNDS = tuple(1000 << k for k in range(21))
+
+
+class DetectorObserver:
+    """
+    Interface of observers of CoinsDetector, every hook does nothing, so observer overrides only hooks it needs.
+    Hooks are called only if detector has observers, so detector without them pays nothing but one check
+    per weighting.
+    """
+
+    def onWeighing(self, event: WeighingEvent, latencyNs: int):
+        """
+        Hook is called after each weighting of two groups.
+
+        Args:
+            event: weighting event with groups and result of CoinsKeeper.balance
+            latencyNs: time of CoinsKeeper.balance in nanoseconds
+        """
+
+    def onMeasurement(self, indices: Union[range, Sequence[int]], mass: int, latencyNs: int):
+        """
+        Hook is called after each measurement of total mass with digital scale.
+
+        Args:
+            indices: measured group of coins
+            mass: result of CoinsKeeper.weigh
+            latencyNs: time of CoinsKeeper.weigh in nanoseconds
+        """
+
+    def onRound(self, candidates: int):
+        """
+        Hook is called after each round of partCaseAlgorithm and genCaseAlgorithm.
+
+        Args:
+            candidates: number of coins, which still can be fake
+        """
+
+    def onPhase(self, name: str, elapsedNs: int):
+        """
+        Hook is called, when phase of solving ends, e.g. compiling of strategy or algorithm itself.
+
+        Args:
+            name: name of phase, algorithms are named after methods of CoinsDetector, e.g. 'genCaseAlgorithm'
+            elapsedNs: time of phase in nanoseconds
+        """
+
+    def onSolved(self, index: Union[int, List[int]], indicator: Optional[int], weightingCount: int, elapsedNs: int):
+        """
+        Hook is called, when fake coin is found.
+
+        Args:
+            index: index of fake coin, sorted list of indices if there are several fake coins
+            indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown
+            weightingCount: number of weightings
+            elapsedNs: time of algorithm in nanoseconds
+        """
+
+    def export(self) -> Dict[str, float]:
+        """
+        Function returns collected metrics as flat dict of names and values, e.g. to push them to metrics system.
+        """
+        return {}
+
+
+class CounterObserver(DetectorObserver):
+    """
+    Observer, which counts weightings by their results, coins put on pans, measurements, rounds and solved instances.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = dict.fromkeys(
+            ("weighings", "weighings_left_heavier", "weighings_equal", "weighings_right_heavier", "weighed_coins",
+             "measurements", "measured_coins", "rounds", "solved", "solved_weighings"), 0)
+
+    def onWeighing(self, event: WeighingEvent, latencyNs: int):
+        counters = self.counters
+        counters["weighings"] += 1
+        counters["weighed_coins"] += len(event.groupL) + len(event.groupR)
+        if event.managingItem == 1:
+            counters["weighings_right_heavier"] += 1
+        elif event.managingItem == -1:
+            counters["weighings_left_heavier"] += 1
+        else:
+            counters["weighings_equal"] += 1
+
+    def onMeasurement(self, indices: Union[range, Sequence[int]], mass: int, latencyNs: int):
+        self.counters["measurements"] += 1
+        self.counters["measured_coins"] += len(indices)
+
+    def onRound(self, candidates: int):
+        self.counters["rounds"] += 1
+
+    def onSolved(self, index: Union[int, List[int]], indicator: Optional[int], weightingCount: int, elapsedNs: int):
+        self.counters["solved"] += 1
+        self.counters["solved_weighings"] += weightingCount
+
+    def export(self) -> Dict[str, float]:
+        return {f"{name}_total": value for name, value in self.counters.items()}
+
+
+class LatencyHistogram(DetectorObserver):
+    """
+    Observer, which collects latencies of CoinsKeeper.balance and CoinsKeeper.weigh into histogram
+    with fixed buckets, so memory doesn't grow with number of weightings.
+    """
+
+    def __init__(self, bounds: Sequence[int] = DEFAULT_LATENCY_BOUNDS, name: str = "balance_latency_ns"):
+        """
+        Args:
+            bounds: increasing upper bounds of buckets in nanoseconds, the last bucket has no upper bound
+            name: prefix of exported metrics
+        """
+        self.bounds = list(bounds)
+        self.name = name
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sumNs = 0
+        self.maxNs = 0
+
+    def add(self, latencyNs: int):
+        self.counts[bisect.bisect_left(self.bounds, latencyNs)] += 1
+        self.count += 1
+        self.sumNs += latencyNs
+        if latencyNs > self.maxNs:
+            self.maxNs = latencyNs
+
+    def onWeighing(self, event: WeighingEvent, latencyNs: int):
+        self.add(latencyNs)
+
+    def onMeasurement(self, indices: Union[range, Sequence[int]], mass: int, latencyNs: int):
+        self.add(latencyNs)
+
+    def percentile(self, q: float) -> float:
+        """
+        Function returns estimation of q-th percentile of latencies: upper bound of bucket, where it falls,
+        or the largest latency for the last bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(self.bounds[bucket]) if bucket < len(self.bounds) else float(self.maxNs)
+        return float(self.maxNs)
+
+    def export(self) -> Dict[str, float]:
+        metrics: Dict[str, float] = {}
+        cumulative = 0
+        # buckets are cumulative, as in Prometheus histograms
+        for bound, count in zip(self.bounds + ["+Inf"], self.counts):
+            cumulative += count
+            metrics[f'{self.name}_bucket{{le="{bound}"}}'] = cumulative
+        metrics[f"{self.name}_count"] = self.count
+        metrics[f"{self.name}_sum"] = self.sumNs
+        metrics[f"{self.name}_max"] = self.maxNs
+        for q in (50, 90, 99):
+            metrics[f"{self.name}_p{q}"] = self.percentile(q)
+        return metrics
+
+
+class PhaseTimer(DetectorObserver):
+    """
+    Observer, which accumulates time of each phase of solving. Time spent in CoinsKeeper.balance and
+    CoinsKeeper.weigh is accumulated as 'weighing' phase, so time of algorithm minus it is time of decisions.
+    """
+
+    def __init__(self):
+        self.totalsNs: Dict[str, int] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, elapsedNs: int):
+        self.totalsNs[name] = self.totalsNs.get(name, 0) + elapsedNs
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def onWeighing(self, event: WeighingEvent, latencyNs: int):
+        self.add("weighing", latencyNs)
+
+    def onMeasurement(self, indices: Union[range, Sequence[int]], mass: int, latencyNs: int):
+        self.add("weighing", latencyNs)
+
+    def onPhase(self, name: str, elapsedNs: int):
+        self.add(name, elapsedNs)
+
+    def export(self) -> Dict[str, float]:
+        metrics: Dict[str, float] = {}
+        for name, totalNs in self.totalsNs.items():
+            metrics[f'phase_ns_sum{{phase="{name}"}}'] = totalNs
+            metrics[f'phase_ns_count{{phase="{name}"}}'] = self.counts[name]
+        return metrics
+
+
+def exportMetrics(observers: Iterable[DetectorObserver], prefix: str = "coins_") -> Dict[str, float]:
+    """
+    Function merges metrics of observers into one dict, names are prefixed with prefix.
+    """
+    metrics: Dict[str, float] = {}
+    for observer in observers:
+        for name, value in observer.export().items():
+            metrics[prefix + name] = value
+    return metrics
+
+
+def formatPrometheus(metrics: Dict[str, float]) -> str:
+    """
+    Function formats metrics in Prometheus text exposition format, one sample per line.
+    """
+    return "".join(f"{name} {value}\n" for name, value in metrics.items())
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsDetector import solve
+    from CoinsKeeper import CoinsKeeper
+
+    instancesNumber = 2000
+    keepers = [CoinsKeeper(n_gen=10 ** 5 - 1, seed=seed) for seed in range(100)]
+    observers = [CounterObserver(), LatencyHistogram(), PhaseTimer()]
+
+    print(f"{instancesNumber} detections of {10 ** 5} coins:")
+    print("| observers | us/detection |")
+    print("|-----------|-------------:|")
+    for label, detectionObservers in (("none", ()), ("counters, histogram, phases", observers)):
+        t0 = time.perf_counter()
+        for i in range(instancesNumber):
+            solve(keepers[i % len(keepers)], "classic", detectionObservers)
+        print(f"| {label} | {(time.perf_counter() - t0) / instancesNumber * 1e6:.1f} |")
+    print()
+    print(formatPrometheus(exportMetrics(observers)), end="")
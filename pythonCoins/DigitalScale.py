@@ -0,0 +1,105 @@
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# weights of generated coins are from 1 to 9, so fake coin differs from genuine one by at most 8
+MAX_DEVIATION = 8
+
+# function which returns total mass of coins, each coin is taken as many times as its multiplicity
+Measure = Callable[[Union[range, Sequence[int]], Optional[np.ndarray]], int]
+
+
+def codedMultiplicities(coinsNumber: int, base: int = 1) -> np.ndarray:
+    """
+    Function returns multiplicities i * base + 1 of coins. Fake coin with index k changes coded mass
+    by deviation * (k * base + 1), so deviation and k can be decoded from the change.
+    """
+    return np.arange(coinsNumber, dtype=np.int64) * base + 1
+
+
+def scaleAlgorithm(coinsNumber: int, measure: Measure, genuineWeight: Optional[int] = None,
+                   maxDeviation: Optional[int] = None, verify: bool = False) -> Tuple[int, int]:
+    """
+    Function finds the only fake coin and its direction with digital scale, whatever coins number is.
+    If weight of genuine coin and bound on deviation of fake coin are known, one measurement of coins
+    with multiplicities i * (2 * maxDeviation + 1) + 1 is enough: deviation is residue of the change of mass
+    and index is quotient. Otherwise, all coins are measured once to find deviation
+    (and weight of genuine coin, which is the nearest integer to mean weight, if deviation is less than N / 2)
+    and coins with multiplicities i + 1 are measured to find index.
+
+    Guessed weight of genuine coin is wrong, if deviation isn't less than N / 2, and then decoded coin may be
+    wrong too. If verify is set, decoded coin and its neighbour are measured alone: the former must weigh
+    genuine weight plus deviation and the latter genuine weight. For more than 2 coins it can't hold
+    for wrong guess, so any answer, which passes the check, is right.
+
+    Args:
+        coinsNumber: number of coins
+        measure: function which returns total mass of coins, e.g. CoinsKeeper.weigh or CoinsDetector.measureGroup
+        genuineWeight: weight of genuine coin, if it's known
+        maxDeviation: the largest difference between fake and genuine weights, if it's known
+        verify: whether decoded coin is checked with two more measurements, ValueError is raised if it's wrong
+    Returns:
+        index: index of fake coin;
+        indicator: -1 if fake coin is lighter, 1 if it's heavier.
+    """
+    coins = range(coinsNumber)
+    if genuineWeight is not None and maxDeviation is not None:
+        base = 2 * maxDeviation + 1
+        multiplicities = codedMultiplicities(coinsNumber, base)
+        # sum of multiplicities is taken in python integers, it overflows int64 for about 10^9 coins
+        change = measure(coins, multiplicities) - genuineWeight * (base * coinsNumber * (coinsNumber - 1) // 2 +
+                                                                   coinsNumber)
+        # change = deviation * (index * base + 1), where |deviation| < base / 2
+        deviation = (change + maxDeviation) % base - maxDeviation
+        if deviation == 0 or change % deviation != 0:
+            raise ValueError(f"Change of mass {change} can't be decoded, there is no fake coin")
+        index = (change // deviation - 1) // base
+    else:
+        total = measure(coins, None)
+        if genuineWeight is None:
+            if maxDeviation is not None and 2 * maxDeviation >= coinsNumber:
+                raise ValueError(f"Weight of genuine coin can't be found among {coinsNumber} coins")
+            genuineWeight = int(round(total / coinsNumber))
+        deviation = total - genuineWeight * coinsNumber
+        if deviation == 0:
+            raise ValueError("Total mass of coins equals mass of genuine coins, there is no fake coin")
+
+        multiplicities = codedMultiplicities(coinsNumber)
+        change = measure(coins, multiplicities) - genuineWeight * coinsNumber * (coinsNumber + 1) // 2
+        if change % deviation != 0:
+            raise ValueError(f"Change of mass {change} isn't multiple of deviation {deviation}")
+        index = change // deviation - 1
+
+    if not 0 <= index < coinsNumber:
+        raise ValueError(f"Decoded index {index} is out of range")
+    if verify and coinsNumber > 1:
+        neighbour = index - 1 if index > 0 else index + 1
+        if measure(range(index, index + 1), None) != genuineWeight + deviation or \
+                measure(range(neighbour, neighbour + 1), None) != genuineWeight:
+            raise ValueError(f"Decoded coin {index} doesn't weigh {genuineWeight + deviation} "
+                             f"or its neighbour doesn't weigh {genuineWeight}")
+    return int(index), 1 if deviation > 0 else -1
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsKeeper import CoinsKeeper
+
+    for coinsNumber in (17, 1000, 10 ** 6, 10 ** 7):
+        ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=1, seed=coinsNumber)
+        genuineWeight = int(np.bincount(ck.weights).argmax())
+        for known in (False, True):
+            counter = []
+
+            def measure(indices, multiplicities):
+                counter.append(1)
+                return ck.weigh(indices, multiplicities)
+
+            t0 = time.perf_counter()
+            result = scaleAlgorithm(coinsNumber, measure, genuineWeight=genuineWeight if known else None,
+                                    maxDeviation=MAX_DEVIATION if known else None)
+            elapsed = time.perf_counter() - t0
+            print(f"{coinsNumber} coins, genuine weight {'known' if known else 'unknown'}: {result}, "
+                  f"{len(counter)} measurements in {elapsed:e} secs, actual fake coin "
+                  f"{int(np.flatnonzero(ck.weights != genuineWeight)[0])}")
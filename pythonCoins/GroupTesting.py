@@ -0,0 +1,276 @@
+import math
+from collections import deque
+from typing import Callable, List, Sequence, Tuple
+
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER
+
+
+class GroupTester:
+    """
+    Class which finds several fake coins of the same weight, which are all lighter or all heavier than genuine ones.
+    Comparison of two groups of the same size tells which of them contains more fake coins,
+    comparison with coins which are known to be genuine tells whether group contains any fake coin.
+
+    The test against genuine coins has only two outcomes (the reference can't contain fake coins), so the search
+    takes about d * log2(N / d) weightings and not the information bound log3 C(N, d) ~ d * log3(N / d).
+    Ternary splits are used where the third outcome is informative: findFake and findSingleFake.
+    """
+
+    def __init__(self, weigh: Callable[[Sequence[int], Sequence[int]], int], fakeCoinIsLighter: bool = True):
+        """
+        Args:
+            weigh: function which weighs two groups of coins, e.g. CoinsKeeper.balance or CoinsDetector.weighGroups
+            fakeCoinIsLighter: whether fake coins are lighter than genuine ones
+        """
+        self.weigh = weigh
+        self.sign = -1 if fakeCoinIsLighter else 1
+        # coins which are known to be genuine, they are used as reference on the right pan
+        self.genuine: List[int] = []
+        self.fakes: List[int] = []
+
+    def compareFakes(self, groupL: Sequence[int], groupR: Sequence[int]) -> int:
+        """
+        Function returns 1 if groupR contains more fake coins than groupL, -1 if groupL contains more of them,
+        0 if they contain the same number of fake coins.
+        """
+        return self.weigh(groupL, groupR) * self.sign
+
+    def containsFake(self, group: Sequence[int]) -> bool:
+        """
+        Function weighs group against the same number of genuine coins, there must be enough of them.
+        """
+        return self.compareFakes(self.genuine[:len(group)], group) == 1
+
+    def findGenuineCoin(self, coins: List[int]) -> int:
+        """
+        Function finds genuine coin among coins, which contain at least one genuine coin, in about log2 N weightings
+        by descending into the half with fewer fake coins. Fake coin, which is found on the way, is recorded.
+        """
+        while len(coins) > 1:
+            m = len(coins) // 2
+            groupA, groupB, rest = coins[:m], coins[m:2 * m], coins[2 * m:]
+            managingItem = self.compareFakes(groupA, groupB)
+            if managingItem == 1:
+                coins = groupA
+            elif managingItem == -1:
+                coins = groupB
+            elif rest:
+                # halves contain equal numbers of fake coins, the odd coin is compared with one coin of them
+                managingItem = self.compareFakes(groupA[:1], rest)
+                if managingItem == 1:
+                    self.fakes.append(rest[0])
+                    return groupA[0]
+                if managingItem == -1:
+                    self.fakes.append(groupA[0])
+                    return rest[0]
+                coins = groupA
+            else:
+                coins = groupA
+        return coins[0]
+
+    def findGenuineGroup(self, coins: List[int]) -> List[int]:
+        """
+        Function compares doubling blocks of coins: while weightings are equal, the first block holds coins
+        of the same kind, so the first unequal weighting shows which block is genuine, when fake coins are rare
+        it's found in about log2(N / d) weightings. Genuine and fake coins, which are found, are recorded.
+        There must be at least one fake coin and one genuine coin.
+
+        Returns:
+            group of coins, which contains at least one fake coin, empty if no such group is found
+        """
+        size = 1
+        while True:
+            block, nextBlock = coins[:size], coins[size:2 * size]
+            assert nextBlock, "There must be at least one fake coin and one genuine coin"
+            managingItem = self.compareFakes(block[:len(nextBlock)], nextBlock)
+            if managingItem == 1:
+                self.genuine += block
+                return nextBlock
+            if managingItem == -1:
+                # block contains more fake coins than the next one, so it contains only fake coins
+                self.fakes += block
+                self.genuine.append(self.findGenuineCoin(nextBlock))
+                return []
+            size *= 2
+
+    def findSingleFake(self, coins: List[int]) -> int:
+        """
+        Function finds fake coin among coins, which contain exactly one fake coin, in ceil(log3 N) weightings.
+        """
+        while len(coins) > 1:
+            b = -(-len(coins) // 3)
+            groupA, groupB, rest = coins[:b], coins[b:2 * b], coins[2 * b:]
+            managingItem = self.compareFakes(groupA, groupB)
+            if managingItem == -1:
+                coins = groupA
+            elif managingItem == 1:
+                coins = groupB
+            else:
+                coins = rest
+        return coins[0]
+
+    def findFakeByHalving(self, coins: List[int]) -> int:
+        """
+        Function finds fake coin among coins, which contain at least one fake coin, in about log2 N weightings
+        by descending into the half with more fake coins, no genuine coins are needed.
+        """
+        while len(coins) > 1:
+            m = len(coins) // 2
+            groupA, groupB, rest = coins[:m], coins[m:2 * m], coins[2 * m:]
+            managingItem = self.compareFakes(groupA, groupB)
+            if managingItem == -1:
+                coins = groupA
+            elif managingItem == 1:
+                coins = groupB
+            elif rest:
+                managingItem = self.compareFakes(groupA[:1], rest)
+                if managingItem == 1:
+                    return rest[0]
+                if managingItem == -1:
+                    return groupA[0]
+                coins = groupA
+            else:
+                coins = groupA
+        return coins[0]
+
+    def findFake(self, group: List[int]) -> Tuple[int, List[int]]:
+        """
+        Function finds fake coin in group, which contains at least one fake coin, by splitting it into three parts.
+        Unequal outcome leaves the part with more fake coins, equal outcome is resolved by weighing one part
+        against genuine coins, so there must be at least as many genuine coins as coins in group.
+
+        Returns:
+            fake: index of fake coin;
+            unresolved: coins of group, which are still unknown.
+        """
+        unresolved = []
+        while len(group) > 1:
+            b = max((len(group) + 1) // 3, 1)
+            groupA, groupB, rest = group[:b], group[b:2 * b], group[2 * b:]
+            managingItem = self.compareFakes(groupA, groupB)
+            if managingItem == -1:
+                group = groupA
+                unresolved += groupB + rest
+            elif managingItem == 1:
+                group = groupB
+                unresolved += groupA + rest
+            elif not rest or self.containsFake(groupA):
+                # groupA and groupB contain the same number of fake coins, which isn't zero
+                group = groupA
+                unresolved += groupB + rest
+            else:
+                self.genuine += groupA + groupB
+                group = rest
+        return group[0], unresolved
+
+    def findFakes(self, coinsNumber: int, fakesNumber: int) -> List[int]:
+        """
+        Adaptive group testing (generalized binary splitting): groups of about (N - d) / d coins are weighed
+        against genuine coins, each group with fake coins gives one of them by findFake, other groups are genuine.
+        Reference genuine coins are found by findGenuineGroup and the last fake coin is found by ternary search,
+        so it takes about d * (log2(N / d) + 1) weightings, e.g. 1041 for N = 10^5, d = 100 with the bound 717.
+        Pairing the groups (weighing two suspect groups against each other) saves only 1-3% in sparse cases
+        and costs more in dense ones, since the pans are equal in most weightings, so the binary test is kept.
+
+        Args:
+            coinsNumber: number of coins
+            fakesNumber: number of fake coins
+        Returns:
+            sorted indices of fake coins
+        """
+        if fakesNumber == 0:
+            return []
+        if fakesNumber == coinsNumber:
+            return list(range(coinsNumber))
+        if fakesNumber == 1:
+            return [self.findSingleFake(list(range(coinsNumber)))]
+
+        group = self.findGenuineGroup(list(range(coinsNumber)))
+        known = set(self.genuine) | set(self.fakes) | set(group)
+        suspects = deque(i for i in range(coinsNumber) if i not in known)
+
+        while len(self.fakes) < fakesNumber:
+            if group:
+                fake, unresolved = self.findFake(group)
+                self.fakes.append(fake)
+                suspects.extendleft(reversed(unresolved))
+
+            fakesLeft = fakesNumber - len(self.fakes)
+            if fakesLeft == 0:
+                break
+            if len(suspects) == fakesLeft:
+                self.fakes += suspects
+                break
+            if fakesLeft == 1:
+                self.fakes.append(self.findSingleFake(list(suspects)))
+                break
+
+            # group of 2^alpha coins contains fake coin with probability about one half
+            alpha = int(math.floor(math.log2((len(suspects) - fakesLeft + 1) / fakesLeft)))
+            size = min(2 ** max(alpha, 0), len(self.genuine), len(suspects))
+            group = [suspects.popleft() for _ in range(size)]
+            if not self.containsFake(group):
+                self.genuine += group
+                group = []
+
+        return sorted(self.fakes)
+
+    def findFakesRepeatedly(self, coinsNumber: int, fakesNumber: int) -> List[int]:
+        """
+        Naive approach, which runs search of single fake coin fakesNumber times, found fake coins are put aside.
+        It takes about d * log2 N weightings.
+        """
+        coins = list(range(coinsNumber))
+        for _ in range(fakesNumber):
+            fake = self.findFakeByHalving(coins)
+            self.fakes.append(fake)
+            coins.remove(fake)
+        return sorted(self.fakes)
+
+
+def findFakes(coinsNumber: int, fakesNumber: int, weigh: Callable[[Sequence[int], Sequence[int]], int],
+              fakeMode: int = FAKE_MODE_LIGHTER) -> List[int]:
+    """
+    Function finds all fakesNumber fake coins, which are lighter or heavier than genuine ones, see GroupTester.
+
+    Args:
+        coinsNumber: number of coins
+        fakesNumber: number of fake coins
+        weigh: function which weighs two groups of coins, e.g. CoinsKeeper.balance or CoinsDetector.weighGroups
+        fakeMode: WeightsIO.FAKE_MODE_LIGHTER or WeightsIO.FAKE_MODE_HEAVIER
+    Returns:
+        sorted indices of fake coins
+    """
+    assert fakeMode in (FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER), \
+        "Several fake coins can be found only if it's known whether they are lighter or heavier"
+    return GroupTester(weigh, fakeCoinIsLighter=fakeMode == FAKE_MODE_LIGHTER).findFakes(coinsNumber, fakesNumber)
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsKeeper import CoinsKeeper
+
+    print("| coins | fakes | bound | group testing | wall, s | repeated search | wall, s |")
+    print("|------:|------:|------:|--------------:|--------:|----------------:|--------:|")
+    for coinsNumber, fakesNumber in ((100, 2), (1000, 3), (1000, 10), (10 ** 5, 10), (10 ** 5, 100), (10 ** 6, 30)):
+        ck = CoinsKeeper(n_gen=coinsNumber - fakesNumber, n_fake=0, n_fake_l=fakesNumber, seed=coinsNumber)
+        actualFakes = sorted(int(i) for i in (ck.weights != ck.weights.max()).nonzero()[0])
+        # information bound log3 C(N, d)
+        bound = (math.lgamma(coinsNumber + 1) - math.lgamma(fakesNumber + 1) -
+                 math.lgamma(coinsNumber - fakesNumber + 1)) / math.log(3)
+
+        row = [coinsNumber, fakesNumber, f"{bound:.1f}"]
+        for method in (GroupTester.findFakes, GroupTester.findFakesRepeatedly):
+            counter = []
+
+            def weigh(groupL, groupR):
+                counter.append(1)
+                return ck.balance(groupL, groupR)
+
+            t0 = time.perf_counter()
+            fakes = method(GroupTester(weigh), coinsNumber, fakesNumber)
+            elapsed = time.perf_counter() - t0
+            assert fakes == actualFakes
+            row += [len(counter), f"{elapsed:.3f}"]
+        print("| " + " | ".join(map(str, row)) + " |")
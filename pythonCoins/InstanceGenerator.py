@@ -0,0 +1,126 @@
+from typing import NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN, getFakeMode
+
+Seed = Union[None, int, np.random.Generator]
+
+
+class InstanceBatch(NamedTuple):
+    """
+    Batch of random instances with the same coins number and fake mode.
+
+    Attributes:
+        weights: array of shape (instances number, coins number) with weights of coins
+        fakeIndices: index of fake coin in each instance
+        genuineWeights: weight of genuine coins in each instance
+        fakeWeights: weight of fake coin in each instance
+    """
+    weights: np.ndarray
+    fakeIndices: np.ndarray
+    genuineWeights: np.ndarray
+    fakeWeights: np.ndarray
+
+
+def getGenerator(seed: Seed = None) -> np.random.Generator:
+    """
+    Function returns numpy random generator: seed itself if it's already a generator, new seeded one otherwise.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def chooseWeights(rng: np.random.Generator, size: int, fakeMode: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Function chooses weights of genuine and fake coins for size instances at once:
+    genuine weight is one of 4, 5, 6, fake weight is another value from range (1, 9),
+    which is lighter or heavier than genuine one according to fakeMode.
+
+    Args:
+        rng: numpy random generator
+        size: number of instances
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+    Returns:
+        genuineWeights: array of genuine weights
+        fakeWeights: array of fake weights
+    """
+    genuineWeights = rng.integers(4, 7, size=size)
+    if fakeMode == FAKE_MODE_LIGHTER:
+        fakeWeights = rng.integers(1, genuineWeights)
+    elif fakeMode == FAKE_MODE_HEAVIER:
+        fakeWeights = rng.integers(genuineWeights + 1, 10)
+    else:
+        # one of 8 values, which are different from genuine weight
+        fakeWeights = rng.integers(1, 9, size=size)
+        fakeWeights += fakeWeights >= genuineWeights
+    return genuineWeights, fakeWeights
+
+
+def generateWeights(n_gen: int = 9, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0, seed: Seed = None,
+                    dtype=np.int8) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Function generates weights of one instance. Fake coins are placed by drawing their indices,
+    so no shuffle over all coins is done.
+
+    Args:
+        n_gen: number of genuine coins
+        n_fake: number of fake coins, which weights are unknown
+        n_fake_l: number of fake coins, which are lighter than genuine coins
+        n_fake_h: number of fake coins, which are heavier than genuine coins
+        seed: seed or numpy random generator
+        dtype: dtype of weights array
+    Returns:
+        weights: array of weights
+        fakeIndices: sorted indices of fake coins
+    """
+    rng = getGenerator(seed)
+    fakesNumber = n_fake + n_fake_l + n_fake_h
+    coinsNumber = n_gen + fakesNumber
+
+    (genuineWeight,), (fakeWeight,) = chooseWeights(rng, 1, getFakeMode(n_fake, n_fake_l, n_fake_h))
+    weights = np.full(coinsNumber, genuineWeight, dtype=dtype)
+    if fakesNumber == 1:
+        fakeIndices = rng.integers(coinsNumber, size=1)
+    else:
+        fakeIndices = np.sort(rng.choice(coinsNumber, size=fakesNumber, replace=False))
+    weights[fakeIndices] = fakeWeight
+    return weights, fakeIndices
+
+
+def generateInstances(instancesNumber: int, coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN,
+                      seed: Seed = None, dtype=np.int8, fakeIndices: Optional[np.ndarray] = None) -> InstanceBatch:
+    """
+    Function generates batch of instances with one fake coin each in one vectorized call.
+
+    Args:
+        instancesNumber: number of instances
+        coinsNumber: number of coins in each instance
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        seed: seed or numpy random generator
+        dtype: dtype of weights array
+        fakeIndices: indices of fake coins, drawn randomly if it's None
+    Returns:
+        batch of instances
+    """
+    rng = getGenerator(seed)
+    genuineWeights, fakeWeights = chooseWeights(rng, instancesNumber, fakeMode)
+    if fakeIndices is None:
+        fakeIndices = rng.integers(coinsNumber, size=instancesNumber)
+
+    weights = np.empty((instancesNumber, coinsNumber), dtype=dtype)
+    weights[:] = genuineWeights[:, np.newaxis]
+    weights[np.arange(instancesNumber), fakeIndices] = fakeWeights
+    return InstanceBatch(weights, fakeIndices, genuineWeights, fakeWeights)
+
+
+if __name__ == "__main__":
+    import time
+
+    for mode in (FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER, FAKE_MODE_UNKNOWN):
+        t0 = time.perf_counter()
+        batch = generateInstances(100000, 100, fakeMode=mode, seed=0)
+        elapsed = time.perf_counter() - t0
+        print(f"fake mode {mode}: {batch.weights.shape} instances in {elapsed:e} secs, "
+              f"{batch.weights.nbytes / 2 ** 20:.1f} MB")
@@ -0,0 +1,180 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER
+
+
+class LockstepResult(NamedTuple):
+    """
+    Results of solving K instances in lockstep.
+
+    Attributes:
+        fakeIndices: index of fake coin in each instance
+        directions: -1 if fake coin is lighter, 1 if it's heavier, 0 if it's unknown
+        weightingCounts: number of weightings in each instance
+    """
+    fakeIndices: np.ndarray
+    directions: np.ndarray
+    weightingCounts: np.ndarray
+
+
+def getPrefixSums(weights: np.ndarray) -> np.ndarray:
+    """
+    Function returns cumulative sums of each row of weights with leading zero column,
+    in int32 if they fit into it and in int64 otherwise.
+    """
+    instancesNumber, coinsNumber = weights.shape
+    maxWeight = int(np.abs(weights).max()) if weights.size else 0
+    dtype = np.int32 if maxWeight * coinsNumber < 2 ** 31 else np.int64
+
+    prefixSums = np.zeros((instancesNumber, coinsNumber + 1), dtype=dtype)
+    np.cumsum(weights, axis=1, dtype=dtype, out=prefixSums[:, 1:])
+    return prefixSums
+
+
+def _partCaseBlock(weights: np.ndarray, fakeCoinIsLighter: bool) -> LockstepResult:
+    instancesNumber, coinsNumber = weights.shape
+    prefixSums = getPrefixSums(weights)
+
+    start = np.zeros(instancesNumber, dtype=np.int64)
+    length = np.full(instancesNumber, coinsNumber, dtype=np.int64)
+    weightingCounts = np.zeros(instancesNumber, dtype=np.int32)
+    active = np.flatnonzero(length > 1)
+
+    while len(active):
+        s = start[active]
+        currLength = length[active]
+
+        # the same split as in CoinsDetector.partCaseAlgorithm, two coins are weighed one against another
+        b = currLength // 3
+        b[currLength == 2] = 1
+        c = currLength - 2 * b
+
+        weight1 = prefixSums[active, s + b] - prefixSums[active, s]
+        weight2 = prefixSums[active, s + 2 * b] - prefixSums[active, s + b]
+        managingItem = np.sign(weight2 - weight1)
+        weightingCounts[active] += 1
+
+        # group1 contains fake coin if it's lighter and group1 < group2 or if it's heavier and group1 > group2
+        group1IsFake = managingItem == (1 if fakeCoinIsLighter else -1)
+        newStart = np.where(managingItem == 0, s + 2 * b, np.where(group1IsFake, s, s + b))
+        newLength = np.where(managingItem == 0, c, b)
+
+        start[active] = newStart
+        length[active] = newLength
+        active = active[newLength > 1]
+
+    directions = np.full(instancesNumber, -1 if fakeCoinIsLighter else 1, dtype=np.int8)
+    return LockstepResult(start, directions, weightingCounts)
+
+
+def _genCaseBlock(weights: np.ndarray) -> LockstepResult:
+    instancesNumber, coinsNumber = weights.shape
+    assert coinsNumber > 2, \
+        "Can't solver the problem for unknown fake coin weight relation and for 2 coins in total"
+    prefixSums = getPrefixSums(weights)
+
+    start = np.zeros(instancesNumber, dtype=np.int64)
+    length = np.full(instancesNumber, coinsNumber, dtype=np.int64)
+    directions = np.zeros(instancesNumber, dtype=np.int8)
+    weightingCounts = np.zeros(instancesNumber, dtype=np.int32)
+    active = np.flatnonzero(length > 1)
+
+    while len(active):
+        s = start[active]
+        currLength = length[active]
+        currDirections = directions[active]
+
+        # the same split as in CoinsDetector.genCaseAlgorithm
+        twoCoins = currLength == 2
+        b = np.where(currLength % 3 == 0, currLength // 3 - 1, currLength // 3)
+        b[(currLength == 3) | twoCoins] = 1
+        c = currLength - 3 * b
+
+        weight0 = prefixSums[active, s + b] - prefixSums[active, s]
+        weight1 = prefixSums[active, s + 2 * b] - prefixSums[active, s + b]
+        # for two coins group2 would go past their range, it's replaced below
+        weight2 = prefixSums[active, np.minimum(s + 3 * b, coinsNumber)] - \
+            prefixSums[active, np.minimum(s + 2 * b, coinsNumber)]
+
+        # two coins are compared with the nearest coin outside of them, which is genuine
+        reference = np.where(s > 0, s - 1, s + 2)[twoCoins]
+        weight2[twoCoins] = prefixSums[active[twoCoins], reference + 1] - \
+            prefixSums[active[twoCoins], reference]
+
+        managingItem0 = np.sign(weight1 - weight0).astype(np.int8)
+        managingItem1 = np.sign(weight2 - weight0).astype(np.int8)
+        weightingCounts[active] += 2
+
+        # transitions of CoinsDetector.getFakeGroupGenCaseAlg
+        newStart = np.select(
+            [(managingItem0 == 0) & (managingItem1 == 0), managingItem0 == 0, managingItem1 == 0],
+            [s + 3 * b, s + 2 * b, s + b], default=s)
+        newLength = np.where((managingItem0 == 0) & (managingItem1 == 0), c, b)
+        newDirections = np.select(
+            [(managingItem0 == 0) & (managingItem1 == 0), managingItem0 == 0, managingItem1 == 0],
+            [currDirections, managingItem1, managingItem0], default=-managingItem0)
+
+        # transitions of two coins case of CoinsDetector.genCaseAlgorithm
+        newStart[twoCoins] = np.where(managingItem1 == 0, s + 1, s)[twoCoins]
+        newLength[twoCoins] = 1
+        newDirections[twoCoins] = np.where(managingItem1 == 0, managingItem0, -managingItem1)[twoCoins]
+
+        start[active] = newStart
+        length[active] = newLength
+        directions[active] = newDirections
+        active = active[newLength > 1]
+
+    return LockstepResult(start, directions, weightingCounts)
+
+
+def solveLockstep(weights: np.ndarray, fakeMode: int, blockSize: int = 1 << 16) -> LockstepResult:
+    """
+    Function solves K instances with the same coins number at once. Instances are held as one 2-D weights array,
+    each round weighs groups of all unsolved instances with one vectorized reduction over cumulative sums
+    and advances their candidate ranges in lockstep. Splits are the same as in CoinsDetector.partCaseAlgorithm
+    for known direction and CoinsDetector.genCaseAlgorithm for unknown one, but rounds continue until
+    every instance has one candidate left, whatever number of weightings it takes.
+
+    Args:
+        weights: array of shape (instances number, coins number)
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        blockSize: number of instances processed at once, it bounds memory used for cumulative sums
+    Returns:
+        results of all instances
+    """
+    weights = np.asarray(weights)
+    results = []
+    for blockStart in range(0, len(weights), blockSize):
+        block = weights[blockStart: blockStart + blockSize]
+        if fakeMode == FAKE_MODE_LIGHTER or fakeMode == FAKE_MODE_HEAVIER:
+            results.append(_partCaseBlock(block, fakeCoinIsLighter=fakeMode == FAKE_MODE_LIGHTER))
+        else:
+            results.append(_genCaseBlock(block))
+
+    if not results:
+        empty = np.zeros(0, dtype=np.int64)
+        return LockstepResult(empty, empty.astype(np.int8), empty.astype(np.int32))
+    return LockstepResult(*(np.concatenate(field) for field in zip(*results)))
+
+
+if __name__ == "__main__":
+    import time
+
+    from InstanceGenerator import generateInstances
+    from WeightsIO import FAKE_MODE_UNKNOWN
+
+    instancesNumber = 10 ** 6
+    coinsNumber = 100
+    for mode in (FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER, FAKE_MODE_UNKNOWN):
+        batch = generateInstances(instancesNumber, coinsNumber, fakeMode=mode, seed=0)
+        t0 = time.perf_counter()
+        result = solveLockstep(batch.weights, mode)
+        elapsed = time.perf_counter() - t0
+
+        accuracy = np.mean(result.fakeIndices == batch.fakeIndices)
+        counts, frequencies = np.unique(result.weightingCounts, return_counts=True)
+        print(f"fake mode {mode}: {instancesNumber} instances of {coinsNumber} coins in {elapsed:.2f} secs, "
+              f"{instancesNumber / elapsed:.0f} instances/s, accuracy {accuracy:.4f}, "
+              f"weightings {dict(zip(counts.tolist(), frequencies.tolist()))}")
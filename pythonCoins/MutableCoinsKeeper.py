@@ -0,0 +1,280 @@
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from CoinsKeeper import CoinsKeeper, exactDot, isPlainRange
+from InstanceGenerator import Seed
+
+
+def buildFenwickTree(values: np.ndarray, capacity: int) -> np.ndarray:
+    """
+    Function returns Fenwick tree of values with room for capacity values, tree[i] is sum of values
+    with indices from i - lowbit(i) to i - 1, tree[0] isn't used.
+    """
+    prefixSums = np.zeros(capacity + 1, dtype=np.int64)
+    np.cumsum(values, dtype=np.int64, out=prefixSums[1:len(values) + 1])
+    prefixSums[len(values) + 1:] = prefixSums[len(values)]
+    nodes = np.arange(capacity + 1, dtype=np.int64)
+    tree = prefixSums - prefixSums[nodes & (nodes - 1)]
+    tree[0] = 0
+    return tree
+
+
+class MutableCoinsKeeper(CoinsKeeper):
+    """
+    Keeper of coins, which can be re-weighed, added and removed between detections. Weights are kept in slots
+    with Fenwick tree of their sums and Fenwick tree of occupied slots, so update, insert, remove and sum of
+    range of coins take O(log N) and nothing is rebuilt from scratch, when inventory changes a little.
+    Removed coin leaves empty slot, coins are indexed by their order among remaining coins,
+    new coins are added to the end. Slots are compacted, when more than half of them are empty.
+    """
+
+    def __init__(self, n_gen: int = 9, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0,
+                 weights: Union[List[int], str] = None, seed: Seed = None):
+        '''
+        Args:
+            n_gen, n_fake, n_fake_l, n_fake_h, weights, seed: see CoinsKeeper
+        '''
+        super().__init__(n_gen, n_fake, n_fake_l, n_fake_h, weights=weights, seed=seed)
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        Weights of remaining coins in their order as read-only array, it's rebuilt lazily after changes,
+        which are made with update, insert and remove methods.
+        """
+        if self._weights is None:
+            self._weights = self._slotWeights[self.getLiveSlots()]
+            self._weights.setflags(write=False)
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: Union[List[int], np.ndarray]):
+        weights = np.asarray(weights)
+        self.rebuild(weights.astype(np.int64), max(len(weights), 16))
+        self._weights = weights.view()
+        self._weights.setflags(write=False)
+
+    def rebuild(self, weights: np.ndarray, capacity: int):
+        """
+        Function places weights into first slots of capacity slots and builds both trees in O(capacity).
+        """
+        self.capacity = capacity
+        self.slotsNumber = len(weights)
+        self.coinsNumber = len(weights)
+        self._slotWeights = np.zeros(capacity, dtype=np.int64)
+        self._slotWeights[:len(weights)] = weights
+        self._occupied = np.zeros(capacity, dtype=np.int8)
+        self._occupied[:len(weights)] = 1
+        self._weightsTree = buildFenwickTree(weights, capacity)
+        self._countsTree = buildFenwickTree(self._occupied[:len(weights)], capacity)
+        self._liveSlots: Optional[np.ndarray] = None
+        self._weights = None
+        self._prefixSums = None
+        self.weightsVersion += 1
+
+    def getLiveSlots(self) -> np.ndarray:
+        """
+        Function returns slots of remaining coins, slot of coin with index i is liveSlots[i].
+        """
+        if self.coinsNumber == self.slotsNumber:
+            return np.arange(self.slotsNumber)
+        if self._liveSlots is None:
+            self._liveSlots = np.flatnonzero(self._occupied[:self.slotsNumber])
+        return self._liveSlots
+
+    @staticmethod
+    def _add(tree: np.ndarray, slot: int, delta: int):
+        node = slot + 1
+        while node < len(tree):
+            tree[node] += delta
+            node += node & -node
+
+    @staticmethod
+    def _prefix(tree: np.ndarray, slot: int) -> int:
+        """
+        Function returns sum of values in slots from 0 to slot - 1.
+        """
+        total = 0
+        while slot > 0:
+            total += int(tree[slot])
+            slot &= slot - 1
+        return total
+
+    def findSlot(self, index: int) -> int:
+        """
+        Function returns slot of coin with given index among remaining coins in O(log N) by descent of
+        Fenwick tree of occupied slots, slotsNumber is returned for index equal to coins number.
+        """
+        if self.coinsNumber == self.slotsNumber or index >= self.coinsNumber:
+            return index if index < self.coinsNumber else self.slotsNumber
+        node = 0
+        step = 1 << (self.capacity.bit_length() - 1)
+        rest = index + 1
+        while step:
+            if node + step <= self.capacity and self._countsTree[node + step] < rest:
+                node += step
+                rest -= int(self._countsTree[node])
+            step >>= 1
+        return node
+
+    def _checkIndex(self, index: int) -> int:
+        if not -self.coinsNumber <= index < self.coinsNumber:
+            raise IndexError(f"Coin index {index} is out of {self.coinsNumber} coins")
+        return index % self.coinsNumber
+
+    def _changed(self, layout: bool):
+        self._weights = None
+        self._prefixSums = None
+        self.weightsVersion += 1
+        if layout:
+            self._liveSlots = None
+
+    def update(self, index: int, weight: int):
+        """
+        Function sets new weight of coin in O(log N).
+        """
+        slot = self.findSlot(self._checkIndex(index))
+        delta = int(weight) - int(self._slotWeights[slot])
+        self._slotWeights[slot] = weight
+        self._add(self._weightsTree, slot, delta)
+        self._changed(layout=False)
+
+    def insert(self, weight: int, kind: str = "n_gen") -> int:
+        """
+        Function adds coin to the end of coins in amortized O(log N).
+
+        Args:
+            weight: weight of new coin
+            kind: key of coins state, which counts new coin: 'n_gen', 'n_fake', 'n_fake_l' or 'n_fake_h'
+        Returns:
+            index of new coin
+        """
+        assert kind in self.getCoinsState(), f"Unknown kind of coin: {kind}"
+        if self.slotsNumber == self.capacity:
+            # slots are compacted and doubled, it's amortized over previous insertions
+            self.rebuild(self._slotWeights[self.getLiveSlots()], 2 * self.capacity)
+
+        slot = self.slotsNumber
+        self._slotWeights[slot] = weight
+        self._occupied[slot] = 1
+        self._add(self._weightsTree, slot, int(weight))
+        self._add(self._countsTree, slot, 1)
+        self.slotsNumber += 1
+        self.coinsNumber += 1
+        setattr(self, kind, getattr(self, kind) + 1)
+        self._changed(layout=True)
+        return self.coinsNumber - 1
+
+    def remove(self, index: int, kind: str = "n_gen") -> int:
+        """
+        Function removes coin in O(log N), indices of next coins are decreased by one.
+
+        Args:
+            index: index of coin
+            kind: key of coins state, which counts removed coin: 'n_gen', 'n_fake', 'n_fake_l' or 'n_fake_h'
+        Returns:
+            weight of removed coin
+        """
+        assert kind in self.getCoinsState(), f"Unknown kind of coin: {kind}"
+        slot = self.findSlot(self._checkIndex(index))
+        weight = int(self._slotWeights[slot])
+        self._slotWeights[slot] = 0
+        self._occupied[slot] = 0
+        self._add(self._weightsTree, slot, -weight)
+        self._add(self._countsTree, slot, -1)
+        self.coinsNumber -= 1
+        setattr(self, kind, getattr(self, kind) - 1)
+        self._changed(layout=True)
+
+        if 2 * self.coinsNumber < self.slotsNumber:
+            self.rebuild(self._slotWeights[self.getLiveSlots()], max(2 * self.coinsNumber, 16))
+        return weight
+
+    def rangeWeight(self, start: int, stop: int) -> int:
+        """
+        Function returns total weight of coins with indices from start to stop - 1 in O(log N),
+        bounds must be within coins as in CoinsKeeper.rangeWeight.
+        """
+        if not 0 <= start <= stop <= self.coinsNumber:
+            raise IndexError(f"Range [{start}, {stop}) is out of {self.coinsNumber} coins")
+        if start == stop:
+            return 0
+        return self._prefix(self._weightsTree, self.findSlot(stop)) - \
+            self._prefix(self._weightsTree, self.findSlot(start))
+
+    def groupWeight(self, indices: Union[range, Sequence[int]]) -> int:
+        """
+        Function returns total weight of group of coins, range with step 1 is summed in O(log N).
+        """
+        if isPlainRange(indices):
+            if len(indices) == 0:
+                return 0
+            return self.rangeWeight(indices.start, indices.stop)
+        if len(indices) == 0:
+            return 0
+        slots = self.getLiveSlots()[np.asarray(indices, dtype=np.intp)]
+        return int(self._slotWeights[slots].sum(dtype=np.int64))
+
+    def weigh(self, indices: Union[range, Sequence[int]], multiplicities: Optional[Sequence[int]] = None) -> int:
+        if multiplicities is None:
+            return self.groupWeight(indices)
+        slots = self.getLiveSlots()[np.asarray(indices, dtype=np.intp)]
+        return exactDot(self._slotWeights[slots], np.asarray(multiplicities, dtype=np.int64))
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsDetector import solve
+
+    coinsNumber = 10 ** 6
+    cycles = 20
+    rng = np.random.default_rng(0)
+
+    print(f"{coinsNumber} coins, each cycle moves fake coin, re-weighs some genuine coins and runs detection:")
+    print("| updates per detection | CoinsKeeper, ms/cycle | MutableCoinsKeeper, ms/cycle | speedup |")
+    print("|----------------------:|----------------------:|-----------------------------:|--------:|")
+    for updatesNumber in (1, 10, 100, 1000):
+        timings = []
+        for keeperClass in (CoinsKeeper, MutableCoinsKeeper):
+            ck = keeperClass(n_gen=coinsNumber - 1, seed=1)
+            weights = np.array(ck.weights)
+            genuineWeight = int(np.bincount(weights).argmax())
+            fakeIndex = int(np.flatnonzero(weights != genuineWeight)[0])
+            fakeWeight = int(weights[fakeIndex])
+            changes = rng.integers(0, coinsNumber, size=(cycles, updatesNumber))
+
+            t0 = time.perf_counter()
+            for cycle in range(cycles):
+                # fake coin is swapped with genuine one, other updates keep genuine weight
+                newFakeIndex = int(changes[cycle, 0])
+                moves = [(fakeIndex, genuineWeight)] + [(int(i), genuineWeight) for i in changes[cycle, 1:]] + \
+                        [(newFakeIndex, fakeWeight)]
+                if keeperClass is MutableCoinsKeeper:
+                    for index, weight in moves:
+                        ck.update(index, weight)
+                else:
+                    for index, weight in moves:
+                        weights[index] = weight
+                    # plain keeper has to rebuild its cumulative sums
+                    ck.weights = weights
+                fakeIndex = newFakeIndex
+                assert solve(ck, "compiled")[0] == fakeIndex
+            timings.append((time.perf_counter() - t0) / cycles * 1e3)
+        print(f"| {updatesNumber} | {timings[0]:.2f} | {timings[1]:.2f} | {timings[0] / timings[1]:.1f} |")
+
+    ck = MutableCoinsKeeper(n_gen=coinsNumber - 1, seed=1)
+    genuineWeight = int(np.bincount(ck.weights).argmax())
+    fakeIndex = int(np.flatnonzero(ck.weights != genuineWeight)[0])
+    operationsNumber = 10 ** 4
+    t0 = time.perf_counter()
+    for index in rng.integers(0, coinsNumber - 1, size=operationsNumber):
+        # genuine coin is replaced with new one, which is added to the end
+        index = int(index) + (index >= fakeIndex)
+        ck.remove(index)
+        fakeIndex -= index < fakeIndex
+        ck.insert(genuineWeight)
+    elapsed = time.perf_counter() - t0
+    assert solve(ck, "compiled")[0] == fakeIndex
+    print(f"{operationsNumber} pairs of remove and insert: {elapsed / (2 * operationsNumber) * 1e6:.1f} us per operation")
@@ -0,0 +1,281 @@
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+# states of coins, each coin is either not weighed yet, suspected to be lighter or heavier fake coin or genuine
+COIN_UNKNOWN = 0
+COIN_LIGHT = 1
+COIN_HEAVY = 2
+COIN_GENUINE = 3
+
+# numbers of unknown, light suspected, heavy suspected and genuine coins
+CoinsCounts = Tuple[int, int, int, int]
+
+
+class StateWeighing(NamedTuple):
+    """
+    Weighting described by numbers of coins in each state on the left and right pans,
+    pans are equalized with genuine coins.
+    """
+    unknownL: int
+    lightL: int
+    heavyL: int
+    unknownR: int
+    lightR: int
+    heavyR: int
+
+
+# function which chooses weighting for coins counts and number of weightings left
+Planner = Callable[[CoinsCounts, int], Optional[StateWeighing]]
+
+
+def maxCoinsNumber(weighingsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN, genuineCoin: bool = False) -> int:
+    """
+    Function returns the largest number of coins, among which fake coin can be found in weighingsNumber weightings.
+    For unknown direction it's (3^w - 3) / 2 and (3^w - 1) / 2 if extra genuine coin is given,
+    direction of fake coin is found as well. For known direction it's 3^w.
+
+    Args:
+        weighingsNumber: number of weightings
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        genuineCoin: whether extra coin, which is known to be genuine, can be used
+    """
+    if fakeMode != FAKE_MODE_UNKNOWN:
+        return 3 ** weighingsNumber
+    if genuineCoin:
+        return (3 ** weighingsNumber - 1) // 2
+    return max((3 ** weighingsNumber - 3) // 2, 0)
+
+
+def minWeighingsNumber(coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN, genuineCoin: bool = False) -> int:
+    """
+    Function returns the least number of weightings, which is enough to find fake coin among coinsNumber coins
+    in the worst case, see maxCoinsNumber.
+    """
+    weighingsNumber = 0
+    while maxCoinsNumber(weighingsNumber, fakeMode, genuineCoin) < coinsNumber:
+        weighingsNumber += 1
+    return weighingsNumber
+
+
+def _planUnknown(u: int, g: int, w: int) -> Optional[Tuple[int, int]]:
+    """
+    Function chooses numbers of unknown coins on the left and right pans, when there are no suspected coins.
+    Equal outcome leaves the rest unknown coins, other outcomes turn weighed coins into suspected ones.
+    """
+    k = 3 ** (w - 1)
+    for m in range(min(k, u), 0, -1):
+        u0 = u - m
+        # after equal outcome weighed coins are genuine, so u0 unknown coins must fit into (3^(w-1) - 1) / 2
+        if u0 > (k - 1) // 2:
+            break
+        u1, u2 = (m + 1) // 2, m // 2
+        if u1 - u2 > g:
+            continue
+        if m > 1 and (_planMixed(u2, u1, g + u0, w - 1) is None or _planMixed(u1, u2, g + u0, w - 1) is None):
+            continue
+        return u1, u2
+    return None
+
+
+def _planMixed(l: int, h: int, g: int, w: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Function chooses numbers (l1, h1, l2, h2) of light and heavy suspected coins on the left and right pans,
+    so that each outcome leaves at most 3^(w-1) suspected coins. Pans are equalized with genuine coins.
+    """
+    s = l + h
+    if s <= 1 or w <= 0:
+        return None
+    k = 3 ** (w - 1)
+    if s > 3 * k:
+        return None
+
+    # a few splits around the balanced one are always enough, the first one fits almost always
+    for C in range(min(k, s - 1), max(s - 2 * k, 0) - 1, -1)[:4]:
+        r = s - C
+        for A, B in (((r + 1) // 2, r // 2), (r // 2, (r + 1) // 2)):
+            # t coins go on the left pan, difference of pans 2t - r is covered with genuine coins
+            for delta in range(0, min(g, r) // 2 + 2):
+                for t in {r // 2 - delta, (r + 1) // 2 + delta}:
+                    if t < 0 or t > r or abs(2 * t - r) > g:
+                        continue
+                    # A = h1 + l2 and B = l1 + h2 coins are left after unequal outcomes, l1 + h1 = t
+                    lo = max(0, t - B, t - l, -(-(t + A - l) // 2))
+                    hi = min(A, h, t, (h + t - B) // 2)
+                    if lo <= hi:
+                        h1 = lo
+                        l1 = t - h1
+                        return l1, h1, A - h1, B - l1
+    return None
+
+
+def planWeighing(counts: CoinsCounts, weighingsNumber: int) -> Optional[StateWeighing]:
+    """
+    Function chooses weighting, after which every outcome is still solvable in weighingsNumber - 1 weightings.
+
+    Args:
+        counts: numbers of unknown, light suspected, heavy suspected and genuine coins
+        weighingsNumber: number of weightings left
+    Returns:
+        weighting or None if there is no such weighting
+    """
+    u, l, h, g = counts
+    if u > 0:
+        plan = _planUnknown(u, g, weighingsNumber)
+        return None if plan is None else StateWeighing(plan[0], 0, 0, plan[1], 0, 0)
+    plan = _planMixed(l, h, g, weighingsNumber)
+    if plan is None:
+        return None
+    l1, h1, l2, h2 = plan
+    return StateWeighing(0, l1, h1, 0, l2, h2)
+
+
+class SuspicionState:
+    """
+    Class which tracks state of each coin: unknown, suspected to be light, suspected to be heavy or genuine.
+    """
+
+    def __init__(self, coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN):
+        """
+        Args:
+            coinsNumber: number of coins
+            fakeMode: one of WeightsIO.FAKE_MODE_* values, known direction makes every coin suspected at once
+        """
+        if fakeMode == FAKE_MODE_LIGHTER:
+            initialState = COIN_LIGHT
+        elif fakeMode == FAKE_MODE_HEAVIER:
+            initialState = COIN_HEAVY
+        else:
+            initialState = COIN_UNKNOWN
+        self.states = np.full(coinsNumber, initialState, dtype=np.int8)
+
+    def counts(self) -> CoinsCounts:
+        """
+        Function returns numbers of unknown, light suspected, heavy suspected and genuine coins.
+        """
+        counts = np.bincount(self.states, minlength=4)
+        return int(counts[COIN_UNKNOWN]), int(counts[COIN_LIGHT]), int(counts[COIN_HEAVY]), int(counts[COIN_GENUINE])
+
+    def take(self, state: int, number: int, skip: int = 0) -> np.ndarray:
+        """
+        Function returns indices of number coins in given state, first skip coins are skipped.
+        """
+        return np.flatnonzero(self.states == state)[skip: skip + number]
+
+    def update(self, groupL: np.ndarray, groupR: np.ndarray, managingItem: int):
+        """
+        Function updates states of coins after weighting, managingItem is result of CoinsKeeper.balance.
+        """
+        if managingItem == 0:
+            self.states[groupL] = COIN_GENUINE
+            self.states[groupR] = COIN_GENUINE
+            return
+
+        heavierGroup, lighterGroup = (groupL, groupR) if managingItem == -1 else (groupR, groupL)
+        heavierStates = self.states[heavierGroup]
+        lighterStates = self.states[lighterGroup]
+
+        # fake coin is either heavy coin on heavier pan or light coin on lighter pan, all other coins are genuine
+        self.states[:] = COIN_GENUINE
+        self.states[heavierGroup] = np.where((heavierStates == COIN_UNKNOWN) | (heavierStates == COIN_HEAVY),
+                                             COIN_HEAVY, COIN_GENUINE)
+        self.states[lighterGroup] = np.where((lighterStates == COIN_UNKNOWN) | (lighterStates == COIN_LIGHT),
+                                             COIN_LIGHT, COIN_GENUINE)
+
+    def solved(self) -> Optional[Tuple[int, int]]:
+        """
+        Function returns index and direction of fake coin if only one suspected coin is left.
+        """
+        u, l, h, _ = self.counts()
+        if u == 0 and l + h == 1:
+            index = int(np.flatnonzero(self.states != COIN_GENUINE)[0])
+            return index, -1 if self.states[index] == COIN_LIGHT else 1
+        return None
+
+
+def optimalAlgorithm(coinsNumber: int, weigh: Callable[[Sequence[int], Sequence[int]], int],
+                     fakeMode: int = FAKE_MODE_UNKNOWN, planner: Planner = planWeighing) -> Tuple[int, int]:
+    """
+    Adaptive algorithm which finds fake coin and its direction in the least number of weightings
+    in the worst case, see minWeighingsNumber. Each weighting is chosen from numbers of coins in each state,
+    so that every outcome is still solvable in the rest of weightings.
+
+    Args:
+        coinsNumber: number of coins
+        weigh: function which weighs two groups of coins, e.g. CoinsKeeper.balance or CoinsDetector.weighGroups
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        planner: function which chooses each weighting, planWeighing by default,
+            see also StrategySearch.StrategySearch.planWeighing
+    Returns:
+        index: index of fake coin;
+        indicator: -1 if fake coin is lighter, 1 if it's heavier.
+    """
+    if fakeMode == FAKE_MODE_UNKNOWN:
+        assert coinsNumber > 2, \
+            "Can't solver the problem for unknown fake coin weight relation and for 2 coins in total"
+
+    state = SuspicionState(coinsNumber, fakeMode)
+    weighingsNumber = minWeighingsNumber(coinsNumber, fakeMode)
+
+    result = state.solved()
+    while result is None:
+        counts = state.counts()
+        weighing = planner(counts, weighingsNumber)
+        assert weighing is not None, f"No weighting is found for coins counts {counts}"
+        groupL = np.concatenate([state.take(COIN_UNKNOWN, weighing.unknownL),
+                                 state.take(COIN_LIGHT, weighing.lightL),
+                                 state.take(COIN_HEAVY, weighing.heavyL)])
+        groupR = np.concatenate([state.take(COIN_UNKNOWN, weighing.unknownR, skip=weighing.unknownL),
+                                 state.take(COIN_LIGHT, weighing.lightR, skip=weighing.lightL),
+                                 state.take(COIN_HEAVY, weighing.heavyR, skip=weighing.heavyL)])
+
+        # pans are equalized with genuine coins
+        difference = len(groupL) - len(groupR)
+        if difference > 0:
+            groupR = np.concatenate([groupR, state.take(COIN_GENUINE, difference)])
+        elif difference < 0:
+            groupL = np.concatenate([groupL, state.take(COIN_GENUINE, -difference)])
+        groupL.sort()
+        groupR.sort()
+
+        state.update(groupL, groupR, weigh(groupL, groupR))
+        weighingsNumber -= 1
+        result = state.solved()
+
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsKeeper import CoinsKeeper
+    from CoinsDetector import solve
+    from InstanceGenerator import generateInstances
+
+    instancesNumber = 200
+    print("| coins | bound | optimal max | optimal mean | classic max | classic mean | classic unknown direction |")
+    print("|------:|------:|------------:|-------------:|------------:|-------------:|--------------------------:|")
+    for coinsNumber in (3, 4, 12, 13, 39, 40, 100, 1000, 10 ** 4, 10 ** 5):
+        batch = generateInstances(instancesNumber, coinsNumber, fakeMode=FAKE_MODE_UNKNOWN, seed=coinsNumber)
+        optimalCounts, classicCounts, classicUnknown = [], [], 0
+        t0 = time.perf_counter()
+        for weights, fakeIndex in zip(batch.weights, batch.fakeIndices):
+            ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=1, weights=weights)
+            counter = []
+
+            def weigh(groupL, groupR):
+                counter.append(1)
+                return ck.balance(groupL, groupR)
+
+            index, _ = optimalAlgorithm(coinsNumber, weigh)
+            assert index == fakeIndex
+            optimalCounts.append(len(counter))
+
+            _, indicator, weightingCount = solve(ck)
+            classicCounts.append(weightingCount)
+            classicUnknown += indicator is None
+        print(f"| {coinsNumber} | {minWeighingsNumber(coinsNumber)} | {max(optimalCounts)} | "
+              f"{np.mean(optimalCounts):.2f} | {max(classicCounts)} | {np.mean(classicCounts):.2f} | "
+              f"{classicUnknown}/{instancesNumber} |")
@@ -0,0 +1,250 @@
+import asyncio
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from AsyncCoinsKeeper import AsyncCoinsKeeper, Group
+from ScaleServer import (DEFAULT_PORT, MAX_BATCH, OP_BALANCE, OP_STATE, RESPONSE_HEADER, STATE, STATUS_OK, Ranges,
+                         encodeBalanceRequest, encodeStateRequest, toRanges)
+
+
+class ProtocolError(ConnectionError):
+    """
+    Weighing station sent response, which doesn't match any request, so responses can't be read further.
+    """
+
+
+class _Connection:
+    """
+    Connection to weighing station, responses are matched with waiting futures by request id.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # operations and futures of requests, which are sent and aren't answered yet
+        self.futures: Dict[int, Tuple[int, List[asyncio.Future]]] = {}
+        self.inFlight = 0
+        # error, which futures of requests fail with, after responses can't be read
+        self.error: Optional[Exception] = None
+        self.readerTask = asyncio.ensure_future(self.readResponses())
+
+    def send(self, requestId: int, request: bytes, operation: int, futures: List[asyncio.Future]):
+        if self.error is not None:
+            for future in futures:
+                future.set_exception(self.error)
+            return
+        self.futures[requestId] = operation, futures
+        self.inFlight += len(futures)
+        self.writer.write(request)
+
+    async def readResponses(self):
+        error: Exception = ConnectionError("Connection to weighing station is closed")
+        try:
+            while True:
+                requestId, status, count = RESPONSE_HEADER.unpack(
+                    await self.reader.readexactly(RESPONSE_HEADER.size))
+                try:
+                    operation, futures = self.futures.pop(requestId)
+                except KeyError:
+                    raise ProtocolError(f"Weighing station answered unknown request {requestId}") from None
+                self.inFlight -= len(futures)
+                if status != STATUS_OK:
+                    results = [ValueError((await self.reader.readexactly(count)).decode())] * len(futures)
+                elif operation == OP_STATE:
+                    results = [STATE.unpack(await self.reader.readexactly(STATE.size))]
+                else:
+                    results = struct.unpack(f"<{count}b", await self.reader.readexactly(count))
+                if len(results) != len(futures):
+                    # futures are failed with the others, so none of them waits forever
+                    self.futures[requestId] = operation, futures
+                    raise ProtocolError(f"Weighing station answered {len(results)} results to request {requestId} "
+                                        f"of {len(futures)} weightings")
+                for future, result in zip(futures, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        except ProtocolError as protocolError:
+            error = protocolError
+            self.writer.close()
+        except (asyncio.IncompleteReadError, ConnectionError) as readError:
+            error = ConnectionError(f"Connection to weighing station is lost: {readError!r}")
+        finally:
+            self.error = error
+            for _, futures in self.futures.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            self.futures.clear()
+
+    async def close(self):
+        self.writer.close()
+        self.readerTask.cancel()
+        try:
+            await self.readerTask
+        except asyncio.CancelledError:
+            pass
+
+
+class RemoteCoinsKeeper(AsyncCoinsKeeper):
+    """
+    Asynchronous keeper of coins, which are weighed by ScaleServer. Keeper holds a pool of connections,
+    weightings, which are requested during one iteration of event loop, are batched into one request
+    and requests are pipelined: they are sent without waiting for responses to previous ones.
+    It must be connected before weighting, e.g. with "async with RemoteCoinsKeeper(...) as keeper".
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: Optional[str] = None,
+                 poolSize: int = 4, maxBatch: int = 256, scalesNumber: int = 4096, recordLatencies: bool = False):
+        """
+        Args:
+            host: host of weighing station
+            port: port of weighing station
+            path: path of Unix socket of weighing station, it's used instead of host and port if it's given
+            poolSize: number of connections
+            maxBatch: the largest number of weightings in one request
+            scalesNumber: the largest number of weightings in flight
+            recordLatencies: whether latency of each weighting is stored in latencies list
+        """
+        super().__init__(None, scalesNumber)
+        assert 0 < maxBatch <= MAX_BATCH, f"Batch size must be from 1 to {MAX_BATCH}"
+        self.host = host
+        self.port = port
+        self.path = path
+        self.poolSize = poolSize
+        self.maxBatch = maxBatch
+        self.latencies: Optional[List[float]] = [] if recordLatencies else None
+        self.connections: List[_Connection] = []
+        self.requestCount = 0
+        self._coinsNumber = 0
+        self._coinsState: Dict[str, int] = {}
+        self._pending: List[Tuple[Ranges, asyncio.Future]] = []
+        self._flushScheduled = False
+        self._requestId = 0
+
+    async def connect(self):
+        """
+        Function opens pool of connections and loads coins state from weighing station.
+        """
+        for _ in range(self.poolSize):
+            if self.path is not None:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            self.connections.append(_Connection(reader, writer))
+
+        future = asyncio.get_running_loop().create_future()
+        requestId = self.nextRequestId()
+        self.connections[0].send(requestId, encodeStateRequest(requestId), OP_STATE, [future])
+        self._coinsNumber, n_gen, n_fake, n_fake_l, n_fake_h = await future
+        self._coinsState = {"n_gen": n_gen, "n_fake": n_fake, "n_fake_l": n_fake_l, "n_fake_h": n_fake_h}
+
+    async def close(self):
+        for connection in self.connections:
+            await connection.close()
+        self.connections = []
+
+    async def __aenter__(self) -> "RemoteCoinsKeeper":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def coinsNumber(self) -> int:
+        return self._coinsNumber
+
+    def getCoinsState(self):
+        return dict(self._coinsState)
+
+    def nextRequestId(self) -> int:
+        self._requestId = (self._requestId + 1) & 0xFFFFFFFF
+        return self._requestId
+
+    async def weighOnScale(self, left_indices: Group, right_indices: Group) -> int:
+        assert self.connections, "Keeper isn't connected"
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((toRanges(left_indices, right_indices), future))
+        if not self._flushScheduled:
+            # weightings, which are requested until the next iteration of event loop, go in one batch
+            self._flushScheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+        if self.latencies is None:
+            return await future
+        t0 = asyncio.get_running_loop().time()
+        managingItem = await future
+        self.latencies.append(asyncio.get_running_loop().time() - t0)
+        return managingItem
+
+    def flush(self):
+        """
+        Function sends pending weightings in batches, each batch goes to the least loaded live connection,
+        weightings fail with error of the first connection, if there is no live connection.
+        """
+        self._flushScheduled = False
+        pending, self._pending = self._pending, []
+        # connections, which are lost or broken by protocol error, aren't used any more
+        connections = [connection for connection in self.connections if connection.error is None]
+        if not connections:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(self.connections[0].error)
+            return
+        for i in range(0, len(pending), self.maxBatch):
+            batch = pending[i: i + self.maxBatch]
+            requestId = self.nextRequestId()
+            connection = min(connections, key=lambda c: c.inFlight)
+            connection.send(requestId, encodeBalanceRequest(requestId, (ranges for ranges, _ in batch)),
+                            OP_BALANCE, [future for _, future in batch])
+            self.requestCount += 1
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    import time
+
+    import numpy as np
+
+    from AsyncCoinsDetector import solveMany
+    from ScaleServer import main as serverMain
+
+    port = DEFAULT_PORT
+    coinsNumber = 10 ** 5
+    server = multiprocessing.Process(target=serverMain, args=(["--coins", str(coinsNumber), "--seed", "0",
+                                                              "--port", str(port)],), daemon=True)
+    server.start()
+
+    async def connectKeeper(**options) -> RemoteCoinsKeeper:
+        for _ in range(100):
+            try:
+                keeper = RemoteCoinsKeeper(port=port, recordLatencies=True, **options)
+                await keeper.connect()
+                return keeper
+            except ConnectionError:
+                await asyncio.sleep(0.05)
+        raise ConnectionError("Weighing station isn't started")
+
+    async def loadTest(sessionsNumber: int, concurrency: int, **options) -> str:
+        keeper = await connectKeeper(**options)
+        t0 = time.perf_counter()
+        results = await solveMany([keeper] * sessionsNumber, concurrency)
+        elapsed = time.perf_counter() - t0
+        await keeper.close()
+        assert len({index for index, _, _ in results}) == 1
+        weightingsNumber = sum(weightingCount for _, _, weightingCount in results)
+        latencies = np.array(keeper.latencies) * 1e3
+        return (f"| {options['poolSize']} | {options['maxBatch']} | {concurrency} | "
+                f"{weightingsNumber / elapsed:.0f} | {weightingsNumber / keeper.requestCount:.1f} | "
+                f"{np.percentile(latencies, 50):.3f} | {np.percentile(latencies, 99):.3f} |")
+
+    print(f"localhost load test, {coinsNumber} coins:")
+    print("| connections | max batch | sessions in flight | weightings/s | weightings/request | p50, ms | p99, ms |")
+    print("|------------:|----------:|-------------------:|-------------:|-------------------:|--------:|--------:|")
+    for poolSize, maxBatch, concurrency in ((1, 1, 1), (1, 1, 100), (4, 1, 100), (1, 256, 100), (4, 256, 100),
+                                            (4, 256, 1000)):
+        print(asyncio.run(loadTest(2000, concurrency, poolSize=poolSize, maxBatch=maxBatch)))
+    server.terminate()
@@ -0,0 +1,169 @@
+import asyncio
+import struct
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+from CoinsKeeper import CoinsKeeper
+
+DEFAULT_PORT = 7340
+
+# operations of requests
+OP_BALANCE = 1
+OP_STATE = 2
+
+# statuses of responses
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# request: operation, request id, number of weightings; each weighting is four uint64 bounds of two ranges
+REQUEST_HEADER = struct.Struct("<BIH")
+RANGES = struct.Struct("<QQQQ")
+# response: request id, status, number of items; balance items are int8 outcomes, error item is utf-8 message
+RESPONSE_HEADER = struct.Struct("<IBH")
+# coins state: coins number, n_gen, n_fake, n_fake_l, n_fake_h
+STATE = struct.Struct("<5Q")
+
+# the largest number of weightings in one request
+MAX_BATCH = 0xFFFF
+
+# four bounds of left and right ranges of coins
+Ranges = Tuple[int, int, int, int]
+
+
+def encodeBalanceRequest(requestId: int, weighings: Iterable[Ranges]) -> bytes:
+    """
+    Function encodes several weightings of contiguous groups into one request, 32 bytes per weighting.
+    """
+    payload = b"".join(RANGES.pack(*ranges) for ranges in weighings)
+    count = len(payload) // RANGES.size
+    assert count <= MAX_BATCH, f"There can be at most {MAX_BATCH} weightings in one request"
+    return REQUEST_HEADER.pack(OP_BALANCE, requestId, count) + payload
+
+
+def encodeStateRequest(requestId: int) -> bytes:
+    return REQUEST_HEADER.pack(OP_STATE, requestId, 0)
+
+
+def encodeErrorResponse(requestId: int, message: str) -> bytes:
+    payload = message.encode()[:MAX_BATCH]
+    return RESPONSE_HEADER.pack(requestId, STATUS_ERROR, len(payload)) + payload
+
+
+def toRanges(groupL: range, groupR: range) -> Ranges:
+    """
+    Function returns bounds of two contiguous groups, only ranges with step 1 can be sent to server.
+    """
+    if not (isinstance(groupL, range) and isinstance(groupR, range) and groupL.step == 1 and groupR.step == 1):
+        raise ValueError("Only contiguous groups of coins (ranges with step 1) can be weighed remotely")
+    return groupL.start, groupL.stop, groupR.start, groupR.stop
+
+
+class ScaleServer:
+    """
+    Weighing station, which serves CoinsKeeper.balance over TCP or Unix socket.
+    Each connection is served in order, so client may send next requests without waiting for responses,
+    several weightings can be sent in one request.
+    """
+
+    def __init__(self, ck: CoinsKeeper):
+        self.ck = ck
+        self.coinsNumber = len(ck.weights)
+        self.weightingCount = 0
+        self.requestCount = 0
+
+    def balanceBatch(self, payload: bytes) -> bytes:
+        """
+        Function weighs every weighting of request and returns their outcomes as int8 values.
+        """
+        outcomes: List[int] = []
+        for leftStart, leftStop, rightStart, rightStop in RANGES.iter_unpack(payload):
+            if not (leftStart <= leftStop <= self.coinsNumber and rightStart <= rightStop <= self.coinsNumber):
+                raise ValueError(f"Ranges {(leftStart, leftStop, rightStart, rightStop)} are out of "
+                                 f"{self.coinsNumber} coins")
+            outcomes.append(self.ck.balanceRanges(leftStart, leftStop, rightStart, rightStop))
+        self.weightingCount += len(outcomes)
+        return struct.pack(f"<{len(outcomes)}b", *outcomes)
+
+    def respond(self, operation: int, requestId: int, payload: bytes) -> bytes:
+        """
+        Function returns encoded response to request.
+        """
+        self.requestCount += 1
+        try:
+            if operation == OP_BALANCE:
+                outcomes = self.balanceBatch(payload)
+                return RESPONSE_HEADER.pack(requestId, STATUS_OK, len(outcomes)) + outcomes
+            if operation == OP_STATE:
+                coinsState = self.ck.getCoinsState()
+                return RESPONSE_HEADER.pack(requestId, STATUS_OK, 1) + STATE.pack(
+                    self.coinsNumber, coinsState["n_gen"], coinsState["n_fake"], coinsState["n_fake_l"],
+                    coinsState["n_fake_h"])
+            raise ValueError(f"Unknown operation {operation}")
+        except ValueError as error:
+            return encodeErrorResponse(requestId, str(error))
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                operation, requestId, count = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+                if operation == OP_BALANCE:
+                    payload = await reader.readexactly(count * RANGES.size)
+                elif count:
+                    # size of payload of other operations is unknown, so the next request can't be found
+                    self.requestCount += 1
+                    writer.write(encodeErrorResponse(
+                        requestId, f"Unexpected payload of operation {operation}, connection is closed"))
+                    await writer.drain()
+                    break
+                else:
+                    payload = b""
+                writer.write(self.respond(operation, requestId, payload))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: Optional[str] = None) -> \
+            asyncio.AbstractServer:
+        """
+        Function starts serving on TCP port or on Unix socket, if path is given.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handleConnection, path=path)
+        return await asyncio.start_server(self.handleConnection, host, port)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Function which is served as console interface of weighing station"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve weightings of coins over TCP or Unix socket")
+    parser.add_argument("weights", nargs="?", default=None, help="weights file (.txt or .bin), random if omitted")
+    parser.add_argument("--coins", type=int, default=1000, help="coins number of random weights")
+    parser.add_argument("--seed", type=int, default=None, help="seed of random weights")
+    modeGroup = parser.add_mutually_exclusive_group()
+    modeGroup.add_argument("--lighter", action="store_true", help="fake coin is lighter than genuine ones")
+    modeGroup.add_argument("--heavier", action="store_true", help="fake coin is heavier than genuine ones")
+    parser.add_argument("--host", default="127.0.0.1", help="host of TCP server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of TCP server")
+    parser.add_argument("--unix", default=None, metavar="PATH", help="path of Unix socket instead of TCP port")
+    args = parser.parse_args(argv)
+
+    ck = CoinsKeeper(n_gen=args.coins - 1, n_fake=int(not (args.lighter or args.heavier)),
+                     n_fake_l=int(args.lighter), n_fake_h=int(args.heavier), weights=args.weights, seed=args.seed)
+
+    async def serve():
+        server = await ScaleServer(ck).start(args.host, args.port, args.unix)
+        print(f"serving {len(ck.weights)} coins on {args.unix or f'{args.host}:{args.port}'}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
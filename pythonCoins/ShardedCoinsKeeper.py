@@ -0,0 +1,312 @@
+import multiprocessing
+import os
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Connection
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from CoinsKeeper import CoinsKeeper, isPlainRange
+from InstanceGenerator import Seed
+
+# groups of fewer coins are summed in calling process, messages to workers cost more than summing them
+PARALLEL_THRESHOLD = 1 << 20
+
+# description of group for workers: ("range", start, stop) or ("indices", offset, count) in shared indices buffer
+GroupSpec = Tuple[str, int, int]
+
+
+def _attach(name: str, length: int, dtype: str) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    segment = shared_memory.SharedMemory(name=name)
+    return segment, np.ndarray((length,), dtype=np.dtype(dtype), buffer=segment.buf)
+
+
+def _release(segment: Optional[shared_memory.SharedMemory], unlink: bool = False):
+    if segment is None:
+        return
+    try:
+        segment.close()
+    except BufferError:
+        # numpy views of segment are still alive, memory is freed when they are collected
+        pass
+    if unlink:
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _partialSum(weights: np.ndarray, indices: Optional[np.ndarray], shard: Tuple[int, int], spec: GroupSpec,
+                worker: int, workersNumber: int) -> int:
+    """
+    Function returns part of group weight, which belongs to worker: coins of its shard for range
+    and its chunk of indices for any other group.
+    """
+    kind, first, second = spec
+    if kind == "range":
+        start, stop = max(first, shard[0]), min(second, shard[1])
+        return int(weights[start:stop].sum(dtype=np.int64)) if start < stop else 0
+    offset, count = first, second
+    chunk = indices[offset + count * worker // workersNumber: offset + count * (worker + 1) // workersNumber]
+    return int(weights[chunk].sum(dtype=np.int64))
+
+
+def _shardWorker(connection: Connection, worker: int, workersNumber: int):
+    """
+    Worker process, which attaches to shared weights and indices and sums its part of requested groups.
+    """
+    weightsSegment = indicesSegment = None
+    weights = indices = None
+    shard = (0, 0)
+    try:
+        while True:
+            message = connection.recv()
+            operation = message[0]
+            if operation == "sum":
+                connection.send([_partialSum(weights, indices, shard, spec, worker, workersNumber)
+                                 for spec in message[1]])
+            elif operation == "weights":
+                _, name, length, dtype, shard = message
+                weights = None
+                _release(weightsSegment)
+                weightsSegment, weights = _attach(name, length, dtype)
+                connection.send(True)
+            elif operation == "indices":
+                _, name, length = message
+                indices = None
+                _release(indicesSegment)
+                indicesSegment, indices = _attach(name, length, np.dtype(np.intp).str)
+                connection.send(True)
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        weights = indices = None
+        _release(weightsSegment)
+        _release(indicesSegment)
+
+
+def _shutdown(connections: List[Connection], processes: List[multiprocessing.Process],
+              segments: List[Optional[shared_memory.SharedMemory]]):
+    for connection in connections:
+        try:
+            connection.send(("stop",))
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for segment in segments:
+        _release(segment, unlink=True)
+    connections.clear()
+    processes.clear()
+    segments[:] = [None] * len(segments)
+
+
+class ShardedCoinsKeeper(CoinsKeeper):
+    """
+    Keeper of coins, which weights live in shared memory split into shards, one shard per worker process.
+    Weight of large group is summed in parallel: every worker sums its part of group straight from
+    shared memory, partial sums are reduced in calling process, so neither weights nor groups are copied
+    to workers. Cumulative sums aren't used, so groups of any form, including ranges in rangeWeight and
+    balanceRanges, are summed without 8 bytes per coin of extra memory.
+    Keeper must be closed with close method or used as context manager.
+    """
+
+    def __init__(self, n_gen: int = 9, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0,
+                 weights: Union[List[int], str] = None, seed: Seed = None, workers: Optional[int] = None,
+                 parallelThreshold: int = PARALLEL_THRESHOLD):
+        '''
+        Args:
+            n_gen, n_fake, n_fake_l, n_fake_h, weights, seed: see CoinsKeeper
+            workers: number of worker processes, number of CPUs by default
+            parallelThreshold: groups of fewer coins are summed in calling process
+        '''
+        self.workersNumber = workers or os.cpu_count() or 1
+        self.parallelThreshold = parallelThreshold
+        self.connections: List[Connection] = []
+        self.processes: List[multiprocessing.Process] = []
+        # segments of weights and of indices buffer
+        self._segments: List[Optional[shared_memory.SharedMemory]] = [None, None]
+        self._indices: Optional[np.ndarray] = None
+
+        # workers must share tracker of segments with this process, otherwise each of them starts its own one
+        resource_tracker.ensure_running()
+        for worker in range(self.workersNumber):
+            parentConnection, childConnection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shardWorker, daemon=True,
+                                              args=(childConnection, worker, self.workersNumber))
+            process.start()
+            childConnection.close()
+            self.connections.append(parentConnection)
+            self.processes.append(process)
+        self._finalizer = weakref.finalize(self, _shutdown, self.connections, self.processes, self._segments)
+
+        super().__init__(n_gen, n_fake, n_fake_l, n_fake_h, weights=weights, seed=seed)
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        Weights of coins stored as read-only numpy array in shared memory.
+        """
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: Union[List[int], np.ndarray]):
+        weights = np.asarray(weights)
+        segment = shared_memory.SharedMemory(create=True, size=max(weights.nbytes, 1))
+        self._weights = np.ndarray(weights.shape, dtype=weights.dtype, buffer=segment.buf)
+        self._weights[:] = weights
+        self._weights.setflags(write=False)
+        self._prefixSums = None
+        self.weightsVersion += 1
+
+        bounds = np.linspace(0, len(weights), self.workersNumber + 1).astype(np.int64)
+        for worker, connection in enumerate(self.connections):
+            connection.send(("weights", segment.name, len(weights), weights.dtype.str,
+                             (int(bounds[worker]), int(bounds[worker + 1]))))
+        # workers have left old segment, when they answer
+        for connection in self.connections:
+            connection.recv()
+        _release(self._segments[0], unlink=True)
+        self._segments[0] = segment
+
+    def close(self):
+        """
+        Function stops worker processes and frees shared memory.
+        """
+        self._weights = self._indices = None
+        self._finalizer()
+
+    def __enter__(self) -> "ShardedCoinsKeeper":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def getIndicesBuffer(self, size: int) -> np.ndarray:
+        """
+        Function returns shared buffer of at least size indices, which is grown by doubling.
+        """
+        if self._indices is None or len(self._indices) < size:
+            length = max(size, 2 * (0 if self._indices is None else len(self._indices)), 1 << 16)
+            segment = shared_memory.SharedMemory(create=True, size=length * np.dtype(np.intp).itemsize)
+            self._indices = np.ndarray((length,), dtype=np.intp, buffer=segment.buf)
+            for connection in self.connections:
+                connection.send(("indices", segment.name, length))
+            for connection in self.connections:
+                connection.recv()
+            _release(self._segments[1], unlink=True)
+            self._segments[1] = segment
+        return self._indices
+
+    def groupWeights(self, groups: Sequence[Union[range, Sequence[int]]]) -> List[int]:
+        """
+        Function returns total weights of several groups of coins, large groups are summed by workers
+        in one round of messages. Groups are checked as in CoinsKeeper.groupWeight: negative indices count
+        coins from the end and range past the last coin raises IndexError.
+        """
+        totals = [0] * len(groups)
+        specs: List[GroupSpec] = []
+        parallelGroups: List[int] = []
+        indicesGroups: List[Tuple[int, np.ndarray]] = []
+        for i, group in enumerate(groups):
+            isRange = isPlainRange(group)
+            if isRange and len(group) and group.stop > len(self._weights):
+                raise IndexError(f"Range [{group.start}, {group.stop}) is out of {len(self._weights)} coins")
+            if not isRange:
+                group = np.asarray(group, dtype=np.intp)
+            if len(group) < self.parallelThreshold or self.workersNumber == 1:
+                totals[i] = (int(self._weights[group.start:group.stop].sum(dtype=np.int64)) if isRange
+                             else int(self._weights[group].sum(dtype=np.int64)))
+            elif isRange:
+                specs.append(("range", group.start, group.stop))
+                parallelGroups.append(i)
+            else:
+                indicesGroups.append((len(specs), group))
+                specs.append(("indices", 0, len(group)))
+                parallelGroups.append(i)
+
+        if not specs:
+            return totals
+
+        if indicesGroups:
+            buffer = self.getIndicesBuffer(sum(len(group) for _, group in indicesGroups))
+            offset = 0
+            for specIndex, group in indicesGroups:
+                buffer[offset: offset + len(group)] = group
+                specs[specIndex] = ("indices", offset, len(group))
+                offset += len(group)
+
+        for connection in self.connections:
+            connection.send(("sum", specs))
+        for connection in self.connections:
+            for i, partialSum in zip(parallelGroups, connection.recv()):
+                totals[i] += partialSum
+        return totals
+
+    def rangeWeight(self, start: int, stop: int) -> int:
+        """
+        Function returns total weight of contiguous group of coins, which is summed by workers, if it's large.
+        """
+        if not 0 <= start <= stop <= len(self._weights):
+            raise IndexError(f"Range [{start}, {stop}) is out of {len(self._weights)} coins")
+        return self.groupWeights([range(start, stop)])[0]
+
+    def groupWeight(self, indices: Union[range, Sequence[int]]) -> int:
+        return self.groupWeights([indices])[0]
+
+    def balance(self, left_indices, right_indices):
+        '''
+        weighting of two groups of coins, both groups are summed in one round of messages to workers,
+        result is the same as in CoinsKeeper.balance.
+        '''
+        leftWeight, rightWeight = self.groupWeights([left_indices, right_indices])
+
+        if rightWeight > leftWeight:
+            return 1
+
+        if rightWeight < leftWeight:
+            return -1
+
+        return 0
+
+    def balanceRanges(self, left_start: int, left_stop: int, right_start: int, right_stop: int):
+        '''
+        weighting of two contiguous groups of coins, both ranges are summed in one round of messages to workers.
+        '''
+        return self.balance(range(left_start, left_stop), range(right_start, right_stop))
+
+
+if __name__ == "__main__":
+    import time
+
+    coinsNumber = 10 ** 8
+    repeats = 5
+    cpuCount = os.cpu_count() or 1
+    workersNumbers = sorted({1, cpuCount} | {2 ** k for k in range(1, cpuCount.bit_length()) if 2 ** k <= cpuCount})
+    rng = np.random.default_rng(0)
+    randomGroups = np.sort(rng.choice(coinsNumber, size=2 * 10 ** 6, replace=False)).reshape(2, -1)
+
+    def measure(ck: CoinsKeeper, groupL, groupR) -> float:
+        ck.balance(groupL, groupR)
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            ck.balance(groupL, groupR)
+        return (time.perf_counter() - t0) / repeats * 1e3
+
+    print(f"{coinsNumber} coins, balance of halves and of two random groups of {randomGroups.shape[1]} coins, "
+          f"{cpuCount} CPUs:")
+    print("| workers | halves, ms | random groups, ms | halves speedup | random groups speedup |")
+    print("|--------:|-----------:|------------------:|---------------:|----------------------:|")
+    halves = range(0, coinsNumber // 2), range(coinsNumber // 2, coinsNumber)
+    baseline = None
+    for workersNumber in workersNumbers:
+        with ShardedCoinsKeeper(n_gen=coinsNumber - 1, seed=0, workers=workersNumber, parallelThreshold=0) as ck:
+            timings = measure(ck, *halves), measure(ck, *randomGroups)
+        baseline = baseline or timings
+        print(f"| {workersNumber} | {timings[0]:.2f} | {timings[1]:.2f} | {baseline[0] / timings[0]:.2f} | "
+              f"{baseline[1] / timings[1]:.2f} |")
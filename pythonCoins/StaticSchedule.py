@@ -0,0 +1,302 @@
+import itertools
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_UNKNOWN
+
+# pans of coin in one weighting
+PAN_LEFT = -1
+PAN_OFF = 0
+PAN_RIGHT = 1
+
+
+class StaticSchedule(NamedTuple):
+    """
+    Non-adaptive schedule: all weightings are fixed in advance, so they can be done at once on different scales.
+    Coin i goes to pan pans[i, j] in weighting j, outcomes of weightings are ternary code of fake coin,
+    which is decoded by lookup in tables indexed by syndrome of outcomes, see getSyndrome.
+
+    Attributes:
+        coinsNumber: number of coins
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        pans: array of shape (coinsNumber, weighingsNumber) of PAN_* values
+        coins: index of fake coin for each syndrome, -1 if syndrome is impossible
+        directions: -1 if fake coin is lighter, 1 if it's heavier for each syndrome
+    """
+    coinsNumber: int
+    fakeMode: int
+    pans: np.ndarray
+    coins: np.ndarray
+    directions: np.ndarray
+
+    @property
+    def weighingsNumber(self) -> int:
+        return self.pans.shape[1]
+
+
+def staticWeighingsNumber(coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN) -> int:
+    """
+    Function returns number of weightings of static schedule: ceil(log3 N) for known direction
+    and ceil(log3(2N + 3)) for unknown one, the same as the worst case of adaptive OptimalSolver.
+    """
+    bound = 2 * coinsNumber + 3 if fakeMode == FAKE_MODE_UNKNOWN else coinsNumber
+    weighingsNumber = 0
+    while 3 ** weighingsNumber < bound:
+        weighingsNumber += 1
+    return weighingsNumber
+
+
+def _codes(numbers: np.ndarray, length: int) -> np.ndarray:
+    """
+    Function returns ternary digits of numbers, the most significant digit is the first one.
+    """
+    return ((numbers[:, None] // 3 ** np.arange(length - 1, -1, -1, dtype=np.int64)) % 3).astype(np.int8)
+
+
+def _orbits(codes: np.ndarray) -> np.ndarray:
+    """
+    Function returns codes c, c + 1, c + 2 (digit-wise modulo 3) for each code, every digit of each triple
+    takes every value once, so triple puts one coin on each pan and one coin aside in every weighting.
+    """
+    return np.stack([codes, (codes + 1) % 3, (codes + 2) % 3], axis=1).reshape(3 * len(codes), codes.shape[1])
+
+
+def _clockwiseOrbitCodes(length: int, orbitsNumber: int) -> np.ndarray:
+    """
+    Function returns the first orbitsNumber orbits of Dyson's clockwise codes: the first change of digits of code
+    is 0 -> 1, 1 -> 2 or 2 -> 0. Exactly one code of each pair c, 2 - c is clockwise and adding 1 to every digit
+    keeps code clockwise, so orbits of codes, which start with 0, split all of them.
+    Orbits of (0..0, 1), (0..0, 1, 2) and (0..0, 1, 0) go first, they are used to fix remainders of N mod 3.
+    """
+    if length < 3:
+        reps = [np.array([[0, 1]])] if length == 2 and orbitsNumber else []
+    else:
+        special = np.zeros((3, length), dtype=np.int8)
+        special[0, -1] = 1
+        special[1, -2:] = 1, 2
+        special[2, -2] = 1
+        reps = [special[:orbitsNumber]]
+        found = len(reps[0])
+        # codes, which start with 0, are enumerated in chunks, about half of them are clockwise
+        start, chunkSize = 0, max(4 * orbitsNumber, 1024)
+        while found < orbitsNumber:
+            codes = _codes(np.arange(start, min(start + chunkSize, 3 ** (length - 1)), dtype=np.int64), length)
+            start += chunkSize
+            changed = codes[:, 1:] != codes[:, :-1]
+            first = changed.argmax(axis=1)
+            rows = np.arange(len(codes))
+            clockwise = changed[rows, first] & ((codes[rows, first + 1] - codes[rows, first]) % 3 == 1)
+            isSpecial = (codes[:, None, :] == special[None]).all(axis=2).any(axis=1)
+            chunk = codes[clockwise & ~isSpecial][:orbitsNumber - found]
+            reps.append(chunk)
+            found += len(chunk)
+    reps = np.concatenate(reps) if reps else np.zeros((0, length), dtype=np.int8)
+    return _orbits(reps)
+
+
+def _searchCodes(coinsNumber: int, length: int) -> np.ndarray:
+    """
+    Function finds codes of a few coins by exhaustive search over pairs c, 2 - c and their orientations.
+    """
+    # code 2 - c is number 3^w - 1 - c, so codes below (3^w - 1) / 2 represent all pairs
+    reps = _codes(np.arange((3 ** length - 1) // 2, dtype=np.int64), length)
+    for combination in itertools.combinations(range(len(reps)), coinsNumber):
+        for orientation in itertools.product((0, 2), repeat=coinsNumber - 1):
+            codes = reps[list(combination)]
+            codes[1:] = np.abs(np.array(orientation)[:, None] - codes[1:])
+            if ((codes == 0).sum(axis=0) == (codes == 2).sum(axis=0)).all():
+                return codes
+    raise ValueError(f"No static schedule for {coinsNumber} coins in {length} weightings")
+
+
+def _unknownCodes(coinsNumber: int, length: int) -> np.ndarray:
+    """
+    Function returns codes of coins for unknown direction: no code is 2 - c of another one and every weighting
+    is balanced. N = 3k coins take k orbits of clockwise codes. Otherwise k + 1 orbits are taken and two codes
+    are removed, balance is restored by flipping one code to 2 - c and for N = 3k + 2 by code (0, ..., 0).
+    """
+    orbitsNumber, remainder = divmod(coinsNumber, 3)
+    if remainder == 0:
+        return _clockwiseOrbitCodes(length, orbitsNumber)
+    if orbitsNumber < 2:
+        return _searchCodes(coinsNumber, length)
+
+    codes = _clockwiseOrbitCodes(length, orbitsNumber + 1)
+    ones, twos = np.ones(length - 2, dtype=np.int64), np.full(length - 2, 2)
+    if remainder == 1:
+        removed = [np.r_[ones - 1, 0, 1], np.r_[twos, 0, 1]]
+        flipped = np.r_[ones, 2, 1]
+        extra = []
+    else:
+        removed = [np.r_[ones, 1, 2], np.r_[twos, 0, 1]]
+        flipped = np.r_[ones - 1, 1, 0]
+        extra = [np.zeros(length, dtype=np.int8)]
+
+    keep = np.ones(len(codes), dtype=bool)
+    for code in removed:
+        keep &= ~(codes == code).all(axis=1)
+    codes = codes[keep]
+    codes[(codes == flipped).all(axis=1)] = 2 - flipped
+    return np.concatenate([codes] + [code[None] for code in extra])
+
+
+def _knownCodes(coinsNumber: int, length: int) -> np.ndarray:
+    """
+    Function returns codes of coins for known direction: N = 3k coins take k orbits of codes,
+    one more coin is never weighed, two more coins are always on the left and on the right pan.
+    """
+    orbitsNumber, remainder = divmod(coinsNumber, 3)
+    numbers = np.arange(3 ** length // 3, dtype=np.int64) if length else np.zeros(0, dtype=np.int64)
+    reps = _codes(numbers, length)
+    # orbit of constant codes goes last, it's taken only if all other orbits are taken
+    reps = reps[(reps != reps[:, :1]).any(axis=1)] if length else reps
+    if orbitsNumber > len(reps):
+        reps = np.concatenate([reps, np.zeros((1, length), dtype=np.int8)])
+    codes = _orbits(reps[:orbitsNumber])
+    extra = [[1] * length] if remainder == 1 else [[0] * length, [2] * length] if remainder == 2 else []
+    return np.concatenate([codes, np.array(extra, dtype=np.int8).reshape(len(extra), length)])
+
+
+def getSyndrome(outcomes: np.ndarray) -> np.ndarray:
+    """
+    Function returns syndromes of vectors of outcomes (results of CoinsKeeper.balance), which index lookup tables.
+    """
+    outcomes = np.asarray(outcomes, dtype=np.int64)
+    length = outcomes.shape[-1]
+    return ((outcomes + 1) * 3 ** np.arange(length - 1, -1, -1, dtype=np.int64)).sum(axis=-1)
+
+
+def buildSchedule(coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN) -> StaticSchedule:
+    """
+    Function builds ternary-coded schedule in the style of the classic 12 coins solution and its lookup tables.
+    Heavier fake coin tips every weighting to its own pan, so vector of outcomes equals its pans,
+    lighter fake coin gives negated pans.
+
+    Args:
+        coinsNumber: number of coins
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+    """
+    if fakeMode == FAKE_MODE_UNKNOWN:
+        assert coinsNumber > 2, \
+            "Can't solver the problem for unknown fake coin weight relation and for 2 coins in total"
+    weighingsNumber = staticWeighingsNumber(coinsNumber, fakeMode)
+    if fakeMode == FAKE_MODE_UNKNOWN:
+        codes = _unknownCodes(coinsNumber, weighingsNumber)
+    else:
+        codes = _knownCodes(coinsNumber, weighingsNumber)
+    # digit 0 is the left pan, 1 is aside, 2 is the right pan
+    pans = (codes - 1).astype(np.int8)
+    assert len(pans) == coinsNumber and ((pans == PAN_LEFT).sum(axis=0) == (pans == PAN_RIGHT).sum(axis=0)).all()
+
+    coins = np.full(3 ** weighingsNumber, -1, dtype=np.int64)
+    directions = np.zeros(3 ** weighingsNumber, dtype=np.int8)
+    indices = np.arange(coinsNumber, dtype=np.int64)
+    for direction in (-1, 1):
+        if fakeMode == FAKE_MODE_UNKNOWN or (direction == 1) == (fakeMode == FAKE_MODE_HEAVIER):
+            syndromes = getSyndrome(direction * pans)
+            assert (coins[syndromes] == -1).all(), "Codes of coins must differ"
+            coins[syndromes] = indices
+            directions[syndromes] = direction
+    return StaticSchedule(coinsNumber, fakeMode, pans, coins, directions)
+
+
+@lru_cache(maxsize=64)
+def getSchedule(coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN) -> StaticSchedule:
+    """
+    Function returns schedule, which is built once per coins number and fake mode.
+    """
+    return buildSchedule(coinsNumber, fakeMode)
+
+
+def scheduleGroups(schedule: StaticSchedule) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Function returns left and right groups of coins of every weighting.
+    """
+    return [(np.flatnonzero(column == PAN_LEFT), np.flatnonzero(column == PAN_RIGHT)) for column in schedule.pans.T]
+
+
+def decodeOutcomes(schedule: StaticSchedule, outcomes: Sequence[int]) -> Tuple[int, int]:
+    """
+    Function returns index and direction of fake coin by lookup of outcomes of all weightings.
+
+    Returns:
+        index: index of fake coin;
+        indicator: -1 if fake coin is lighter, 1 if it's heavier.
+    """
+    syndrome = int(getSyndrome(np.asarray(outcomes)[None])[0]) if len(outcomes) else 0
+    index = int(schedule.coins[syndrome])
+    if index == -1:
+        raise ValueError(f"Outcomes {list(outcomes)} are inconsistent with one fake coin")
+    return index, int(schedule.directions[syndrome])
+
+
+def staticAlgorithm(coinsNumber: int, weigh: Callable[[Sequence[int], Sequence[int]], int],
+                    fakeMode: int = FAKE_MODE_UNKNOWN,
+                    weighAll: Optional[Callable[[List[Tuple[np.ndarray, np.ndarray]]], Sequence[int]]] = None) -> \
+        Tuple[int, int]:
+    """
+    Non-adaptive algorithm: all weightings of schedule are done, then fake coin is found by lookup.
+
+    Args:
+        coinsNumber: number of coins
+        weigh: function which weighs two groups of coins, e.g. CoinsKeeper.balance or CoinsDetector.weighGroups
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        weighAll: function which weighs all groups at once, e.g. on several scales, weigh is used one by one if None
+    Returns:
+        index: index of fake coin;
+        indicator: -1 if fake coin is lighter, 1 if it's heavier.
+    """
+    schedule = getSchedule(coinsNumber, fakeMode)
+    groups = scheduleGroups(schedule)
+    outcomes = weighAll(groups) if weighAll is not None else [weigh(groupL, groupR) for groupL, groupR in groups]
+    return decodeOutcomes(schedule, outcomes)
+
+
+async def staticAlgorithmAsync(keeper, fakeMode: int = FAKE_MODE_UNKNOWN) -> Tuple[int, int]:
+    """
+    Function issues all weightings of schedule at once with AsyncCoinsKeeper, so they go to different scales.
+    """
+    import asyncio
+
+    schedule = getSchedule(keeper.coinsNumber, fakeMode)
+    outcomes = await asyncio.gather(*(keeper.balance(groupL, groupR) for groupL, groupR in scheduleGroups(schedule)))
+    return decodeOutcomes(schedule, outcomes)
+
+
+if __name__ == "__main__":
+    import asyncio
+    import time
+
+    from AsyncCoinsKeeper import LatencyCoinsKeeper
+    from AsyncCoinsDetector import solveAsync
+    from CoinsKeeper import CoinsKeeper
+    from WeightsIO import FAKE_MODE_LIGHTER
+
+    print("| coins | fake mode | weightings | build, s | decode, us |")
+    print("|------:|----------:|-----------:|---------:|-----------:|")
+    for coinsNumber in (12, 13, 39, 1000, 10 ** 5, 10 ** 6):
+        for fakeMode in (FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER):
+            t0 = time.perf_counter()
+            schedule = getSchedule(coinsNumber, fakeMode)
+            built = time.perf_counter() - t0
+            ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=int(fakeMode == FAKE_MODE_UNKNOWN),
+                             n_fake_l=int(fakeMode == FAKE_MODE_LIGHTER), seed=coinsNumber)
+            outcomes = [ck.balance(groupL, groupR) for groupL, groupR in scheduleGroups(schedule)]
+            t0 = time.perf_counter()
+            index, indicator = decodeOutcomes(schedule, outcomes)
+            decoded = time.perf_counter() - t0
+            assert ck.weights[index] != ck.weights[(index + 1) % coinsNumber]
+            print(f"| {coinsNumber} | {fakeMode} | {schedule.weighingsNumber} | {built:.3f} | {decoded * 1e6:.1f} |")
+
+    latency = 0.02
+    coinsNumber = 1000
+    ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=1, seed=0)
+    schedule = getSchedule(coinsNumber)
+    for name, solver in (("adaptive", lambda keeper: solveAsync(keeper)),
+                         ("static", lambda keeper: staticAlgorithmAsync(keeper))):
+        t0 = time.perf_counter()
+        result = asyncio.run(solver(LatencyCoinsKeeper(ck, scalesNumber=schedule.weighingsNumber, latency=latency)))
+        print(f"{name} on {schedule.weighingsNumber} scales with latency {latency} s: {result[:2]} "
+              f"in {time.perf_counter() - t0:.2f} s")
@@ -0,0 +1,276 @@
+import functools
+import os
+import zipfile
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+# offset of the right group, which means the nearest genuine coin outside of current range
+REFERENCE = -1
+# version of on-disk format of compiled strategies, it must be increased whenever format or plans are changed,
+# so files of other versions are compiled again instead of being read
+STRATEGY_CACHE_VERSION = 1
+
+
+class PlanWeighing(NamedTuple):
+    """
+    Weighting of compiled plan, offsets are relative to the first coin of current range.
+    """
+    leftOffset: int
+    leftLength: int
+    rightOffset: int
+    rightLength: int
+
+
+class PlanNode(NamedTuple):
+    """
+    Node of compiled plan for current range of given length.
+
+    Attributes:
+        weighings: independent weightings, which are done for current range
+        transitions: maps tuple of weightings results to (offset, length, direction) of the next range,
+            direction is -1 or 1 if weightings reveal it and None otherwise
+    """
+    weighings: Tuple[PlanWeighing, ...]
+    transitions: Dict[Tuple[int, ...], Tuple[int, int, Optional[int]]]
+
+
+class CompiledStrategy(NamedTuple):
+    """
+    Weighting strategy compiled for coins number and fake mode.
+    Splits of the algorithms depend only on length of current range, so the plan is a table of nodes
+    keyed by length, which has O(log N) entries.
+
+    Attributes:
+        coinsNumber: number of coins
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        nodes: plan nodes keyed by length of current range
+    """
+    coinsNumber: int
+    fakeMode: int
+    nodes: Dict[int, PlanNode]
+
+    @property
+    def initialDirection(self) -> Optional[int]:
+        if self.fakeMode == FAKE_MODE_LIGHTER:
+            return -1
+        if self.fakeMode == FAKE_MODE_HEAVIER:
+            return 1
+        return None
+
+
+def _partCaseNode(length: int, fakeCoinIsLighter: bool) -> PlanNode:
+    # the same split as in CoinsDetector.partCaseAlgorithm
+    b = 1 if length == 2 else length // 3
+    c = length - 2 * b
+
+    group1 = (0, b, None)
+    group2 = (b, b, None)
+    if fakeCoinIsLighter:
+        transitions = {(1,): group1, (-1,): group2}
+    else:
+        transitions = {(1,): group2, (-1,): group1}
+    if c > 0:
+        transitions[(0,)] = (2 * b, c, None)
+    return PlanNode((PlanWeighing(0, b, b, b),), transitions)
+
+
+def _genCaseNode(length: int) -> PlanNode:
+    if length == 2:
+        # the same comparisons as in two coins case of CoinsDetector.genCaseAlgorithm
+        transitions = {}
+        for managingItem0 in (-1, 0, 1):
+            for managingItem1 in (-1, 0, 1):
+                if managingItem1 == 0 and managingItem0 != 0:
+                    transitions[(managingItem0, managingItem1)] = (1, 1, managingItem0)
+                elif managingItem1 != 0:
+                    transitions[(managingItem0, managingItem1)] = (0, 1, -managingItem1)
+        return PlanNode((PlanWeighing(0, 1, 1, 1), PlanWeighing(0, 1, REFERENCE, 1)), transitions)
+
+    # the same split as in CoinsDetector.genCaseAlgorithm
+    if length == 3:
+        b = 1
+    elif length % 3 == 0:
+        b = length // 3 - 1
+    else:
+        b = length // 3
+    c = length - 3 * b
+
+    # the same decisions as in CoinsDetector.getFakeGroupGenCaseAlg
+    transitions = {}
+    for managingItem0 in (-1, 0, 1):
+        for managingItem1 in (-1, 0, 1):
+            if managingItem0 == 0 and managingItem1 == 0:
+                if c > 0:
+                    transitions[(0, 0)] = (3 * b, c, None)
+            elif managingItem0 == 0:
+                transitions[(managingItem0, managingItem1)] = (2 * b, b, managingItem1)
+            elif managingItem1 == 0:
+                transitions[(managingItem0, managingItem1)] = (b, b, managingItem0)
+            else:
+                transitions[(managingItem0, managingItem1)] = (0, b, -managingItem0)
+    return PlanNode((PlanWeighing(0, b, b, b), PlanWeighing(0, b, 2 * b, b)), transitions)
+
+
+def compileStrategy(coinsNumber: int, fakeMode: int) -> CompiledStrategy:
+    """
+    Function turns CoinsDetector.partCaseAlgorithm (for known direction) or CoinsDetector.genCaseAlgorithm
+    (for unknown one) into table of plan nodes for every range length, which can be reached from coinsNumber.
+
+    Args:
+        coinsNumber: number of coins
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+    """
+    if fakeMode == FAKE_MODE_UNKNOWN:
+        assert coinsNumber > 2, \
+            "Can't solver the problem for unknown fake coin weight relation and for 2 coins in total"
+
+    nodes = {}
+    lengths = [coinsNumber]
+    while lengths:
+        length = lengths.pop()
+        if length <= 1 or length in nodes:
+            continue
+        if fakeMode == FAKE_MODE_UNKNOWN:
+            node = _genCaseNode(length)
+        else:
+            node = _partCaseNode(length, fakeCoinIsLighter=fakeMode == FAKE_MODE_LIGHTER)
+        nodes[length] = node
+        lengths.extend(newLength for _, newLength, _ in node.transitions.values())
+
+    return CompiledStrategy(coinsNumber, fakeMode, nodes)
+
+
+@functools.lru_cache(maxsize=256)
+def getStrategy(coinsNumber: int, fakeMode: int, cacheDir: Optional[str] = None) -> CompiledStrategy:
+    """
+    Function returns compiled strategy from LRU cache of the process, then from on-disk cache
+    in cacheDir if it's set, and compiles it otherwise. Files of cache hold plain arrays and the version
+    of their format, files of other versions and unreadable ones are replaced by compiled strategy.
+
+    Args:
+        coinsNumber: number of coins
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        cacheDir: directory of persistent cache, strategies aren't stored on disk if it's None
+    """
+    if cacheDir is None:
+        return compileStrategy(coinsNumber, fakeMode)
+
+    path = os.path.join(cacheDir, f"strategy-v{STRATEGY_CACHE_VERSION}-{fakeMode}-{coinsNumber}.npz")
+    try:
+        strategy = _loadStrategy(path)
+        if strategy.coinsNumber == coinsNumber and strategy.fakeMode == fakeMode:
+            return strategy
+    except (OSError, EOFError, ValueError, KeyError, IndexError, zipfile.BadZipFile):
+        pass
+
+    strategy = compileStrategy(coinsNumber, fakeMode)
+    os.makedirs(cacheDir, exist_ok=True)
+    # file is replaced atomically, so concurrent processes never read half-written strategy
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath, "wb") as f:
+        _saveStrategy(strategy, f)
+    os.replace(tmpPath, path)
+    return strategy
+
+
+def _saveStrategy(strategy: CompiledStrategy, f):
+    """
+    Function writes compiled strategy as plain integer arrays of npz file, direction None is written as 0.
+    Every node of the strategy has the same number of weightings, which is 1 for known direction and 2 otherwise.
+    """
+    lengths = sorted(strategy.nodes)
+    weighingsNumber = 2 if strategy.fakeMode == FAKE_MODE_UNKNOWN else 1
+    weighings = np.array([strategy.nodes[length].weighings for length in lengths], dtype=np.int64)
+    # row of transition: index of node, results of weightings, offset, length and direction of the next range
+    transitions = np.array([(node, *outcomes, offset, newLength, direction or 0)
+                            for node, length in enumerate(lengths)
+                            for outcomes, (offset, newLength, direction) in strategy.nodes[length].transitions.items()],
+                           dtype=np.int64)
+    np.savez(f, version=np.int64(STRATEGY_CACHE_VERSION), coinsNumber=np.int64(strategy.coinsNumber),
+             fakeMode=np.int64(strategy.fakeMode), lengths=np.array(lengths, dtype=np.int64),
+             weighings=weighings.reshape(len(lengths), weighingsNumber, 4),
+             transitions=transitions.reshape(-1, weighingsNumber + 4))
+
+
+def _loadStrategy(path: str) -> CompiledStrategy:
+    """
+    Function reads compiled strategy written by _saveStrategy, ValueError is raised if file has other version.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if data["version"].shape != () or int(data["version"]) != STRATEGY_CACHE_VERSION:
+            raise ValueError(f"{path} has version {data['version']} instead of {STRATEGY_CACHE_VERSION}")
+        lengths = data["lengths"].tolist()
+        weighings = data["weighings"].tolist()
+        transitions = data["transitions"].tolist()
+        coinsNumber, fakeMode = int(data["coinsNumber"]), int(data["fakeMode"])
+
+    nodes = {length: PlanNode(tuple(PlanWeighing(*weighing) for weighing in nodeWeighings), {})
+             for length, nodeWeighings in zip(lengths, weighings)}
+    for node, *outcomes, offset, newLength, direction in transitions:
+        nodes[lengths[node]].transitions[tuple(outcomes)] = (offset, newLength, direction or None)
+    return CompiledStrategy(coinsNumber, fakeMode, nodes)
+
+
+def planGroups(weighing: PlanWeighing, start: int, length: int) -> Tuple[range, range]:
+    """
+    Function returns absolute groups of coins of plan weighting for current range.
+
+    Args:
+        weighing: plan weighting
+        start: index of the first coin of current range
+        length: length of current range
+    """
+    left = range(start + weighing.leftOffset, start + weighing.leftOffset + weighing.leftLength)
+    if weighing.rightOffset == REFERENCE:
+        # any coin outside of current range is genuine, the nearest one is taken
+        referenceIndex = start - 1 if start > 0 else start + length
+        right = range(referenceIndex, referenceIndex + weighing.rightLength)
+    else:
+        right = range(start + weighing.rightOffset, start + weighing.rightOffset + weighing.rightLength)
+    return left, right
+
+
+def executeStrategy(strategy: CompiledStrategy, weigh: Callable[[range, range], int]) -> Tuple[int, Optional[int]]:
+    """
+    Function executes compiled strategy: each step is a table lookup plus weightings.
+
+    Args:
+        strategy: compiled strategy
+        weigh: function which weighs two groups of coins, e.g. CoinsKeeper.balance or CoinsDetector.weighGroups
+    Returns:
+        index: index of fake coin;
+        indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown.
+    """
+    start, length, direction = 0, strategy.coinsNumber, strategy.initialDirection
+    while length > 1:
+        node = strategy.nodes[length]
+        outcomes = tuple(weigh(*planGroups(weighing, start, length)) for weighing in node.weighings)
+        offset, length, newDirection = node.transitions[outcomes]
+        start += offset
+        if newDirection is not None:
+            direction = newDirection
+    return start, direction
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsKeeper import CoinsKeeper
+
+    for coinsNumber in (10 ** 3, 10 ** 6, 10 ** 9):
+        for mode in (FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN):
+            t0 = time.perf_counter()
+            strategy = getStrategy(coinsNumber, mode)
+            compileElapsed = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            getStrategy(coinsNumber, mode)
+            cachedElapsed = time.perf_counter() - t0
+            print(f"fake mode {mode}, {coinsNumber} coins: {len(strategy.nodes)} nodes, "
+                  f"compiled in {compileElapsed:e} secs, cached lookup in {cachedElapsed:e} secs")
+
+    ck = CoinsKeeper(n_gen=10 ** 6 - 1, n_fake=1, seed=0)
+    print(executeStrategy(getStrategy(10 ** 6, FAKE_MODE_UNKNOWN), ck.balance))
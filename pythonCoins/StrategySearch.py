@@ -0,0 +1,388 @@
+import functools
+import math
+import os
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from OptimalSolver import CoinsCounts, StateWeighing
+
+OBJECTIVES = ("worst", "expected")
+# the largest coins number searched by CoinsDetector for each objective, time of search grows so unevenly
+# beyond it (seconds for 1200-2000 coins, minutes for 5000 coins, a minute for 80 coins with expected objective),
+# that larger instances are solved by OptimalSolver.planWeighing, which is optimal in the worst case too
+MAX_SEARCH_COINS = {"worst": 1000, "expected": 40}
+
+
+class SearchStats(NamedTuple):
+    """
+    Statistics of strategy search.
+
+    Attributes:
+        states: number of memoized states
+        hits: number of lookups answered from memo
+        misses: number of states which were evaluated
+        pruned: number of states and weightings cut off by information bound
+        seconds: time spent on search
+    """
+    states: int
+    hits: int
+    misses: int
+    pruned: int
+    seconds: float
+
+    @property
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return f"{self.states} states in {self.seconds:e} secs, {self.hits} hits, {self.misses} misses " \
+               f"(hit rate {self.hitRate:.1%}), {self.pruned} pruned"
+
+
+def hypothesesNumber(counts: CoinsCounts) -> int:
+    """
+    Function returns number of pairs (fake coin, direction) which are still possible:
+    two for each unknown coin and one for each suspected coin.
+    """
+    u, l, h, _ = counts
+    return 2 * u + l + h
+
+
+def worstLowerBound(hypotheses: int) -> int:
+    """
+    Function returns ternary information bound on number of weightings in the worst case, ceil(log3 hypotheses).
+    """
+    weighingsNumber = 0
+    while 3 ** weighingsNumber < hypotheses:
+        weighingsNumber += 1
+    return weighingsNumber
+
+
+def expectedLowerBound(hypotheses: int) -> float:
+    """
+    Function returns ternary information bound on expected number of weightings for equally likely hypotheses,
+    that is average depth of leaves in the most balanced ternary tree with given number of leaves.
+    """
+    if hypotheses <= 1:
+        return 0.0
+    depth = worstLowerBound(hypotheses) - 1
+    # leaves at depth are split until there are enough of them, each split adds two leaves
+    splits = -(-(hypotheses - 3 ** depth) // 2)
+    deeperLeaves = hypotheses - (3 ** depth - splits)
+    return (depth * hypotheses + deeperLeaves) / hypotheses
+
+
+def canonicalCounts(counts: CoinsCounts) -> Tuple[CoinsCounts, bool]:
+    """
+    Function returns counts, which are equivalent for search, and whether light and heavy coins were swapped.
+    Genuine coins beyond number of other coins are never needed, light and heavy coins are symmetric.
+    """
+    u, l, h, g = counts
+    g = min(g, u + l + h)
+    if h > l:
+        return (u, h, l, g), True
+    return (u, l, h, g), False
+
+
+def swapWeighing(weighing: StateWeighing) -> StateWeighing:
+    """
+    Function swaps light and heavy coins of weighting.
+    """
+    return StateWeighing(weighing.unknownL, weighing.heavyL, weighing.lightL,
+                         weighing.unknownR, weighing.heavyR, weighing.lightR)
+
+
+def weighingChildren(counts: CoinsCounts, weighing: StateWeighing) -> List[CoinsCounts]:
+    """
+    Function returns counts after each possible outcome of weighting: equal pans, heavier left pan and
+    heavier right pan. Outcomes, which leave no hypotheses, are impossible and are skipped.
+    """
+    u, l, h, g = counts
+    total = u + l + h + g
+    u1, l1, h1, u2, l2, h2 = weighing
+    weighed = u1 + l1 + h1 + u2 + l2 + h2
+
+    children = [(u - u1 - u2, l - l1 - l2, h - h1 - h2, g + weighed)]
+    # fake coin is either heavy coin on heavier pan or light coin on lighter pan
+    for lights, heavies in ((u2 + l2, u1 + h1), (u1 + l1, u2 + h2)):
+        children.append((0, lights, heavies, total - lights - heavies))
+    return [child for child in children if hypothesesNumber(child) > 0]
+
+
+def iterWeighings(counts: CoinsCounts, maxHypotheses: Optional[int] = None) -> Iterator[StateWeighing]:
+    """
+    Generator of weightings, after which every outcome has fewer hypotheses than counts and at most maxHypotheses.
+    Mirrored weightings aren't yielded. Unknown coins are present only until the first unequal weighting,
+    so they are never weighed together with suspected coins.
+
+    Args:
+        counts: numbers of unknown, light suspected, heavy suspected and genuine coins
+        maxHypotheses: bound on hypotheses of each outcome, it isn't bounded if it's None
+    """
+    u, l, h, g = counts
+    if u > 0:
+        limit = 2 * u - 1 if maxHypotheses is None else min(maxHypotheses, 2 * u - 1)
+        # m unknown coins are weighed, equal outcome leaves 2 * (u - m) hypotheses and other ones m hypotheses
+        for m in range(min(limit, u), max(u - limit // 2, 1) - 1, -1):
+            for u1 in range((m + 1) // 2, m + 1):
+                if 2 * u1 - m <= g:
+                    yield StateWeighing(u1, 0, 0, m - u1, 0, 0)
+        return
+
+    s = l + h
+    limit = s - 1 if maxHypotheses is None else min(maxHypotheses, s - 1)
+    # p suspected coins are weighed, a = h1 + l2 of them are left after heavier left pan,
+    # b = l1 + h2 of them are left after heavier right pan
+    for p in range(max(s - limit, 1), min(s, 2 * limit) + 1):
+        for a in range(max(p - limit, 0), min(p, limit) + 1):
+            b = p - a
+            for h1 in range(max(a - l, 0), min(a, h) + 1):
+                l2 = a - h1
+                for l1 in range(max(b - h + h1, 0), min(b, l - l2) + 1):
+                    h2 = b - l1
+                    left, right = l1 + h1, l2 + h2
+                    if abs(left - right) > g or (l1, h1) < (l2, h2):
+                        continue
+                    yield StateWeighing(0, l1, h1, 0, l2, h2)
+
+
+def _searchRootChunk(counts: CoinsCounts, weighings: List[StateWeighing], objective: str, depth: int) -> \
+        Tuple[Optional[StateWeighing], float, SearchStats]:
+    """
+    Function evaluates part of weightings of root state, it's executed in worker processes.
+    """
+    search = StrategySearch(objective)
+    if objective == "worst":
+        for weighing in weighings:
+            if search.isFeasibleWeighing(counts, weighing, depth - 1):
+                return weighing, depth, search.stats()
+        return None, math.inf, search.stats()
+
+    bestWeighing, bestValue = None, math.inf
+    for weighing in weighings:
+        value = search.weighingExpectation(counts, weighing, bestValue)
+        if value < bestValue:
+            bestWeighing, bestValue = weighing, value
+    return bestWeighing, bestValue, search.stats()
+
+
+class StrategySearch:
+    """
+    Class which computes optimal strategy by dynamic programming over counts of unknown, light suspected,
+    heavy suspected and genuine coins. States are memoized, states and weightings which can't beat
+    ternary information bound are pruned.
+
+    Objective 'worst' minimizes number of weightings in the worst case, objective 'expected' minimizes
+    expected number of weightings, when every pair (fake coin, direction) is equally likely.
+    The latter enumerates every weighting of each state, so it's meant for tens of coins.
+    """
+
+    def __init__(self, objective: str = "worst"):
+        """
+        Args:
+            objective: 'worst' or 'expected'
+        Raises:
+            ValueError: if objective is unknown
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown search objective: {objective}, expected one of {', '.join(OBJECTIVES)}")
+        self.objective = objective
+        # worst: canonical counts -> [the largest infeasible depth, the least feasible depth, weighting for it]
+        # expected: canonical counts -> (expected number of weightings, weighting)
+        self.memo: Dict[CoinsCounts, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+        self.seconds = 0.0
+
+    def stats(self) -> SearchStats:
+        return SearchStats(len(self.memo), self.hits, self.misses, self.pruned, self.seconds)
+
+    def mergeStats(self, stats: SearchStats):
+        """
+        Function adds statistics of search, which was done in another process.
+        """
+        self.hits += stats.hits
+        self.misses += stats.misses
+        self.pruned += stats.pruned
+
+    def isFeasible(self, counts: CoinsCounts, depth: int) -> bool:
+        """
+        Function returns whether fake coin can be found in depth weightings from counts.
+        """
+        counts, _ = canonicalCounts(counts)
+        hypotheses = hypothesesNumber(counts)
+        if hypotheses <= 1:
+            return True
+        if hypotheses > 3 ** depth:
+            self.pruned += 1
+            return False
+
+        entry = self.memo.get(counts)
+        if entry is not None and (depth <= entry[0] or depth >= entry[1]):
+            self.hits += 1
+            return depth >= entry[1]
+        self.misses += 1
+        if entry is None:
+            entry = self.memo[counts] = [-1, math.inf, None]
+
+        for weighing in iterWeighings(counts, 3 ** (depth - 1)):
+            if self.isFeasibleWeighing(counts, weighing, depth - 1):
+                entry[1], entry[2] = depth, weighing
+                return True
+        entry[0] = depth
+        return False
+
+    def isFeasibleWeighing(self, counts: CoinsCounts, weighing: StateWeighing, depth: int) -> bool:
+        """
+        Function returns whether fake coin can be found in depth weightings after each outcome of weighting.
+        """
+        return all(self.isFeasible(child, depth) for child in weighingChildren(counts, weighing))
+
+    def expectation(self, counts: CoinsCounts) -> float:
+        """
+        Function returns the least expected number of weightings from counts, inf if fake coin can't be found.
+        """
+        counts, _ = canonicalCounts(counts)
+        hypotheses = hypothesesNumber(counts)
+        if hypotheses <= 1:
+            return 0.0
+
+        entry = self.memo.get(counts)
+        if entry is not None:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+
+        bound = expectedLowerBound(hypotheses)
+        bestWeighing, bestValue = None, math.inf
+        for weighing in iterWeighings(counts):
+            value = self.weighingExpectation(counts, weighing, bestValue)
+            if value < bestValue:
+                bestWeighing, bestValue = weighing, value
+                if bestValue <= bound + 1e-12:
+                    break
+        self.memo[counts] = [bestValue, bestWeighing]
+        return bestValue
+
+    def weighingExpectation(self, counts: CoinsCounts, weighing: StateWeighing, cutoff: float = math.inf) -> float:
+        """
+        Function returns expected number of weightings, if weighting is done first,
+        or any value not less than cutoff if weighting can't beat it.
+        """
+        hypotheses = hypothesesNumber(counts)
+        children = weighingChildren(counts, weighing)
+        probabilities = [hypothesesNumber(child) / hypotheses for child in children]
+        if 1 + sum(p * expectedLowerBound(hypothesesNumber(child))
+                   for p, child in zip(probabilities, children)) >= cutoff:
+            self.pruned += 1
+            return math.inf
+        return 1 + sum(p * self.expectation(child) for p, child in zip(probabilities, children))
+
+    def search(self, counts: CoinsCounts, workers: int = 1) -> Tuple[float, Optional[StateWeighing]]:
+        """
+        Function finds optimal value and the first weighting for counts.
+        Weightings of root state can be evaluated across process pool, each worker has its own memo.
+
+        Args:
+            counts: numbers of unknown, light suspected, heavy suspected and genuine coins
+            workers: number of worker processes, 1 searches in current process
+        Returns:
+            value: the least number of weightings in the worst case or the least expected number of them,
+                inf if fake coin can't be found;
+            weighing: the first weighting, None if no weighting is needed or fake coin can't be found.
+        """
+        t0 = time.perf_counter()
+        key, swapped = canonicalCounts(counts)
+        hypotheses = hypothesesNumber(key)
+        value, weighing = (0, None) if hypotheses <= 1 else self._search(key, workers)
+        self.seconds += time.perf_counter() - t0
+
+        if swapped and weighing is not None:
+            weighing = swapWeighing(weighing)
+        return value, weighing
+
+    def _search(self, counts: CoinsCounts, workers: int) -> Tuple[float, Optional[StateWeighing]]:
+        hypotheses = hypothesesNumber(counts)
+        if self.objective == "expected":
+            if counts not in self.memo and workers > 1:
+                weighing, value = self._searchRoot(counts, list(iterWeighings(counts)), workers, 0)
+                self.memo[counts] = [value, weighing]
+            self.expectation(counts)
+            return tuple(self.memo[counts])
+
+        # iterative deepening from information bound, the deepest needed depth is at most a few more
+        for depth in range(worstLowerBound(hypotheses), 2 * hypotheses + 1):
+            entry = self.memo.get(counts)
+            if entry is not None and depth >= entry[1]:
+                self.hits += 1
+                return entry[1], entry[2]
+            if workers > 1 and (entry is None or depth > entry[0]):
+                weighing, _ = self._searchRoot(counts, list(iterWeighings(counts, 3 ** (depth - 1))), workers,
+                                               depth)
+                entry = self.memo.setdefault(counts, [-1, math.inf, None])
+                if weighing is None:
+                    entry[0] = depth
+                    continue
+                entry[1], entry[2] = depth, weighing
+                return depth, weighing
+            if self.isFeasible(counts, depth):
+                entry = self.memo[counts]
+                return entry[1], entry[2]
+        return math.inf, None
+
+    def _searchRoot(self, counts: CoinsCounts, weighings: List[StateWeighing], workers: int, depth: int) -> \
+            Tuple[Optional[StateWeighing], float]:
+        """
+        Function splits weightings of root state between worker processes and combines their results.
+        """
+        if not weighings:
+            return None, math.inf
+        # process pool is needed only for fan-out, so it isn't imported with the module
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksNumber = min(workers, len(weighings))
+        chunks = [weighings[i::chunksNumber] for i in range(chunksNumber)]
+
+        bestWeighing, bestValue = None, math.inf
+        with ProcessPoolExecutor(max_workers=chunksNumber) as executor:
+            futures = [executor.submit(_searchRootChunk, counts, chunk, self.objective, depth) for chunk in chunks]
+            for future in futures:
+                weighing, value, stats = future.result()
+                self.mergeStats(stats)
+                if weighing is not None and value < bestValue:
+                    bestWeighing, bestValue = weighing, value
+        return bestWeighing, bestValue
+
+    def planWeighing(self, counts: CoinsCounts, weighingsNumber: int = 0) -> Optional[StateWeighing]:
+        """
+        Planner for OptimalSolver.optimalAlgorithm, it chooses optimal weighting for counts
+        whatever number of weightings is left.
+        """
+        return self.search(counts)[1]
+
+
+@functools.lru_cache(maxsize=None)
+def getSearch(objective: str = "worst") -> StrategySearch:
+    """
+    Function returns search of the process for objective, so its memo is shared by all detectors.
+    """
+    return StrategySearch(objective)
+
+
+if __name__ == "__main__":
+    from OptimalSolver import minWeighingsNumber
+
+    workers = os.cpu_count() or 1
+    for coinsNumber in (3, 4, 12, 13, 39, 40, 120, 121, 363):
+        search = StrategySearch("worst")
+        worst, weighing = search.search((coinsNumber, 0, 0, 0))
+        print(f"{coinsNumber} coins, worst: {worst} weightings (bound {minWeighingsNumber(coinsNumber)}), "
+              f"first weighting {weighing}; {search.stats()}")
+
+    for coinsNumber in (3, 4, 6, 12, 13, 20):
+        search = StrategySearch("expected")
+        expected, weighing = search.search((coinsNumber, 0, 0, 0), workers=workers)
+        print(f"{coinsNumber} coins, expected: {expected:.4f} weightings, first weighting {weighing}; "
+              f"{search.stats()}")
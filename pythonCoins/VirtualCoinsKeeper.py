@@ -0,0 +1,160 @@
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from CoinsKeeper import CoinsKeeper, exactDot, isPlainRange
+from InstanceGenerator import Seed, getGenerator
+
+
+class VirtualWeights:
+    """
+    Read-only sequence of weights, which is computed on demand from genuine weight, fake weight and fake coin index.
+    Slices are materialized as numpy arrays, so only the requested part of weights takes memory.
+    """
+
+    def __init__(self, coinsNumber: int, genuineCoinWeight: int, fakeCoinWeight: int, fakeCoinIndex: int):
+        self.coinsNumber = coinsNumber
+        self.genuineCoinWeight = genuineCoinWeight
+        self.fakeCoinWeight = fakeCoinWeight
+        self.fakeCoinIndex = fakeCoinIndex
+
+    def __len__(self):
+        return self.coinsNumber
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.coinsNumber)
+            indices = range(start, stop, step)
+            weights = np.full(len(indices), self.genuineCoinWeight, dtype=np.int8)
+            if self.fakeCoinIndex in indices:
+                weights[indices.index(self.fakeCoinIndex)] = self.fakeCoinWeight
+            return weights
+
+        index = item + self.coinsNumber if item < 0 else item
+        if not 0 <= index < self.coinsNumber:
+            raise IndexError("coin index out of range")
+        return self.fakeCoinWeight if index == self.fakeCoinIndex else self.genuineCoinWeight
+
+    def __iter__(self):
+        for i in range(self.coinsNumber):
+            yield self[i]
+
+
+class VirtualCoinsKeeper(CoinsKeeper):
+    """
+    Implicit keeper of coins, which stores only genuine weight, fake weight and position of the only fake coin.
+    Groups of coins are weighed arithmetically from their sizes and whether they contain the fake coin,
+    so it takes O(1) memory for any coins number and is used to benchmark control logic of CoinsDetector.
+    """
+
+    # coded measurements need multiplicity of every coin, so only pan balance is simulated
+    hasScale = False
+
+    def __init__(self, n_gen: int = 9, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0,
+                 genuineCoinWeight: Optional[int] = None, fakeCoinWeight: Optional[int] = None,
+                 fakeCoinIndex: Optional[int] = None, seed: Seed = None):
+        '''
+        Args:
+            n_gen: number of genuine coins
+            n_fake: number of fake coins, which weights are unknown
+            n_fake_l: number of fake coins, which are lighter than genuine coins
+            n_fake_h: number of fake coins, which are heavier than genuine coins
+            genuineCoinWeight: weight of genuine coin, chosen randomly if it's None
+            fakeCoinWeight: weight of fake coin, chosen randomly if it's None
+            fakeCoinIndex: index of fake coin, chosen randomly if it's None
+            seed: seed or numpy random generator, which is used to choose random values reproducibly
+        '''
+        assert n_fake + n_fake_l + n_fake_h == 1, "Virtual keeper supports exactly one fake coin"
+
+        # values, which are None, are chosen by setRandomWeights, when keeper is initialized
+        self.genuineCoinWeight = genuineCoinWeight
+        self.fakeCoinWeight = fakeCoinWeight
+        self.fakeCoinIndex = fakeCoinIndex
+        super().__init__(n_gen, n_fake, n_fake_l, n_fake_h, seed=seed)
+
+    @property
+    def weights(self) -> VirtualWeights:
+        """
+        Weights of coins as lazy read-only sequence.
+        """
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: VirtualWeights):
+        self._weights = weights
+        self._prefixSums = None
+        self.weightsVersion += 1
+
+    def setRandomWeights(self):
+        """
+        Function chooses weights of genuine and fake coins and index of fake coin, which aren't given, randomly
+        and sets virtual weights of them, it takes constant time and memory.
+        """
+        if self.genuineCoinWeight is None or self.fakeCoinWeight is None:
+            randomGenuineWeight, randomFakeWeight = self.chooseRandomWeights()
+            if self.genuineCoinWeight is None:
+                self.genuineCoinWeight = randomGenuineWeight
+            if self.fakeCoinWeight is None:
+                self.fakeCoinWeight = randomFakeWeight
+
+        coinsNumber = self.n_gen + 1
+        if self.fakeCoinIndex is None:
+            self.fakeCoinIndex = int(self.rng.integers(coinsNumber))
+        self.weights = VirtualWeights(coinsNumber, self.genuineCoinWeight, self.fakeCoinWeight, self.fakeCoinIndex)
+
+    def rangeWeight(self, start: int, stop: int) -> int:
+        """
+        Function returns total weight of contiguous group of coins from its size and whether it contains the fake
+        coin in constant time, bounds must be within coins as in CoinsKeeper.rangeWeight.
+        """
+        if not 0 <= start <= stop <= len(self._weights):
+            raise IndexError(f"Range [{start}, {stop}) is out of {len(self._weights)} coins")
+        weight = (stop - start) * self.genuineCoinWeight
+        if start <= self.fakeCoinIndex < stop:
+            weight += self.fakeCoinWeight - self.genuineCoinWeight
+        return weight
+
+    def groupWeight(self, indices: Union[range, Sequence[int]]) -> int:
+        """
+        Function returns total weight of group of coins from its size and how many times it contains the fake coin;
+        it takes constant time for ranges with step 1 and linear time for other sequences of indices.
+
+        Args:
+            indices: coins indices
+        """
+        if isPlainRange(indices):
+            if len(indices) == 0:
+                return 0
+            return self.rangeWeight(indices.start, indices.stop)
+        return self.weigh(indices, np.ones(len(indices), dtype=np.int64))
+
+    def weigh(self, indices: Union[range, Sequence[int]], multiplicities: Optional[Sequence[int]] = None) -> int:
+        """
+        Function returns total mass of coins, each coin is taken as many times as its multiplicity says,
+        negative indices count coins from the end, as in CoinsKeeper.weigh.
+        """
+        if multiplicities is None:
+            return self.groupWeight(indices)
+        indices = np.asarray(indices, dtype=np.int64)
+        multiplicities = np.asarray(multiplicities, dtype=np.int64)
+        coinsNumber = len(self._weights)
+        if len(indices) and not (-coinsNumber <= indices.min() and indices.max() < coinsNumber):
+            raise IndexError(f"Coin index is out of {coinsNumber} coins")
+        fakeTaken = int(multiplicities[indices % coinsNumber == self.fakeCoinIndex].sum())
+        return exactDot(multiplicities) * self.genuineCoinWeight + \
+            fakeTaken * (self.fakeCoinWeight - self.genuineCoinWeight)
+
+
+if __name__ == "__main__":
+    import time
+
+    from CoinsDetector import solve
+
+    for coinsNumber in (10 ** 3, 10 ** 6, 10 ** 9, 10 ** 12):
+        for counts in ({"n_fake_l": 1, "n_fake": 0}, {"n_fake_h": 1, "n_fake": 0}, {"n_fake": 1}):
+            vck = VirtualCoinsKeeper(n_gen=coinsNumber - 1, **counts)
+            t0 = time.perf_counter()
+            fakeCoinIndex, fakeCoinWeightIndex, weightingCount = solve(vck)
+            elapsed = time.perf_counter() - t0
+            found = fakeCoinIndex == vck.fakeCoinIndex
+            print(f"N={coinsNumber:.0e} {counts}: {weightingCount} weightings, {elapsed * 1e6:.0f} us, {found=}")
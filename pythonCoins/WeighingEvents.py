@@ -0,0 +1,156 @@
+import sys
+from enum import IntEnum
+from typing import Iterable, NamedTuple, Optional, Sequence, TextIO, Union
+
+
+class Verbosity(IntEnum):
+    """
+    Levels of output produced by CoinsDetector:
+
+    SILENT: nothing is printed;
+
+    SUMMARY: only expected and actual number of weightings and the found fake coin are printed;
+
+    WINDOWED: each weighting is printed as ranges of weighted groups;
+
+    FULL: each weighting is printed with all coins indices, as it was done originally.
+    """
+    SILENT = 0
+    SUMMARY = 1
+    WINDOWED = 2
+    FULL = 3
+
+
+class WeighingEvent(NamedTuple):
+    """
+    Structured description of one weighting, which doesn't hold anything but references to groups.
+
+    Attributes:
+        number: ordinal number of weighting, starting from 1
+        groupL: group of coins indices on the left pan
+        groupR: group of coins indices on the right pan
+        managingItem: result of weighting, the same as result of CoinsKeeper.balance
+    """
+    number: int
+    groupL: Union[range, Sequence[int]]
+    groupR: Union[range, Sequence[int]]
+    managingItem: int
+
+
+def formatGroup(group: Union[range, Sequence[int]]) -> str:
+    """
+    Function formats group of coins indices as collapsed range '[start..last]' if it's possible.
+
+    Args:
+        group: group of coins indices
+    """
+    if isinstance(group, range) and group.step == 1:
+        if len(group) == 0:
+            return "[]"
+        if len(group) == 1:
+            return f"[{group.start}]"
+        return f"[{group.start}..{group.stop - 1}]"
+    return str([int(index) for index in group])
+
+
+class WeighingRenderer:
+    """
+    Class which renders weighting events according to verbosity level.
+    Events are formatted only when they are rendered, so nothing is formatted in silent mode.
+    """
+
+    def __init__(self, coinsNumber: int, verbosity: Verbosity = Verbosity.FULL, out: Optional[TextIO] = None):
+        """
+        Args:
+            coinsNumber: total number of coins
+            verbosity: level of output
+            out: stream where events are written, sys.stdout by default
+        """
+        self.coinsNumber = coinsNumber
+        self.verbosity = verbosity
+        self.out = out
+
+    def write(self, *args, **kwargs):
+        print(*args, file=self.out if self.out is not None else sys.stdout, **kwargs)
+
+    def render(self, event: WeighingEvent):
+        """
+        Renders one weighting event.
+
+        Args:
+            event: weighting event
+        """
+        if self.verbosity >= Verbosity.FULL:
+            self.renderFull(event)
+        elif self.verbosity >= Verbosity.WINDOWED:
+            self.renderWindowed(event)
+
+    def renderAll(self, events: Iterable[WeighingEvent]):
+        """
+        Renders events one by one, events can be produced lazily.
+
+        Args:
+            events: iterable of weighting events
+        """
+        for event in events:
+            self.render(event)
+
+    def renderWindowed(self, event: WeighingEvent):
+        """
+        Renders weighting event only with ranges of weighted groups, independently of coins number.
+        """
+        groupL = formatGroup(event.groupL)
+        groupR = formatGroup(event.groupR)
+        if event.managingItem == 1:
+            relation = "<"
+        elif event.managingItem == -1:
+            relation = ">"
+        else:
+            relation = "="
+        self.write(f"Weighting {event.number}: {groupL} {relation} {groupR}")
+
+    def renderFull(self, event: WeighingEvent):
+        """
+        Renders weighting event with all coins indices, weighted groups are highlighted.
+        """
+        # colorama is needed only for this view, so it isn't imported with the module
+        from colorama import Fore, Style
+
+        # groups may be ranges, lists or numpy arrays of indices
+        groupL = [int(index) for index in event.groupL]
+        groupR = [int(index) for index in event.groupR]
+
+        self.write("Weighting---------------")
+        indecesStr = list(map(str, range(self.coinsNumber)))
+
+        for group in (groupL, groupR):
+            if not group:
+                # empty pan, nothing is highlighted
+                continue
+            if group[-1] - group[0] + 1 == len(group):
+                indecesStr[group[0]] = f"({Fore.GREEN}" + indecesStr[group[0]]
+                indecesStr[group[-1]] = indecesStr[group[-1]] + f"{Style.RESET_ALL})"
+            else:
+                # group isn't contiguous, so each its coin is highlighted
+                for index in group:
+                    indecesStr[index] = f"({Fore.GREEN}{indecesStr[index]}{Style.RESET_ALL})"
+
+        formattedStr = ", ".join(indecesStr)
+
+        self.write(f"Indices of coins: {formattedStr}\n")
+        if event.managingItem == 1:
+            self.write(f"{groupL} < {groupR}\nLeft group is lighter than right group")
+        elif event.managingItem == -1:
+            self.write(f"{groupL} > {groupR}\nLeft group is heavier than right group")
+        else:
+            self.write(f"{groupL} = {groupR}\nLeft group is equal to right group by weight")
+        self.write("------------------------\n")
+
+    def renderRound(self, currIndices: Union[range, Sequence[int]]):
+        """
+        Renders group of coins which still contains a fake coin.
+        """
+        if self.verbosity >= Verbosity.FULL:
+            self.write(f"current indices = {list(currIndices)}")
+        elif self.verbosity >= Verbosity.WINDOWED:
+            self.write(f"current indices = {formatGroup(currIndices)}")
@@ -0,0 +1,228 @@
+from typing import Callable, Generator, List, NamedTuple, Optional, Tuple
+
+from StrategyCompiler import CompiledStrategy, getStrategy, planGroups
+from WeightsIO import FAKE_MODE_UNKNOWN
+
+
+class WeighingRequest(NamedTuple):
+    """
+    Request to weigh two groups of coins, its outcome is the same as result of CoinsKeeper.balance.
+    """
+    groupL: range
+    groupR: range
+
+
+class SessionState(NamedTuple):
+    """
+    Complete state of weighing session, it consists of integers only, so it can be pickled or dumped to JSON.
+
+    Attributes:
+        coinsNumber: number of coins
+        fakeMode: one of WeightsIO.FAKE_MODE_* values
+        start: index of the first coin of current range
+        length: length of current range
+        direction: -1 if fake coin is lighter, 1 if it's heavier, 0 if it's unknown yet
+        outcomes: outcomes of weightings of current round
+        weightingCount: number of weightings done so far
+    """
+    coinsNumber: int
+    fakeMode: int
+    start: int
+    length: int
+    direction: int
+    outcomes: Tuple[int, ...]
+    weightingCount: int
+
+
+class WeighingSession:
+    """
+    Sans-IO state machine of solving: it yields weighing requests and accepts their outcomes, but never weighs coins.
+    Weightings are taken from compiled plan of StrategyCompiler, so splits are the same as in
+    CoinsDetector.partCaseAlgorithm for known direction and CoinsDetector.genCaseAlgorithm for unknown one.
+    Plan is shared by all sessions with the same coins number and fake mode, so each session holds
+    a few integers and one thread can drive many of them in any order.
+    """
+
+    __slots__ = ("strategy", "start", "length", "direction", "outcomes", "weightingCount")
+
+    def __init__(self, coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN, strategyCacheDir: Optional[str] = None):
+        """
+        Args:
+            coinsNumber: number of coins
+            fakeMode: one of WeightsIO.FAKE_MODE_* values
+            strategyCacheDir: directory of on-disk cache of compiled plans, see StrategyCompiler.getStrategy
+        """
+        self.strategy: CompiledStrategy = getStrategy(coinsNumber, fakeMode, strategyCacheDir)
+        self.start = 0
+        self.length = coinsNumber
+        self.direction = self.strategy.initialDirection
+        self.outcomes: Tuple[int, ...] = ()
+        self.weightingCount = 0
+
+    @property
+    def done(self) -> bool:
+        return self.length <= 1
+
+    @property
+    def result(self) -> Tuple[int, Optional[int]]:
+        """
+        index of fake coin and indicator: -1 if fake coin is lighter, 1 if it's heavier, None if it's unknown.
+        """
+        assert self.done, "Session isn't finished yet"
+        return self.start, self.direction
+
+    def nextRequest(self) -> Optional[WeighingRequest]:
+        """
+        Function returns the next weighing request, None if fake coin is found.
+        The same request is returned until its outcome is sent.
+        """
+        if self.done:
+            return None
+        weighing = self.strategy.nodes[self.length].weighings[len(self.outcomes)]
+        return WeighingRequest(*planGroups(weighing, self.start, self.length))
+
+    def roundRequests(self) -> List[WeighingRequest]:
+        """
+        Function returns all requests of current round, which aren't answered yet. They don't depend on outcomes
+        of each other (e.g. group0 vs group1 and group0 vs group2 of genCase), so they can be weighed at once
+        on different scales, outcomes are sent in the same order.
+        """
+        if self.done:
+            return []
+        weighings = self.strategy.nodes[self.length].weighings[len(self.outcomes):]
+        return [WeighingRequest(*planGroups(weighing, self.start, self.length)) for weighing in weighings]
+
+    def send(self, managingItem: int):
+        """
+        Function accepts outcome of the current request and advances the session.
+
+        Args:
+            managingItem: result of weighting, the same as result of CoinsKeeper.balance
+        """
+        assert not self.done, "Session is already finished"
+        if managingItem not in (-1, 0, 1):
+            raise ValueError(f"Outcome of weighting must be -1, 0 or 1, not {managingItem!r}")
+        node = self.strategy.nodes[self.length]
+        # state is changed only after outcomes are accepted, so session can be retried after error
+        outcomes = self.outcomes + (int(managingItem),)
+        if len(outcomes) < len(node.weighings):
+            self.outcomes = outcomes
+            self.weightingCount += 1
+            return
+
+        try:
+            offset, length, newDirection = node.transitions[outcomes]
+        except KeyError:
+            raise ValueError(f"Outcomes {outcomes} are inconsistent with one fake coin") from None
+        self.start += offset
+        self.length = length
+        self.outcomes = ()
+        self.weightingCount += 1
+        if newDirection is not None:
+            self.direction = newDirection
+
+    def getState(self) -> SessionState:
+        """
+        Function returns checkpoint of session.
+        """
+        return SessionState(self.strategy.coinsNumber, self.strategy.fakeMode, self.start, self.length,
+                            self.direction or 0, self.outcomes, self.weightingCount)
+
+    @classmethod
+    def fromState(cls, state: SessionState, strategyCacheDir: Optional[str] = None) -> "WeighingSession":
+        """
+        Function restores session from checkpoint, which is returned by getState.
+
+        Args:
+            state: checkpoint of session, SessionState or sequence of its fields, e.g. loaded from JSON
+            strategyCacheDir: directory of on-disk cache of compiled plans
+        """
+        state = SessionState(*state)
+        session = cls(state.coinsNumber, state.fakeMode, strategyCacheDir)
+        session.start = state.start
+        session.length = state.length
+        session.direction = state.direction or None
+        session.outcomes = tuple(state.outcomes)
+        session.weightingCount = state.weightingCount
+        return session
+
+    def __reduce__(self):
+        # only the state is pickled, plan is taken from cache of the process, which unpickles the session
+        return WeighingSession.fromState, (tuple(self.getState()),)
+
+
+def solveSteps(coinsNumber: int, fakeMode: int = FAKE_MODE_UNKNOWN) -> \
+        Generator[WeighingRequest, int, Tuple[int, Optional[int]]]:
+    """
+    Generator form of WeighingSession: it yields weighing requests, accepts outcomes with send method
+    and returns index of fake coin and indicator of its direction.
+
+    Example:
+        steps = solveSteps(100)
+        request = next(steps)
+        try:
+            while True:
+                request = steps.send(ck.balance(*request))
+        except StopIteration as stop:
+            index, indicator = stop.value
+    """
+    session = WeighingSession(coinsNumber, fakeMode)
+    while not session.done:
+        session.send((yield session.nextRequest()))
+    return session.result
+
+
+def runSession(session: WeighingSession, weigh: Callable[[range, range], int]) -> Tuple[int, Optional[int]]:
+    """
+    Function drives session synchronously with weigh function, e.g. CoinsKeeper.balance.
+    """
+    request = session.nextRequest()
+    while request is not None:
+        session.send(weigh(*request))
+        request = session.nextRequest()
+    return session.result
+
+
+if __name__ == "__main__":
+    import pickle
+    import time
+
+    import numpy as np
+
+    from InstanceGenerator import generateInstances
+    from LockstepSolver import getPrefixSums
+
+    sessionsNumber = 50000
+    coinsNumber = 1000
+    batch = generateInstances(sessionsNumber, coinsNumber, fakeMode=FAKE_MODE_UNKNOWN, seed=0)
+    prefixSums = getPrefixSums(batch.weights)
+
+    def balance(instance: int, request: WeighingRequest) -> int:
+        sums = prefixSums[instance]
+        leftWeight = sums[request.groupL.stop] - sums[request.groupL.start]
+        rightWeight = sums[request.groupR.stop] - sums[request.groupR.start]
+        return int(rightWeight > leftWeight) - int(rightWeight < leftWeight)
+
+    t0 = time.perf_counter()
+    sessions = [WeighingSession(coinsNumber) for _ in range(sessionsNumber)]
+    active = list(range(sessionsNumber))
+    rounds = 0
+    while active:
+        # one request of each session is served per round, so all sessions are in flight at once
+        for instance in active:
+            sessions[instance].send(balance(instance, sessions[instance].nextRequest()))
+        active = [instance for instance in active if not sessions[instance].done]
+        rounds += 1
+
+        if rounds == 3:
+            # checkpoint all sessions in the middle of solving and continue from restored ones
+            checkpoint = pickle.dumps(sessions)
+            sessions = pickle.loads(checkpoint)
+            print(f"checkpoint of {sessionsNumber} sessions: {len(checkpoint) / sessionsNumber:.1f} bytes/session")
+    elapsed = time.perf_counter() - t0
+
+    fakeIndices = np.array([session.result[0] for session in sessions])
+    stepsNumber = sum(session.weightingCount for session in sessions)
+    print(f"{sessionsNumber} interleaved sessions of {coinsNumber} coins solved in {elapsed:.2f} secs, "
+          f"{rounds} rounds, {stepsNumber / elapsed:.0f} steps/s, "
+          f"accuracy {np.mean(fakeIndices == batch.fakeIndices):.4f}")
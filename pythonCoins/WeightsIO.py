@@ -0,0 +1,387 @@
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# comma, semicolon and whitespace variants are all treated as separators of weights
+_SEPARATORS = bytes.maketrans(b",;\t\r\n\v\f", b"       ")
+# commas and semicolons delimit fields, so there must be a weight between two of them
+_DELIMITERS = b",;"
+_WHITESPACE = b" \t\r\n\v\f"
+
+# binary weights file: header followed by packed little-endian int8 or int16 weights
+BIN_MAGIC = b"CNWT"
+BIN_VERSION = 1
+# magic, version, item size in bytes, fake mode, padding, n_gen, n_fake, n_fake_l, n_fake_h
+BIN_HEADER = struct.Struct("<4sBBBxQQQQ")
+BIN_DTYPES = {1: np.dtype("<i1"), 2: np.dtype("<i2")}
+
+FAKE_MODE_UNKNOWN = 0
+FAKE_MODE_LIGHTER = 1
+FAKE_MODE_HEAVIER = 2
+
+
+class WeightsLoadStats(NamedTuple):
+    """
+    Statistics of loading weights from file.
+
+    Attributes:
+        coins: number of loaded weights
+        bytes: size of file in bytes
+        seconds: time spent on loading
+    """
+    coins: int
+    bytes: int
+    seconds: float
+
+    @property
+    def megabytesPerSecond(self) -> float:
+        return self.bytes / 2 ** 20 / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def coinsPerSecond(self) -> float:
+        return self.coins / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.coins} weights ({self.bytes} bytes) in {self.seconds:e} secs, " \
+               f"{self.megabytesPerSecond:.1f} MB/s, {self.coinsPerSecond:.0f} coins/s"
+
+
+def compactDtype(minValue: int, maxValue: int) -> np.dtype:
+    """
+    Function returns the smallest signed integer dtype which can hold values from minValue to maxValue.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= minValue and maxValue <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _checkFields(filename: str, text: bytes, chunk: bytes, offset: int, afterDelimiter: Optional[bool],
+                 atEnd: bool) -> Tuple[int, Optional[bool]]:
+    """
+    Function checks that no field of chunk of text file is empty and returns number of weights in chunk.
+
+    Args:
+        filename: file name for error messages
+        text: chunk of file
+        chunk: the same chunk, where all separators are translated to spaces
+        offset: position of chunk in file
+        afterDelimiter: whether the last non-whitespace byte before chunk is delimiter, None at start of file
+        atEnd: whether chunk is the last one
+    Returns:
+        tokensNumber: number of weights in chunk
+        afterDelimiter: whether the last non-whitespace byte till the end of chunk is delimiter
+    """
+    opened = afterDelimiter is not False
+    codes = np.frombuffer(text, dtype=np.uint8)
+    isToken = np.frombuffer(chunk, dtype=np.uint8) != ord(" ")
+    tokensNumber = int(isToken[0]) + int(np.count_nonzero(isToken[1:] > isToken[:-1]))
+    isDelimiter = (codes == _DELIMITERS[0]) | (codes == _DELIMITERS[1])
+
+    # usually weight is right before each delimiter, otherwise fields are checked by non-whitespace bytes
+    if (isDelimiter[0] and opened) or (isDelimiter[1:] & ~isToken[:-1]).any():
+        marks = np.flatnonzero(isToken | isDelimiter)
+        markIsDelimiter = isDelimiter[marks]
+        # delimiter right after another one or at start of file closes empty field
+        empty = np.flatnonzero(markIsDelimiter & np.concatenate(([opened], markIsDelimiter[:-1])))
+        if len(empty):
+            raise ValueError(f"File {filename} contains empty weight at byte {offset + int(marks[empty[0]])}")
+
+    stripped = text.rstrip(_WHITESPACE)
+    if stripped:
+        afterDelimiter = stripped[-1] in _DELIMITERS
+    if atEnd and afterDelimiter:
+        raise ValueError(f"File {filename} contains empty weight after the last delimiter")
+    return tokensNumber, afterDelimiter
+
+
+def _badTokenError(filename: str, chunk: bytes, offset: int) -> ValueError:
+    """
+    Function returns error with the first token of translated chunk, which isn't integer weight.
+    """
+    isToken = np.frombuffer(chunk, dtype=np.uint8) != ord(" ")
+    for start in np.flatnonzero(isToken & ~np.concatenate(([False], isToken[:-1]))).tolist():
+        stop = chunk.find(b" ", start)
+        token = chunk[start: stop if stop >= 0 else len(chunk)]
+        try:
+            value = int(token)
+        except ValueError:
+            return ValueError(f"File {filename} contains non integer weight {token[:32]!r} at byte {offset + start}")
+        if not np.iinfo(np.int64).min < value < np.iinfo(np.int64).max:
+            return ValueError(f"File {filename} contains too large weight at byte {offset + start}")
+    return ValueError(f"File {filename} contains non integer weights in bytes from {offset} "
+                      f"to {offset + len(chunk)}")
+
+
+def iterTxtWeightsChunks(filename: str, chunkSize: int = 1 << 22) -> Iterator[np.ndarray]:
+    """
+    Generator which reads weights from text file in chunks of about chunkSize bytes through mmap.
+    Weights are integers separated with commas, semicolons, spaces or new lines in any combination.
+    Each chunk is cut after the last separator in it, so no number is split between chunks.
+    Empty fields, e.g. '5,,6', and tokens, which aren't integers, raise ValueError with their offset in file.
+
+    Args:
+        filename: file name
+        chunkSize: number of bytes parsed at once
+    Yields:
+        numpy array with weights of the chunk in compact dtype
+    """
+    with open(filename, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            currChunkSize = chunkSize
+            afterDelimiter = None
+            while pos < size:
+                end = min(pos + currChunkSize, size)
+                text = mm[pos:end]
+                chunk = text.translate(_SEPARATORS)
+                if end < size:
+                    cut = chunk.rfind(b" ")
+                    if cut <= 0:
+                        # a single number is longer than chunk, chunk is enlarged
+                        currChunkSize *= 2
+                        continue
+                    text, chunk = text[:cut], chunk[:cut]
+                    end = pos + cut
+                offset, pos = pos, end
+                currChunkSize = chunkSize
+
+                tokensNumber, afterDelimiter = _checkFields(filename, text, chunk, offset, afterDelimiter,
+                                                            atEnd=pos == size)
+                if tokensNumber == 0:
+                    continue
+                try:
+                    weights = np.fromstring(chunk, dtype=np.int64, sep=" ")
+                except ValueError:
+                    raise _badTokenError(filename, chunk, offset) from None
+                if len(weights) != tokensNumber or weights.min() == np.iinfo(np.int64).min or \
+                        weights.max() == np.iinfo(np.int64).max:
+                    raise _badTokenError(filename, chunk, offset)
+                yield weights.astype(compactDtype(int(weights.min()), int(weights.max())))
+
+
+def loadTxtWeights(filename: str, chunkSize: int = 1 << 22) -> Tuple[np.ndarray, WeightsLoadStats]:
+    """
+    Function reads weights from text file chunk by chunk straight into compact numpy array,
+    without keeping the whole text or a list of python integers in memory. Chunks are copied into one buffer,
+    which is allocated for the largest possible number of weights in file and is trimmed in place at the end,
+    pages of buffer are taken by operating system only when weights are written there.
+    Buffer is copied only when weight, which doesn't fit into its dtype, is met.
+
+    Args:
+        filename: file name
+        chunkSize: number of bytes parsed at once
+    Returns:
+        weights: numpy array of weights
+        stats: statistics of loading with parse throughput
+    """
+    t0 = time.perf_counter()
+    size = os.path.getsize(filename)
+    # every weight except the last one is followed by separator
+    weights = np.empty(size // 2 + 1, dtype=np.int8)
+    coinsNumber = 0
+    for chunk in iterTxtWeightsChunks(filename, chunkSize):
+        if chunk.dtype.itemsize > weights.itemsize:
+            widened = np.empty(len(weights), dtype=chunk.dtype)
+            widened[:coinsNumber] = weights[:coinsNumber]
+            weights = widened
+        weights[coinsNumber: coinsNumber + len(chunk)] = chunk
+        coinsNumber += len(chunk)
+    weights.resize(coinsNumber, refcheck=False)
+    stats = WeightsLoadStats(coins=coinsNumber, bytes=size, seconds=time.perf_counter() - t0)
+    return weights, stats
+
+
+def saveTxtWeights(filename: str, weights, lineSize: Optional[int] = None, chunkSize: int = 1 << 20):
+    """
+    Function writes weights to text file separated with comas, as in 'coinsWeightsFile.txt'.
+
+    Args:
+        filename: file name
+        weights: weights of coins
+        lineSize: if it's set, weights are written in lines of lineSize weights, otherwise in one line
+        chunkSize: number of weights formatted at once
+    """
+    weights = np.asarray(weights)
+    with open(filename, "w") as f:
+        if lineSize is not None:
+            for start in range(0, len(weights), lineSize):
+                f.write(",".join(map(str, weights[start: start + lineSize].tolist())) + "\n")
+            return
+
+        for start in range(0, len(weights), chunkSize):
+            f.write(("," if start else "") + ",".join(map(str, weights[start: start + chunkSize].tolist())))
+        f.write("\n")
+
+
+def getFakeMode(n_fake: int, n_fake_l: int, n_fake_h: int) -> int:
+    """
+    Function returns fake mode stored in binary weights file according to numbers of fake coins.
+    """
+    if n_fake_l >= 1:
+        return FAKE_MODE_LIGHTER
+    if n_fake_h >= 1:
+        return FAKE_MODE_HEAVIER
+    return FAKE_MODE_UNKNOWN
+
+
+def _binItemSize(minValue: int, maxValue: int) -> int:
+    dtype = compactDtype(minValue, maxValue)
+    if dtype.itemsize > 2:
+        raise ValueError(f"Weights from {minValue} to {maxValue} don't fit into binary weights file")
+    return dtype.itemsize
+
+
+def _writeBinHeader(f, itemSize: int, n_gen: int, n_fake: int, n_fake_l: int, n_fake_h: int):
+    f.write(BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION, itemSize, getFakeMode(n_fake, n_fake_l, n_fake_h),
+                            n_gen, n_fake, n_fake_l, n_fake_h))
+
+
+def saveBinWeights(filename: str, weights, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0):
+    """
+    Function writes weights to binary weights file: header with numbers of coins and fake mode,
+    followed by packed int8 or int16 array of weights.
+
+    Args:
+        filename: file name
+        weights: weights of coins
+        n_fake: number of fake coins, which weights are unknown
+        n_fake_l: number of fake coins, which are lighter than genuine coins
+        n_fake_h: number of fake coins, which are heavier than genuine coins
+    """
+    weights = np.asarray(weights)
+    itemSize = _binItemSize(int(weights.min()), int(weights.max())) if len(weights) else 1
+    n_gen = len(weights) - n_fake - n_fake_l - n_fake_h
+    with open(filename, "wb") as f:
+        _writeBinHeader(f, itemSize, n_gen, n_fake, n_fake_l, n_fake_h)
+        f.write(weights.astype(BIN_DTYPES[itemSize], copy=False).tobytes())
+
+
+def loadBinWeights(filename: str) -> Tuple[np.ndarray, Dict[str, int], WeightsLoadStats]:
+    """
+    Function opens binary weights file with mmap and returns read-only numpy array, which uses mapped file
+    as its buffer, so nothing is copied or parsed and loading time doesn't depend on coins number.
+
+    Args:
+        filename: file name
+    Returns:
+        weights: numpy array of weights backed by the file
+        coinsState: numbers of coins from the header, as returned by CoinsKeeper.getCoinsState
+        stats: statistics of loading
+    """
+    t0 = time.perf_counter()
+    with open(filename, "rb") as f:
+        header = f.read(BIN_HEADER.size)
+        if len(header) < BIN_HEADER.size:
+            raise ValueError(f"File {filename} is too short for binary weights file")
+        magic, version, itemSize, fakeMode, n_gen, n_fake, n_fake_l, n_fake_h = BIN_HEADER.unpack(header)
+        if magic != BIN_MAGIC or version != BIN_VERSION or itemSize not in BIN_DTYPES:
+            raise ValueError(f"File {filename} isn't binary weights file of version {BIN_VERSION}")
+
+        coinsNumber = n_gen + n_fake + n_fake_l + n_fake_h
+        size = os.fstat(f.fileno()).st_size
+        if size < BIN_HEADER.size + coinsNumber * itemSize:
+            raise ValueError(f"File {filename} is truncated")
+
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # array keeps a reference to mmap, so it stays open while weights are used
+    weights = np.frombuffer(mm, dtype=BIN_DTYPES[itemSize], count=coinsNumber, offset=BIN_HEADER.size)
+
+    coinsState = {"n_gen": n_gen, "n_fake": n_fake, "n_fake_l": n_fake_l, "n_fake_h": n_fake_h}
+    stats = WeightsLoadStats(coins=coinsNumber, bytes=size, seconds=time.perf_counter() - t0)
+    return weights, coinsState, stats
+
+
+def _widenBinWeights(f, coinsNumber: int, blockSize: int):
+    """
+    Function converts int8 weights, which are written to binary weights file after header, to int16 weights
+    in place. Blocks are converted from the end of file, so no weight is overwritten before it's read.
+    """
+    for stop in range(coinsNumber, 0, -blockSize):
+        start = max(stop - blockSize, 0)
+        f.seek(BIN_HEADER.size + start)
+        block = np.frombuffer(f.read(stop - start), dtype=BIN_DTYPES[1])
+        f.seek(BIN_HEADER.size + 2 * start)
+        f.write(block.astype(BIN_DTYPES[2]).tobytes())
+    f.seek(0, os.SEEK_END)
+
+
+def convertTxtToBin(txtFilename: str, binFilename: str, n_fake: int = 1, n_fake_l: int = 0, n_fake_h: int = 0,
+                    chunkSize: int = 1 << 22) -> WeightsLoadStats:
+    """
+    Function converts text weights file to binary weights file chunk by chunk in one pass over text file,
+    so memory doesn't depend on coins number. Weights are written as int8 until weight, which doesn't fit into it,
+    is met, then already written weights are widened to int16 in binary file. Header is written at the end,
+    when coins number is known.
+
+    Args:
+        txtFilename: name of text weights file
+        binFilename: name of binary weights file
+        n_fake: number of fake coins, which weights are unknown
+        n_fake_l: number of fake coins, which are lighter than genuine coins
+        n_fake_h: number of fake coins, which are heavier than genuine coins
+        chunkSize: number of bytes parsed at once
+    Returns:
+        stats: statistics of conversion
+    """
+    t0 = time.perf_counter()
+    coinsNumber = 0
+    itemSize = 1
+    try:
+        with open(binFilename, "w+b") as f:
+            f.write(bytes(BIN_HEADER.size))
+            for chunk in iterTxtWeightsChunks(txtFilename, chunkSize):
+                chunkItemSize = _binItemSize(int(chunk.min()), int(chunk.max()))
+                if chunkItemSize > itemSize:
+                    _widenBinWeights(f, coinsNumber, chunkSize)
+                    itemSize = chunkItemSize
+                f.write(chunk.astype(BIN_DTYPES[itemSize]).tobytes())
+                coinsNumber += len(chunk)
+
+            f.seek(0)
+            _writeBinHeader(f, itemSize, coinsNumber - n_fake - n_fake_l - n_fake_h, n_fake, n_fake_l, n_fake_h)
+    except ValueError:
+        os.remove(binFilename)
+        raise
+
+    return WeightsLoadStats(coins=coinsNumber, bytes=os.path.getsize(txtFilename),
+                            seconds=time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tools for weights files of coins")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    statsParser = subparsers.add_parser("stats", help="load weights files and print load throughput")
+    statsParser.add_argument("files", nargs="*", default=["coinsWeightsFile.txt"])
+
+    convertParser = subparsers.add_parser("convert", help="convert text weights file to binary one")
+    convertParser.add_argument("txt")
+    convertParser.add_argument("bin")
+    modeGroup = convertParser.add_mutually_exclusive_group()
+    modeGroup.add_argument("--lighter", action="store_true", help="fake coin is lighter than genuine ones")
+    modeGroup.add_argument("--heavier", action="store_true", help="fake coin is heavier than genuine ones")
+
+    args = parser.parse_args()
+    if args.command == "stats":
+        for weightsFile in args.files:
+            if weightsFile.endswith(".bin"):
+                _, _, loadStats = loadBinWeights(weightsFile)
+            else:
+                _, loadStats = loadTxtWeights(weightsFile)
+            print(f"{weightsFile}: {loadStats}")
+    else:
+        conversionStats = convertTxtToBin(args.txt, args.bin, n_fake=int(not (args.lighter or args.heavier)),
+                                          n_fake_l=int(args.lighter), n_fake_h=int(args.heavier))
+        print(f"{args.txt} -> {args.bin}: {conversionStats}")
@@ -0,0 +1,151 @@
+import sys
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+
+@contextmanager
+def openOutput(out: Union[None, str, TextIO] = None) -> Iterator[TextIO]:
+    """
+    Context manager which yields stream for writing: sys.stdout if out is None,
+    opened file if out is file name, and out itself otherwise.
+
+    Args:
+        out: None, file name or text stream
+    """
+    if out is None:
+        yield sys.stdout
+    elif isinstance(out, str):
+        with open(out, "w") as f:
+            yield f
+    else:
+        yield out
+
+
+def writeWeightsTable(weights: Sequence[int], out: Union[None, str, TextIO] = None, pageSize: int = 20):
+    """
+    Function writes weights of coins as markdown tables with pageSize columns each.
+    Only one page is formatted at a time, so memory doesn't depend on coins number.
+
+    Args:
+        weights: weights of coins, numpy array or any sequence supporting slicing
+        out: None for stdout, file name or text stream
+        pageSize: number of coins in one table
+    """
+    coinsNumber = len(weights)
+    with openOutput(out) as stream:
+        for start in range(0, coinsNumber, pageSize):
+            stop = min(start + pageSize, coinsNumber)
+            indicesStr = [str(i) for i in range(start, stop)]
+            weightsStr = [str(w) for w in np.asarray(weights[start:stop]).tolist()]
+            widths = [max(len(i), len(w)) for i, w in zip(indicesStr, weightsStr)]
+
+            stream.write("| indices | " + " | ".join(i.rjust(n) for i, n in zip(indicesStr, widths)) + " |\n")
+            stream.write("|:--------|" + "|".join("-" * (n + 1) + ":" for n in widths) + "|\n")
+            stream.write("| weights | " + " | ".join(w.rjust(n) for w, n in zip(weightsStr, widths)) + " |\n")
+            stream.write("\n")
+
+
+def iterWeightRuns(weights: Sequence[int], chunkSize: int = 1 << 20) -> Iterator[Tuple[int, int, int]]:
+    """
+    Generator of runs of coins with equal weights, weights are processed in chunks.
+
+    Args:
+        weights: weights of coins, numpy array or any sequence supporting slicing
+        chunkSize: number of weights processed at once
+    Yields:
+        (start, stop, weight): coins with indices from start to stop - 1 have weight
+    """
+    coinsNumber = len(weights)
+    runStart: Optional[int] = None
+    runWeight: Optional[int] = None
+
+    for chunkStart in range(0, coinsNumber, chunkSize):
+        chunk = np.asarray(weights[chunkStart: chunkStart + chunkSize])
+        # positions inside chunk where weight differs from the previous one
+        changes = np.flatnonzero(chunk[1:] != chunk[:-1]) + 1
+        starts = [0] + changes.tolist()
+
+        for start in starts:
+            weight = int(chunk[start])
+            if runWeight is not None and start == 0 and weight == runWeight:
+                continue
+            if runWeight is not None:
+                yield runStart, chunkStart + start, runWeight
+            runStart, runWeight = chunkStart + start, weight
+
+    if runWeight is not None:
+        yield runStart, coinsNumber, runWeight
+
+
+def formatWeightRun(start: int, stop: int, weight: int) -> str:
+    """
+    Formats run of coins with equal weights, e.g. 'coins 0..49999 weight 5' or 'coin 50000 weight 8'.
+    """
+    if stop - start == 1:
+        return f"coin {start} weight {weight}"
+    return f"coins {start}..{stop - 1} weight {weight}"
+
+
+def writeWeightsSummary(weights: Sequence[int], out: Union[None, str, TextIO] = None, chunkSize: int = 1 << 20):
+    """
+    Function writes compact run-length summary of weights of coins,
+    e.g. 'coins 0..49999 weight 5, coin 50000 weight 8, coins 50001..100000 weight 5'.
+
+    Args:
+        weights: weights of coins, numpy array or any sequence supporting slicing
+        out: None for stdout, file name or text stream
+        chunkSize: number of weights processed at once
+    """
+    with openOutput(out) as stream:
+        separator = ""
+        for run in iterWeightRuns(weights, chunkSize):
+            stream.write(separator + formatWeightRun(*run))
+            separator = ", "
+        stream.write("\n")
+
+
+def writeWeightsDataFrame(weights: Sequence[int], out: Union[None, str, TextIO] = None,
+                          start: int = 0, stop: Optional[int] = None):
+    """
+    Function writes weights of coins from start to stop - 1 as one pandas DataFrame in markdown.
+    It's convenient for small inventories only, pandas and tabulate are imported on the first call.
+
+    Args:
+        weights: weights of coins
+        out: None for stdout, file name or text stream
+        start: index of the first written coin
+        stop: index after the last written coin, by default all coins are written
+    """
+    import pandas as pd
+
+    stop = len(weights) if stop is None else stop
+    df = pd.DataFrame(columns=range(start, stop))
+    df.index.name = "indices"
+    df.loc["weights"] = np.asarray(weights[start:stop])
+
+    with openOutput(out) as stream:
+        stream.write(df.to_markdown() + "\n")
+
+
+def writeWeights(weights: Sequence[int], view: Optional[str] = "table", out: Union[None, str, TextIO] = None):
+    """
+    Function writes weights of coins in chosen view.
+
+    Args:
+        weights: weights of coins
+        view: 'table' for paginated markdown tables, 'summary' for run-length summary,
+            'dataframe' for one pandas table, None for nothing
+        out: None for stdout, file name or text stream
+    """
+    if view is None:
+        return
+    if view == "table":
+        writeWeightsTable(weights, out)
+    elif view == "summary":
+        writeWeightsSummary(weights, out)
+    elif view == "dataframe":
+        writeWeightsDataFrame(weights, out)
+    else:
+        raise ValueError(f"Unknown weights view: {view}")
@@ -1,8 +1,26 @@
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
 import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+# packages which are needed only for rendering and must not be imported by the solving path
+HEAVY_MODULES = {"pandas", "tabulate", "colorama"}
+
+# names of fake modes in results, indexed by fake modes of WeightsIO
+FAKE_MODE_NAMES = ("unknown", "lighter", "heavier")
+CASES = ("construct", "load_txt", "load_bin", "balance_first", "balance", "detect")
+# text files of more coins take too long to write and parse in every sweep
+TXT_LIMIT = 10 ** 7
 
 
 def benchmark(func):
     """decorator function which is used to calculate execution time of function func.
+    Time of the last call in nanoseconds is also stored in elapsedNs attribute of returned function.
 
     Args:
       func: decorated function
@@ -13,9 +31,342 @@ def benchmark(func):
     """
 
     def _benchmark(*args, **kwargs):
-        t0 = time.time()
+        t0 = time.perf_counter_ns()
         res = func(*args, **kwargs)
-        print(f"{func.__name__} elapsed {(time.time() - t0):e} secs")
+        _benchmark.elapsedNs = time.perf_counter_ns() - t0
+        print(f"{func.__name__} elapsed {_benchmark.elapsedNs / 1e9:e} secs")
         return res
 
+    _benchmark.elapsedNs = None
     return _benchmark
+
+
+class BenchmarkResult(NamedTuple):
+    """
+    Timings of one case of benchmark suite.
+
+    Attributes:
+        case: measured operation, one of CASES; detection is named after algorithm, e.g. 'genCaseAlgorithm'
+        coinsNumber: number of coins
+        fakeMode: 'unknown', 'lighter' or 'heavier'
+        repeats: number of measured runs, warmup runs aren't counted
+        minNs, meanNs, p50Ns, p90Ns, p99Ns: time of one run in nanoseconds
+        weightings: number of weightings in one run, 0 if operation doesn't weigh coins
+        coinsPerWeighting: mean number of coins put on both pans in one weighting
+    """
+    case: str
+    coinsNumber: int
+    fakeMode: str
+    repeats: int
+    minNs: int
+    meanNs: float
+    p50Ns: float
+    p90Ns: float
+    p99Ns: float
+    weightings: int = 0
+    coinsPerWeighting: float = 0.0
+
+    @property
+    def weightingsPerSecond(self) -> float:
+        return self.weightings / self.p50Ns * 1e9 if self.weightings and self.p50Ns else 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.coinsNumber}/{self.fakeMode}"
+
+    def asDict(self) -> Dict[str, object]:
+        return dict(self._asdict(), weightingsPerSecond=self.weightingsPerSecond)
+
+
+class WeighingCounter:
+    """
+    Wrapper of balance method of keeper, which counts weightings and coins put on pans.
+    """
+
+    def __init__(self, balance: Callable):
+        self.balanceMethod = balance
+        self.weightings = 0
+        self.coins = 0
+
+    def __call__(self, left_indices, right_indices) -> int:
+        self.weightings += 1
+        self.coins += len(left_indices) + len(right_indices)
+        return self.balanceMethod(left_indices, right_indices)
+
+    def reset(self):
+        self.weightings = 0
+        self.coins = 0
+
+
+def percentile(sortedValues: Sequence[float], q: float) -> float:
+    """
+    Function returns q-th percentile of sorted values with linear interpolation, as numpy.percentile does.
+    """
+    position = (len(sortedValues) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sortedValues) - 1)
+    return sortedValues[lower] + (sortedValues[upper] - sortedValues[lower]) * (position - lower)
+
+
+def measure(func: Callable[[], object], repeats: int = 10, warmup: int = 2, budget: Optional[float] = None,
+            setup: Optional[Callable[[], object]] = None) -> List[int]:
+    """
+    Function returns times of runs of func in nanoseconds measured with perf_counter_ns.
+
+    Args:
+      func: measured function without arguments
+      repeats: number of measured runs
+      warmup: number of runs before measured ones, e.g. to build caches and to touch memory
+      budget: seconds, after which no more runs are started, but at least one run is measured
+      setup: function, which is called before each run and isn't measured
+
+    Returns:
+      list of times of measured runs
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+
+    timings = []
+    deadline = None if budget is None else time.perf_counter_ns() + int(budget * 1e9)
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - t0)
+        if deadline is not None and time.perf_counter_ns() > deadline:
+            break
+    return timings
+
+
+def summarize(case: str, coinsNumber: int, fakeMode: str, timings: List[int], weightings: int = 0,
+              coinsPerWeighting: float = 0.0) -> BenchmarkResult:
+    """
+    Function returns statistics of timings of case.
+    """
+    timings = sorted(timings)
+    return BenchmarkResult(case, coinsNumber, fakeMode, len(timings), timings[0], sum(timings) / len(timings),
+                           percentile(timings, 50), percentile(timings, 90), percentile(timings, 99),
+                           weightings, coinsPerWeighting)
+
+
+def runSuite(exponents: Iterable[int], fakeModes: Sequence[int] = (0, 1, 2), cases: Sequence[str] = CASES,
+             repeats: int = 10, warmup: int = 2, budget: Optional[float] = 5.0, seed: int = 0,
+             txtLimit: int = TXT_LIMIT) -> Iterable[BenchmarkResult]:
+    """
+    Function sweeps coins numbers 10 ** exponent and fake modes over cases and yields their results.
+    Files are loaded and halves are balanced only with unknown fake mode, since it doesn't change their cost.
+
+    Args:
+      exponents: exponents of coins numbers
+      fakeModes: fake modes of WeightsIO
+      cases: measured operations, see CASES
+      repeats, warmup, budget: see measure
+      seed: seed of weights
+      txtLimit: text files are loaded only for this number of coins or fewer
+
+    Returns:
+      generator of results in order of coins numbers, fake modes and cases
+    """
+    from CoinsDetector import solve
+    from CoinsKeeper import CoinsKeeper
+    from WeightsIO import FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN, saveBinWeights, saveTxtWeights
+
+    for exponent in exponents:
+        coinsNumber = 10 ** exponent
+        for fakeMode in fakeModes:
+            fakeCounts = {"n_fake": int(fakeMode == FAKE_MODE_UNKNOWN), "n_fake_l": int(fakeMode == FAKE_MODE_LIGHTER),
+                          "n_fake_h": int(fakeMode not in (FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER))}
+            modeName = FAKE_MODE_NAMES[fakeMode]
+
+            def construct() -> CoinsKeeper:
+                return CoinsKeeper(n_gen=coinsNumber - 1, seed=seed, **fakeCounts)
+
+            if "construct" in cases:
+                yield summarize("construct", coinsNumber, modeName, measure(construct, repeats, warmup, budget))
+
+            ck = construct()
+            if fakeMode == FAKE_MODE_UNKNOWN and ({"load_txt", "load_bin"} & set(cases)):
+                with tempfile.TemporaryDirectory() as directory:
+                    for case, extension in (("load_txt", "txt"), ("load_bin", "bin")):
+                        if case not in cases or (extension == "txt" and coinsNumber > txtLimit):
+                            continue
+                        filename = os.path.join(directory, f"weights.{extension}")
+                        if extension == "txt":
+                            saveTxtWeights(filename, ck.weights)
+                        else:
+                            saveBinWeights(filename, ck.weights, **fakeCounts)
+                        yield summarize(case, coinsNumber, modeName,
+                                        measure(lambda: CoinsKeeper(weights=filename).weights[-1], repeats, warmup,
+                                                budget))
+
+            if fakeMode == FAKE_MODE_UNKNOWN and {"balance_first", "balance"} & set(cases):
+                half = coinsNumber // 2
+                groupL, groupR = range(0, half), range(half, 2 * half)
+                if "balance_first" in cases:
+                    # the first weighting builds cumulative sums, so they are dropped by assigning weights before
+                    # each run
+                    yield summarize("balance_first", coinsNumber, modeName,
+                                    measure(lambda: ck.balance(groupL, groupR), repeats, warmup, budget,
+                                            setup=lambda: setattr(ck, "weights", ck.weights)), 1, 2 * half)
+                if "balance" in cases:
+                    # cumulative sums are built by warmup runs, so only weighting itself is measured
+                    yield summarize("balance", coinsNumber, modeName,
+                                    measure(lambda: ck.balance(groupL, groupR), repeats, max(warmup, 1), budget),
+                                    1, 2 * half)
+
+            if "detect" in cases:
+                counter = WeighingCounter(ck.balance)
+                ck.balance = counter
+                timings = measure(lambda: solve(ck), repeats, warmup, budget, setup=counter.reset)
+                algorithmName = "genCaseAlgorithm" if fakeMode == FAKE_MODE_UNKNOWN else "partCaseAlgorithm"
+                yield summarize(algorithmName, coinsNumber, modeName, timings, counter.weightings,
+                                counter.coins / counter.weightings if counter.weightings else 0.0)
+
+
+def getMetadata() -> Dict[str, object]:
+    """
+    Function returns description of environment, which is stored along with results to compare versions.
+    """
+    import numpy as np
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def saveJson(filename: str, results: Sequence[BenchmarkResult], metadata: Dict[str, object]):
+    with open(filename, "w") as f:
+        json.dump({"metadata": metadata, "results": [result.asDict() for result in results]}, f, indent=2)
+
+
+def saveCsv(filename: str, results: Sequence[BenchmarkResult]):
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(BenchmarkResult._fields) + ["weightingsPerSecond"])
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result.asDict())
+
+
+def loadJson(filename: str) -> Dict[str, Dict[str, object]]:
+    """
+    Function returns results of previous run of suite by their keys, see BenchmarkResult.key.
+    """
+    with open(filename) as f:
+        results = json.load(f)["results"]
+    return {f"{result['case']}/{result['coinsNumber']}/{result['fakeMode']}": result for result in results}
+
+
+def formatResult(result: BenchmarkResult, baseline: Optional[Dict[str, object]] = None) -> str:
+    line = (f"| {result.case} | {result.coinsNumber} | {result.fakeMode} | {result.repeats} | "
+            f"{result.p50Ns / 1e3:.1f} | {result.p90Ns / 1e3:.1f} | {result.p99Ns / 1e3:.1f} | "
+            f"{result.weightingsPerSecond:.0f} | {result.coinsPerWeighting:.1f} |")
+    if baseline is not None:
+        line += f" {baseline['p50Ns'] / result.p50Ns:.2f} |" if baseline else " - |"
+    return line
+
+
+def importTime(module: str, repeats: int = 5) -> Dict[str, object]:
+    """function measures start-up cost of importing module in a fresh interpreter with 'python -X importtime'.
+
+    Args:
+      module: name of imported module
+      repeats: number of fresh interpreters, the best result is taken
+
+    Returns:
+      dict with cumulative import time of module in microseconds, wall time of interpreter in seconds
+      and names of heavy optional packages which were imported along with module
+
+    """
+    cumulativeTimes = []
+    wallTimes = []
+    importedModules = set()
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        wallTimes.append(time.perf_counter() - t0)
+
+        # lines look like 'import time:       self [us] |       cumulative | imported package'
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            importedModules.add(name)
+            if name == module:
+                cumulativeTimes.append(int(cumulative))
+
+    return {
+        "module": module,
+        "cumulative_us": min(cumulativeTimes),
+        "wall_s": min(wallTimes),
+        "heavy_imports": sorted(importedModules & HEAVY_MODULES),
+    }
+
+
+def printImportTimes():
+    for moduleName in ("CoinsKeeper", "CoinsDetector", "WeightsTable", "WeighingEvents"):
+        result = importTime(moduleName)
+        print(f"{result['module']}: import {result['cumulative_us'] / 1000:.1f} ms, "
+              f"interpreter {result['wall_s'] * 1000:.1f} ms, heavy imports: {result['heavy_imports']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Function which is served as console interface of benchmark suite"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark keeper and detectors over coins numbers and fake modes")
+    parser.add_argument("--min-exponent", type=int, default=1, help="the smallest coins number is 10 ** MIN_EXPONENT")
+    parser.add_argument("--max-exponent", type=int, default=6, help="the largest coins number is 10 ** MAX_EXPONENT")
+    parser.add_argument("--modes", nargs="+", choices=FAKE_MODE_NAMES, default=list(FAKE_MODE_NAMES),
+                        help="fake modes")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="measured operations")
+    parser.add_argument("--repeats", type=int, default=10, help="number of measured runs of each case")
+    parser.add_argument("--warmup", type=int, default=2, help="number of runs before measured ones")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds, after which case isn't repeated")
+    parser.add_argument("--seed", type=int, default=0, help="seed of weights")
+    parser.add_argument("--json", default=None, help="file of results with environment description")
+    parser.add_argument("--csv", default=None, help="file of results as table")
+    parser.add_argument("--compare", default=None, metavar="JSON",
+                        help="results of previous run, p50 speedup against them is printed")
+    parser.add_argument("--imports", action="store_true", help="measure import times of modules instead")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        printImportTimes()
+        return
+
+    baselines = loadJson(args.compare) if args.compare else None
+    print("| case | coins | fake mode | repeats | p50, us | p90, us | p99, us | weightings/s | coins/weighting |"
+          + (" p50 speedup |" if baselines is not None else ""))
+    print("|------|------:|-----------|--------:|--------:|--------:|--------:|-------------:|----------------:|"
+          + ("------------:|" if baselines is not None else ""))
+    results = []
+    for result in runSuite(range(args.min_exponent, args.max_exponent + 1),
+                           [FAKE_MODE_NAMES.index(mode) for mode in args.modes], args.cases, args.repeats,
+                           args.warmup, args.budget, args.seed):
+        results.append(result)
+        print(formatResult(result, None if baselines is None else baselines.get(result.key, {})), flush=True)
+
+    if args.json:
+        saveJson(args.json, results, getMetadata())
+    if args.csv:
+        saveCsv(args.csv, results)
+
+
+if __name__ == "__main__":
+    main()
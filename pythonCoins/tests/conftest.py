@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modules of the project are flat and are imported by their names, as in scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
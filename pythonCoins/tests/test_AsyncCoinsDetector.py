@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from AsyncCoinsDetector import AsyncCoinsDetector, solveAsync, solveMany
+from AsyncCoinsKeeper import AsyncCoinsKeeper, LatencyCoinsKeeper
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+
+
+class TrackingCoinsKeeper(AsyncCoinsKeeper):
+    """
+    Keeper, which records the largest numbers of its weightings and of sessions weighing at the same time.
+    """
+    weighing = set()
+    maxSessions = 0
+
+    def __init__(self, ck: CoinsKeeper, scalesNumber: int = 1):
+        super().__init__(ck, scalesNumber)
+        self.inFlight = 0
+        self.maxInFlight = 0
+
+    async def weighOnScale(self, left_indices, right_indices) -> int:
+        self.inFlight += 1
+        self.maxInFlight = max(self.maxInFlight, self.inFlight)
+        TrackingCoinsKeeper.weighing.add(self)
+        TrackingCoinsKeeper.maxSessions = max(TrackingCoinsKeeper.maxSessions, len(TrackingCoinsKeeper.weighing))
+        await asyncio.sleep(0.001)
+        self.inFlight -= 1
+        if not self.inFlight:
+            TrackingCoinsKeeper.weighing.discard(self)
+        return self.ck.balance(left_indices, right_indices)
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+@pytest.mark.parametrize("fakeCounts", [{"n_fake": 1}, {"n_fake": 0, "n_fake_l": 1}, {"n_fake": 0, "n_fake_h": 1}])
+def test_async_detection_matches_solve(pipelined, fakeCounts):
+    for seed in range(5):
+        ck = CoinsKeeper(n_gen=99, seed=seed, **fakeCounts)
+        assert asyncio.run(solveAsync(AsyncCoinsKeeper(ck, scalesNumber=2), pipelined)) == solve(ck)
+
+
+@pytest.mark.parametrize("scalesNumber, pipelined, expected", [(1, True, 1), (2, True, 2), (2, False, 1)])
+def test_weightings_of_round_share_scales(scalesNumber, pipelined, expected):
+    keeper = TrackingCoinsKeeper(CoinsKeeper(n_gen=199, n_fake=1, seed=0), scalesNumber)
+    asyncio.run(solveAsync(keeper, pipelined))
+    assert keeper.maxInFlight == expected
+
+
+def test_latency_is_simulated():
+    ck = CoinsKeeper(n_gen=26, n_fake=1, seed=1)
+    keeper = LatencyCoinsKeeper(ck, scalesNumber=2, latency=0.01, jitter=0.01, seed=0)
+    loop = asyncio.new_event_loop()
+    try:
+        t0 = loop.time()
+        result = loop.run_until_complete(solveAsync(keeper))
+        elapsed = loop.time() - t0
+    finally:
+        loop.close()
+    assert result == solve(ck)
+    # weightings of one round are done at once, each round takes at least latency
+    assert elapsed >= 0.01 * result[2] / 2
+
+
+@pytest.mark.parametrize("concurrency", [1, 3, 8])
+def test_solve_many_limits_sessions_in_progress(concurrency):
+    TrackingCoinsKeeper.weighing.clear()
+    TrackingCoinsKeeper.maxSessions = 0
+    cks = [CoinsKeeper(n_gen=49, n_fake=1, seed=seed) for seed in range(20)]
+    results = asyncio.run(solveMany([TrackingCoinsKeeper(ck, 2) for ck in cks], concurrency=concurrency))
+    assert results == [solve(ck) for ck in cks]
+    assert TrackingCoinsKeeper.maxSessions == concurrency
+
+
+def test_only_one_fake_coin_is_found():
+    keeper = AsyncCoinsKeeper(CoinsKeeper(n_gen=10, n_fake=2, seed=0))
+    with pytest.raises(AssertionError):
+        asyncio.run(AsyncCoinsDetector(keeper).solver())
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from BatchSolver import InstanceSpec, chunked, main, makeKeeper, solveBatch
+from CoinsDetector import solve
+from WeightsIO import saveTxtWeights
+
+
+def makeSpecs(instancesNumber: int):
+    return [InstanceSpec(n_gen=29 + i, n_fake=0, n_fake_l=i % 2, n_fake_h=1 - i % 2, seed=i)
+            for i in range(instancesNumber)]
+
+
+def test_chunks_are_taken_lazily():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(itertools.islice(chunked(itertools.count(), 2), 2)) == [[0, 1], [2, 3]]
+
+
+@pytest.mark.parametrize("workers, chunksize", [(1, 4), (2, 1), (2, 3)])
+def test_every_instance_is_solved_once(workers, chunksize):
+    specs = makeSpecs(13)
+    results = list(solveBatch(specs, workers=workers, chunksize=chunksize))
+    assert sorted(result.instanceId for result in results) == list(range(len(specs)))
+    for result in results:
+        spec = specs[result.instanceId]
+        ck = makeKeeper(spec)
+        fakeIndex = int(np.flatnonzero(ck.weights != np.median(ck.weights))[0])
+        assert (result.fakeCoinIndex, result.fakeCoinWeightIndex, result.weightingCount) == solve(ck)
+        assert result.fakeCoinIndex == fakeIndex
+        assert result.direction == ("lighter" if spec.n_fake_l else "heavier")
+        assert result.elapsed >= 0
+
+
+def test_instances_are_consumed_lazily():
+    consumed = []
+
+    def instances():
+        for spec in makeSpecs(40):
+            consumed.append(spec)
+            yield spec
+
+    workers, chunksize = 2, 3
+    results = solveBatch(instances(), workers=workers, chunksize=chunksize)
+    next(results)
+    # at most two chunks per worker are in flight before the first result
+    assert len(consumed) <= 2 * workers * chunksize
+    assert len(list(results)) == 39
+
+
+def test_files_and_random_instances_from_command_line(tmp_path, capsys):
+    weights = np.full(50, 5)
+    weights[17] = 4
+    filename = str(tmp_path / "weights.txt")
+    saveTxtWeights(filename, weights)
+
+    main([filename, "--random", "5", "--coins", "40", "--seed", "3", "--lighter", "--workers", "1",
+          "--chunksize", "2"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "instance,fake_index,direction,weightings,elapsed_s"
+    rows = {int(line.split(",")[0]): line.split(",") for line in lines[1:]}
+    assert sorted(rows) == list(range(6))
+    assert rows[0][1:3] == ["17", "lighter"]
+    assert all(row[2] == "lighter" for row in rows.values())
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from CachedCoinsKeeper import CachedCoinsKeeper
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+
+
+class CountingCoinsKeeper(CoinsKeeper):
+    weightingsNumber = 0
+
+    def balance(self, left_indices, right_indices):
+        self.weightingsNumber += 1
+        return super().balance(left_indices, right_indices)
+
+
+def randomGroup(rng, coinsNumber):
+    start, stop = sorted(rng.integers(0, coinsNumber + 1, size=2).tolist())
+    if rng.random() < 0.5:
+        return range(start, stop)
+    return rng.choice(coinsNumber, size=int(rng.integers(0, 4)), replace=False).tolist()
+
+
+def test_balance_ranges_is_answered_from_cache():
+    cached = CachedCoinsKeeper(CountingCoinsKeeper(n_gen=99, seed=0))
+    first = cached.balanceRanges(0, 10, 10, 20)
+    assert cached.balanceRanges(10, 20, 0, 10) == -first
+    assert cached.balance(range(0, 10), range(10, 20)) == first
+    assert cached.ck.weightingsNumber == 1
+    assert cached.stats().hits == 2
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_cached_and_derived_results_equal_weightings(seed):
+    # few distinct weights, so there are many equal groups and long chains of cached results
+    rng = np.random.default_rng(seed)
+    coinsNumber = 12
+    ck = CoinsKeeper(n_gen=coinsNumber - 1, weights=rng.integers(1, 4, size=coinsNumber).tolist())
+    cached = CachedCoinsKeeper(ck, maxsize=int(rng.choice([8, 64, 1 << 16])))
+    for query in range(10000):
+        if query % 2500 == 2499:
+            ck.weights = rng.integers(1, 4, size=coinsNumber).tolist()
+        left, right = randomGroup(rng, coinsNumber), randomGroup(rng, coinsNumber)
+        assert cached.balance(left, right) == ck.balance(left, right), (query, left, right)
+    stats = cached.stats()
+    assert stats.derived > 0 and stats.invalidations == 4
+
+
+@pytest.mark.parametrize("strategy", ["classic", "compiled", "optimal", "static"])
+def test_replayed_detection_weighs_nothing(strategy):
+    cached = CachedCoinsKeeper(CountingCoinsKeeper(n_gen=999, seed=1))
+    result = solve(cached, strategy)
+    weightingsNumber = cached.ck.weightingsNumber
+    assert solve(cached, strategy) == result
+    assert cached.ck.weightingsNumber == weightingsNumber
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from CoinsDetector import STRATEGY_ALGORITHMS, CoinsDetector, run, solve
+from CoinsKeeper import CoinsKeeper
+
+STRATEGY_MODULES = ("DetectorObservers", "DigitalScale", "GroupTesting", "OptimalSolver", "StaticSchedule",
+                    "StrategyCompiler", "StrategySearch", "WeightsTable")
+
+
+def importedModules(code: str):
+    output = subprocess.run([sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+                            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return set(output.split())
+
+
+def test_classic_detection_imports_no_strategy_module():
+    modules = importedModules("from CoinsDetector import solve\nfrom CoinsKeeper import CoinsKeeper\n"
+                              "solve(CoinsKeeper(n_gen=99, seed=0))")
+    assert not modules & set(STRATEGY_MODULES)
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGY_ALGORITHMS))
+def test_every_strategy_finds_fake_coin(strategy):
+    ck = CoinsKeeper(n_gen=999, seed=0)
+    index, indicator, _ = solve(ck, strategy)
+    assert ck.weights[index] != np.median(ck.weights)
+
+
+def test_detector_is_silent_by_default(capsys):
+    CoinsDetector(CoinsKeeper(n_gen=99, seed=0)).solver()
+    run(n_gen=99)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from CoinsKeeper import CoinsKeeper, exactDot
+
+
+def listBalance(weights: list, left_indices, right_indices) -> int:
+    # balance of CoinsKeeper before weights were stored as numpy array
+    leftWeight = sum(map(lambda x: weights[x], left_indices))
+    rightWeight = sum(map(lambda x: weights[x], right_indices))
+    return (rightWeight > leftWeight) - (rightWeight < leftWeight)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_ranges_and_groups_match_list_of_weights(seed):
+    rng = np.random.default_rng(seed)
+    ck = CoinsKeeper(n_gen=int(rng.integers(1, 60)), n_fake=1, seed=seed)
+    weights = ck.weights.tolist()
+    coinsNumber = len(weights)
+    for _ in range(500):
+        start, stop = sorted(int(i) for i in rng.integers(-coinsNumber, coinsNumber + 1, size=2))
+        group = range(start, stop)
+        assert ck.groupWeight(group) == sum(weights[i] for i in group)
+        indices = rng.integers(-coinsNumber, coinsNumber, size=int(rng.integers(5))).tolist()
+        assert ck.groupWeight(indices) == sum(weights[i] for i in indices)
+        assert ck.balance(group, indices) == listBalance(weights, group, indices)
+
+        leftStart, leftStop, rightStart, rightStop = sorted(int(i) for i in rng.integers(coinsNumber + 1, size=4))
+        assert ck.rangeWeight(leftStart, leftStop) == sum(weights[leftStart:leftStop])
+        assert ck.balanceRanges(leftStart, leftStop, rightStart, rightStop) == \
+            listBalance(weights, range(leftStart, leftStop), range(rightStart, rightStop))
+
+
+def test_negative_range_counts_coins_from_the_end():
+    ck = CoinsKeeper(weights=[1, 2, 3, 4, 5, 6, 7])
+    assert ck.groupWeight(range(-5, 0)) == 3 + 4 + 5 + 6 + 7
+    assert ck.groupWeight(range(-2, 2)) == 6 + 7 + 1 + 2
+    assert ck.weigh(range(-2, 0), [1, 2]) == 6 + 2 * 7
+    assert ck.balance(range(-3, 0), range(0, 3)) == -1
+
+
+@pytest.mark.parametrize("start, stop", [(-1, 3), (2, 8), (5, 4)])
+def test_range_out_of_coins_is_rejected(start, stop):
+    ck = CoinsKeeper(weights=[1, 2, 3, 4, 5, 6, 7])
+    with pytest.raises(IndexError):
+        ck.rangeWeight(start, stop)
+
+
+def test_range_past_the_last_coin_is_rejected():
+    ck = CoinsKeeper(weights=[1, 2, 3])
+    with pytest.raises(IndexError):
+        ck.groupWeight(range(1, 5))
+
+
+def test_weights_are_changed_by_assignment_only():
+    weights = np.array([5, 5, 5, 4], dtype=np.int64)
+    ck = CoinsKeeper(weights=weights)
+    assert ck.rangeWeight(0, 4) == 19
+    with pytest.raises(ValueError):
+        ck.weights[3] = 5
+    # array of caller stays writable and new weights are used after assignment
+    weights[3] = 5
+    ck.weights = weights
+    assert ck.rangeWeight(0, 4) == 20
+    assert ck.balanceRanges(0, 2, 2, 4) == 0
+
+
+@pytest.mark.parametrize("multiplier", [1, 2 ** 40, 2 ** 58, 2 ** 61])
+def test_dot_product_does_not_overflow(multiplier):
+    rng = np.random.default_rng(0)
+    values = rng.integers(-9, 10, size=1000)
+    multiplicities = rng.integers(0, np.iinfo(np.int64).max // multiplier, size=1000) * multiplier
+    assert exactDot(values, multiplicities) == sum(v * m for v, m in zip(values.tolist(), multiplicities.tolist()))
+    assert exactDot(multiplicities) == sum(multiplicities.tolist())
+
+
+def test_coded_mass_is_exact_beyond_int64():
+    # coded multiplicities of about 1.4 * 10^9 coins make such masses
+    ck = CoinsKeeper(weights=[9, 9, 8])
+    multiplicities = [2 ** 62, 2 ** 62 + 1, 2 ** 61]
+    assert ck.weigh(range(3), multiplicities) == 9 * 2 ** 62 + 9 * (2 ** 62 + 1) + 8 * 2 ** 61
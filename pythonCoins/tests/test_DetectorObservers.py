@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+import CoinsDetector as CoinsDetectorModule
+from CoinsDetector import CoinsDetector, solve
+from CoinsKeeper import CoinsKeeper
+from DetectorObservers import CounterObserver
+from WeighingEvents import Verbosity
+
+
+@pytest.mark.parametrize("fakeMode", ["lighter", "heavier", "unknown"])
+def test_rounds_are_counted_for_classic_algorithms(fakeMode):
+    coinsNumber = 1000
+    ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=int(fakeMode == "unknown"), n_fake_l=int(fakeMode == "lighter"),
+                     n_fake_h=int(fakeMode == "heavier"), seed=0)
+    observer = CounterObserver()
+    index, indicator, weightingCount = solve(ck, "classic", [observer])
+    assert observer.counters["rounds"] > 0
+    assert observer.counters["weighings"] == observer.counters["solved_weighings"] == weightingCount
+
+
+def test_rounds_of_known_direction_are_not_rendered():
+    ck = CoinsKeeper(n_gen=99, n_fake=0, n_fake_l=1, seed=0)
+    cd = CoinsDetector(ck, verbosity=Verbosity.WINDOWED, observers=[CounterObserver()])
+    cd.renderer.out = io.StringIO()
+    cd.solver()
+    assert "current indices" not in cd.renderer.out.getvalue()
+
+
+def test_measurements_are_not_timed_without_observers(monkeypatch):
+    def perfCounterNs():
+        raise AssertionError("measurement is timed without observers")
+
+    monkeypatch.setattr(CoinsDetectorModule.time, "perf_counter_ns", perfCounterNs)
+    ck = CoinsKeeper(n_gen=99, seed=0)
+    cd = CoinsDetector(ck)
+    assert cd.measureGroup(range(10)) == ck.weigh(range(10))
+    assert cd.weightingCount == 1
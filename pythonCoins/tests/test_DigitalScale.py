@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+from DigitalScale import scaleAlgorithm
+from WeightsIO import saveTxtWeights
+
+
+def makeWeights(coinsNumber: int, fakeIndex: int, deviation: int, genuineWeight: int = 5) -> np.ndarray:
+    weights = np.full(coinsNumber, genuineWeight, dtype=np.int64)
+    weights[fakeIndex] += deviation
+    return weights
+
+
+def test_loaded_file_with_large_deviation(tmp_path):
+    # mean weight is rounded to 6, so scale alone decodes coin 39 as lighter one
+    filename = str(tmp_path / "weights.txt")
+    saveTxtWeights(filename, makeWeights(40, 13, 30))
+    ck = CoinsKeeper(weights=filename)
+    assert solve(ck, "scale")[:2] == (13, 1)
+
+
+@pytest.mark.parametrize("coinsNumber", [40, 100, 1000])
+@pytest.mark.parametrize("deviation", [-4, 7, 20, 30, 60, 99, 250, 1000])
+def test_scale_strategy_finds_fake_coin(coinsNumber, deviation):
+    rng = np.random.default_rng(coinsNumber * 10000 + deviation)
+    for fakeIndex in rng.integers(0, coinsNumber, size=5):
+        genuineWeight = max(5, 1 - deviation)
+        ck = CoinsKeeper(n_gen=coinsNumber - 1,
+                         weights=makeWeights(coinsNumber, int(fakeIndex), deviation, genuineWeight))
+        assert solve(ck, "scale")[:2] == (int(fakeIndex), 1 if deviation > 0 else -1)
+
+
+@pytest.mark.parametrize("fakeMode", [{"n_fake_l": 1}, {"n_fake_h": 1}])
+def test_scale_strategy_with_known_direction(fakeMode):
+    ck = CoinsKeeper(n_gen=99, n_fake=0, weights=makeWeights(100, 71, 45 if "n_fake_h" in fakeMode else -4),
+                     **fakeMode)
+    assert solve(ck, "scale")[0] == 71
+
+
+def test_verify_rejects_wrong_guess_of_genuine_weight():
+    weights = makeWeights(40, 20, 39)
+
+    def measure(indices, multiplicities):
+        return CoinsKeeper(n_gen=39, weights=weights).weigh(indices, multiplicities)
+
+    # genuine weight is guessed as 6, coin 0 is decoded and it isn't fake
+    assert scaleAlgorithm(40, measure) == (0, -1)
+    with pytest.raises(ValueError):
+        scaleAlgorithm(40, measure, verify=True)
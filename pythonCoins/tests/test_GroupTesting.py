@@ -0,0 +1,61 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from CoinsKeeper import CoinsKeeper
+from GroupTesting import GroupTester, findFakes
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+
+def makeWeigh(weights: np.ndarray, weighings: list):
+    def weigh(groupL, groupR):
+        assert len(groupL) == len(groupR) and not set(groupL) & set(groupR)
+        weighings.append(1)
+        return int(np.sign(weights[list(groupR)].sum() - weights[list(groupL)].sum()))
+
+    return weigh
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER])
+def test_every_set_of_fake_coins_is_found(fakeMode):
+    # exhaustive check of every set of fake coins of up to 10 coins
+    direction = -1 if fakeMode == FAKE_MODE_LIGHTER else 1
+    for coinsNumber in range(1, 11):
+        for fakesNumber in range(coinsNumber + 1):
+            for fakes in itertools.combinations(range(coinsNumber), fakesNumber):
+                weights = np.full(coinsNumber, 10, dtype=np.int64)
+                weights[list(fakes)] += direction
+                assert findFakes(coinsNumber, fakesNumber, makeWeigh(weights, []), fakeMode) == list(fakes)
+                if fakesNumber < coinsNumber:
+                    tester = GroupTester(makeWeigh(weights, []), fakeCoinIsLighter=fakeMode == FAKE_MODE_LIGHTER)
+                    assert tester.findFakesRepeatedly(coinsNumber, fakesNumber) == list(fakes)
+
+
+@pytest.mark.parametrize("coinsNumber, fakesNumber", [(100, 2), (1000, 10), (10 ** 5, 30)])
+def test_group_testing_takes_fewer_weightings_than_repeated_search(coinsNumber, fakesNumber):
+    ck = CoinsKeeper(n_gen=coinsNumber - fakesNumber, n_fake=0, n_fake_l=fakesNumber, seed=coinsNumber)
+    weights = np.asarray(ck.weights, dtype=np.int64)
+    actualFakes = np.flatnonzero(weights != weights.max()).tolist()
+
+    groupWeighings, repeatedWeighings = [], []
+    assert findFakes(coinsNumber, fakesNumber, makeWeigh(weights, groupWeighings)) == actualFakes
+    assert GroupTester(makeWeigh(weights, repeatedWeighings)).findFakesRepeatedly(coinsNumber, fakesNumber) == \
+        actualFakes
+    assert len(groupWeighings) < len(repeatedWeighings)
+
+
+@pytest.mark.parametrize("coinsNumber, fakesNumber", [(1000, 10), (10 ** 5, 100), (10 ** 4, 1000)])
+def test_group_testing_takes_about_d_log2_n_over_d_weightings(coinsNumber, fakesNumber):
+    ck = CoinsKeeper(n_gen=coinsNumber - fakesNumber, n_fake=0, n_fake_l=fakesNumber, seed=coinsNumber)
+    weights = np.asarray(ck.weights, dtype=np.int64)
+
+    weighings = []
+    findFakes(coinsNumber, fakesNumber, makeWeigh(weights, weighings))
+    assert len(weighings) <= fakesNumber * (math.log2(coinsNumber / fakesNumber) + 2)
+
+
+def test_direction_must_be_known():
+    with pytest.raises(AssertionError):
+        findFakes(10, 2, lambda groupL, groupR: 0, fakeMode=FAKE_MODE_UNKNOWN)
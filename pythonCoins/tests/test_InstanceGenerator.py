@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from InstanceGenerator import chooseWeights, generateInstances, generateWeights, getGenerator
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+
+def test_generator_is_reused():
+    rng = np.random.default_rng(0)
+    assert getGenerator(rng) is rng
+    assert getGenerator(5).integers(1000) == np.random.default_rng(5).integers(1000)
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER])
+def test_weights_are_chosen_according_to_fake_mode(fakeMode):
+    genuineWeights, fakeWeights = chooseWeights(np.random.default_rng(fakeMode), 10000, fakeMode)
+    assert set(genuineWeights.tolist()) == {4, 5, 6}
+    assert fakeWeights.min() >= 1 and fakeWeights.max() <= 9
+    assert (fakeWeights != genuineWeights).all()
+    if fakeMode == FAKE_MODE_LIGHTER:
+        assert (fakeWeights < genuineWeights).all()
+    elif fakeMode == FAKE_MODE_HEAVIER:
+        assert (fakeWeights > genuineWeights).all()
+    else:
+        assert (fakeWeights < genuineWeights).any() and (fakeWeights > genuineWeights).any()
+    second = chooseWeights(np.random.default_rng(fakeMode), 10000, fakeMode)
+    assert np.array_equal(second[0], genuineWeights) and np.array_equal(second[1], fakeWeights)
+
+
+@pytest.mark.parametrize("counts", [
+    {"n_gen": 99, "n_fake": 1},
+    {"n_gen": 99, "n_fake": 0, "n_fake_l": 1},
+    {"n_gen": 90, "n_fake": 0, "n_fake_h": 10},
+    {"n_gen": 0, "n_fake": 0, "n_fake_l": 5},
+])
+def test_fake_coins_are_placed_reproducibly(counts):
+    weights, fakeIndices = generateWeights(**counts, seed=7)
+    again, againIndices = generateWeights(**counts, seed=7)
+    assert np.array_equal(weights, again) and np.array_equal(fakeIndices, againIndices)
+
+    fakesNumber = counts.get("n_fake", 0) + counts.get("n_fake_l", 0) + counts.get("n_fake_h", 0)
+    assert weights.dtype == np.int8 and len(weights) == counts["n_gen"] + fakesNumber
+    assert len(set(fakeIndices.tolist())) == fakesNumber and fakeIndices.tolist() == sorted(fakeIndices.tolist())
+    isFake = np.zeros(len(weights), dtype=bool)
+    isFake[fakeIndices] = True
+    assert len(set(weights[isFake].tolist())) == 1 and len(set(weights[~isFake].tolist())) <= 1
+    if counts["n_gen"]:
+        fakeWeight, genuineWeight = int(weights[isFake][0]), int(weights[~isFake][0])
+        assert fakeWeight != genuineWeight
+        if counts.get("n_fake_l"):
+            assert fakeWeight < genuineWeight
+        if counts.get("n_fake_h"):
+            assert fakeWeight > genuineWeight
+
+
+def test_different_seeds_place_fake_coin_differently():
+    indices = {int(generateWeights(n_gen=999, seed=seed)[1][0]) for seed in range(20)}
+    assert len(indices) > 10
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER])
+def test_batch_places_one_fake_coin_per_instance(fakeMode):
+    batch = generateInstances(500, 30, fakeMode=fakeMode, seed=1)
+    again = generateInstances(500, 30, fakeMode=fakeMode, seed=1)
+    for field, againField in zip(batch, again):
+        assert np.array_equal(field, againField)
+
+    rows = np.arange(500)
+    assert batch.weights.shape == (500, 30) and batch.weights.dtype == np.int8
+    assert np.array_equal(batch.weights[rows, batch.fakeIndices], batch.fakeWeights)
+    assert ((batch.weights != batch.genuineWeights[:, np.newaxis]).sum(axis=1) == 1).all()
+
+
+def test_batch_with_given_fake_indices():
+    fakeIndices = np.array([0, 9, 4])
+    batch = generateInstances(3, 10, fakeMode=FAKE_MODE_LIGHTER, seed=2, fakeIndices=fakeIndices)
+    assert np.array_equal(np.argmin(batch.weights, axis=1), fakeIndices)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+from InstanceGenerator import generateInstances
+from LockstepSolver import getPrefixSums, solveLockstep
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+FAKE_COUNTS = {FAKE_MODE_UNKNOWN: {"n_fake": 1}, FAKE_MODE_LIGHTER: {"n_fake": 0, "n_fake_l": 1},
+               FAKE_MODE_HEAVIER: {"n_fake": 0, "n_fake_h": 1}}
+DIRECTIONS = {FAKE_MODE_UNKNOWN: (-1, 1), FAKE_MODE_LIGHTER: (-1,), FAKE_MODE_HEAVIER: (1,)}
+
+
+def allInstances(coinsNumber: int, fakeMode: int):
+    # every fake coin with every direction allowed by fake mode
+    weights, fakes = [], []
+    for fakeIndex in range(coinsNumber):
+        for direction in DIRECTIONS[fakeMode]:
+            row = np.full(coinsNumber, 5, dtype=np.int8)
+            row[fakeIndex] += direction
+            weights.append(row)
+            fakes.append((fakeIndex, direction))
+    return np.array(weights), fakes
+
+
+def test_prefix_sums_of_rows():
+    weights = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.int8)
+    assert getPrefixSums(weights).tolist() == [[0, 1, 3, 6], [0, 4, 9, 15]]
+    assert getPrefixSums(np.full((1, 3), 2 ** 30, dtype=np.int64)).dtype == np.int64
+
+
+@pytest.mark.parametrize("coinsNumber", range(3, 50))
+def test_unknown_direction_matches_classic_detector(coinsNumber):
+    weights, _ = allInstances(coinsNumber, FAKE_MODE_UNKNOWN)
+    result = solveLockstep(weights, FAKE_MODE_UNKNOWN)
+    for i, row in enumerate(weights):
+        expected = solve(CoinsKeeper(n_gen=coinsNumber - 1, weights=row, **FAKE_COUNTS[FAKE_MODE_UNKNOWN]))
+        direction = int(result.directions[i]) or None
+        assert (int(result.fakeIndices[i]), direction, int(result.weightingCounts[i])) == expected
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER])
+@pytest.mark.parametrize("coinsNumber", range(1, 50))
+def test_known_direction_matches_classic_detector(fakeMode, coinsNumber):
+    weights, fakes = allInstances(coinsNumber, fakeMode)
+    result = solveLockstep(weights, fakeMode)
+    for i, row in enumerate(weights):
+        expected = solve(CoinsKeeper(n_gen=coinsNumber - 1, weights=row, **FAKE_COUNTS[fakeMode]))
+        actual = (int(result.fakeIndices[i]), int(result.directions[i]), int(result.weightingCounts[i]))
+        assert actual[:2] == fakes[i]
+        if actual[2] != expected[2]:
+            # classic detector stops with two candidates left, lockstep weighs them once more
+            assert actual[2] == expected[2] + 1
+        else:
+            assert actual == expected
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER, FAKE_MODE_UNKNOWN])
+def test_blocks_give_the_same_results(fakeMode):
+    batch = generateInstances(1000, 40, fakeMode=fakeMode, seed=fakeMode)
+    whole = solveLockstep(batch.weights, fakeMode)
+    blocks = solveLockstep(batch.weights, fakeMode, blockSize=7)
+    for wholeField, blocksField in zip(whole, blocks):
+        assert np.array_equal(wholeField, blocksField)
+    if fakeMode != FAKE_MODE_UNKNOWN:
+        assert np.array_equal(whole.fakeIndices, batch.fakeIndices)
+
+
+def test_empty_batch():
+    result = solveLockstep(np.zeros((0, 10), dtype=np.int8), FAKE_MODE_LIGHTER)
+    assert all(len(field) == 0 for field in result)
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from CachedCoinsKeeper import CachedCoinsKeeper
+from CoinsDetector import solve
+from MutableCoinsKeeper import MutableCoinsKeeper, buildFenwickTree
+
+
+def test_fenwick_tree_gives_prefix_sums():
+    values = np.arange(1, 12, dtype=np.int64)
+    tree = buildFenwickTree(values, 16)
+    for slot in range(17):
+        assert MutableCoinsKeeper._prefix(tree, slot) == values[:slot].sum()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_changes_match_list_of_weights(seed):
+    rng = np.random.default_rng(seed)
+    ck = MutableCoinsKeeper(n_gen=int(rng.integers(1, 40)), n_fake=0, seed=seed)
+    model = ck.weights.astype(np.int64).tolist()
+    genuineCount = ck.n_gen
+    for step in range(3000):
+        operation = rng.integers(3) if model else 1
+        if operation == 0:
+            index = int(rng.integers(-len(model), len(model)))
+            weight = int(rng.integers(1, 100))
+            ck.update(index, weight)
+            model[index] = weight
+        elif operation == 1:
+            weight = int(rng.integers(1, 100))
+            assert ck.insert(weight) == len(model)
+            model.append(weight)
+            genuineCount += 1
+        else:
+            index = int(rng.integers(len(model)))
+            assert ck.remove(index) == model.pop(index)
+            genuineCount -= 1
+
+        assert ck.coinsNumber == len(model) and ck.n_gen == genuineCount
+        if step % 10 == 0:
+            assert ck.weights.tolist() == model
+        if model:
+            start, stop = sorted(rng.integers(0, len(model) + 1, size=2).tolist())
+            assert ck.rangeWeight(start, stop) == sum(model[start:stop])
+            assert ck.groupWeight(range(start, stop)) == sum(model[start:stop])
+            indices = rng.integers(len(model), size=5).tolist()
+            multiplicities = rng.integers(0, 4, size=5).tolist()
+            assert ck.groupWeight(indices) == sum(model[i] for i in indices)
+            assert ck.weigh(indices, multiplicities) == sum(model[i] * m for i, m in zip(indices, multiplicities))
+
+
+def test_slots_are_doubled_and_compacted():
+    ck = MutableCoinsKeeper(n_gen=9, n_fake=0, weights=list(range(1, 10)))
+    for weight in range(10, 101):
+        ck.insert(weight)
+    assert ck.capacity == 128
+    for index in range(90, 0, -1):
+        ck.remove(index)
+    assert ck.weights.tolist() == [1] + list(range(92, 101))
+    assert ck.capacity < 128 and ck.coinsNumber == 10 and ck.slotsNumber <= 2 * ck.coinsNumber
+    assert ck.rangeWeight(1, 10) == sum(range(92, 101))
+
+
+def test_index_out_of_coins_is_rejected():
+    ck = MutableCoinsKeeper(n_gen=9, seed=0)
+    ck.remove(0)
+    with pytest.raises(IndexError):
+        ck.update(9, 1)
+    with pytest.raises(IndexError):
+        ck.remove(-10)
+
+
+def test_detection_after_changes():
+    coinsNumber = 1000
+    ck = MutableCoinsKeeper(n_gen=coinsNumber - 1, seed=1)
+    cached = CachedCoinsKeeper(ck)
+    genuineWeight = int(np.bincount(ck.weights).argmax())
+    fakeIndex = int(np.flatnonzero(ck.weights != genuineWeight)[0])
+    fakeWeight = int(ck.weights[fakeIndex])
+    rng = np.random.default_rng(0)
+    for newFakeIndex in rng.integers(0, coinsNumber - 1, size=20).tolist():
+        # fake coin is moved, then one genuine coin is removed and another one is added
+        ck.update(fakeIndex, genuineWeight)
+        ck.update(newFakeIndex, fakeWeight)
+        removedIndex = (newFakeIndex + 1) % ck.coinsNumber
+        ck.remove(removedIndex)
+        ck.insert(genuineWeight)
+        fakeIndex = newFakeIndex - (removedIndex < newFakeIndex)
+        for strategy in ("classic", "compiled", "optimal"):
+            assert solve(ck, strategy)[0] == fakeIndex
+            assert solve(cached, strategy)[0] == fakeIndex
+
+
+def test_ranges_are_checked_as_in_coins_keeper():
+    ck = MutableCoinsKeeper(n_gen=6, n_fake=0, weights=[1, 2, 3, 4, 5, 6, 7])
+    ck.remove(0)
+    assert ck.groupWeight(range(-3, 0)) == 5 + 6 + 7
+    assert ck.groupWeight(range(-1, 2)) == 7 + 2 + 3
+    with pytest.raises(IndexError):
+        ck.rangeWeight(2, 7)
+    with pytest.raises(IndexError):
+        ck.groupWeight(range(0, 7))
+    with pytest.raises(ValueError):
+        ck.weights[0] = 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from CoinsKeeper import CoinsKeeper
+from InstanceGenerator import generateInstances
+from OptimalSolver import maxCoinsNumber, minWeighingsNumber, optimalAlgorithm
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+DIRECTIONS = {FAKE_MODE_UNKNOWN: (-1, 1), FAKE_MODE_LIGHTER: (-1,), FAKE_MODE_HEAVIER: (1,)}
+
+
+def test_bounds_of_classic_puzzles():
+    assert [maxCoinsNumber(w) for w in range(5)] == [0, 0, 3, 12, 39]
+    assert [maxCoinsNumber(w, genuineCoin=True) for w in range(5)] == [0, 1, 4, 13, 40]
+    assert [maxCoinsNumber(w, FAKE_MODE_LIGHTER) for w in range(5)] == [1, 3, 9, 27, 81]
+    assert minWeighingsNumber(12) == 3 and minWeighingsNumber(13) == 4
+    assert minWeighingsNumber(13, genuineCoin=True) == 3
+    assert minWeighingsNumber(27, FAKE_MODE_HEAVIER) == 3 and minWeighingsNumber(28, FAKE_MODE_HEAVIER) == 4
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER])
+def test_every_fake_coin_is_found_within_bound(fakeMode):
+    # exhaustive check of every fake coin and direction allowed by fake mode
+    for coinsNumber in range(3 if fakeMode == FAKE_MODE_UNKNOWN else 1, 60):
+        bound = minWeighingsNumber(coinsNumber, fakeMode)
+        for fakeIndex in range(coinsNumber):
+            for direction in DIRECTIONS[fakeMode]:
+                weights = np.full(coinsNumber, 10, dtype=np.int64)
+                weights[fakeIndex] += direction
+                weighings = []
+
+                def weigh(groupL, groupR):
+                    weighings.append((groupL, groupR))
+                    assert len(groupL) == len(groupR) and not set(groupL.tolist()) & set(groupR.tolist())
+                    return int(np.sign(weights[groupR].sum() - weights[groupL].sum()))
+
+                assert optimalAlgorithm(coinsNumber, weigh, fakeMode) == (fakeIndex, direction)
+                assert len(weighings) <= bound, (coinsNumber, fakeIndex, direction)
+
+
+@pytest.mark.parametrize("coinsNumber", [1000, 10 ** 5])
+def test_large_instances_are_solved_within_bound(coinsNumber):
+    batch = generateInstances(20, coinsNumber, seed=coinsNumber)
+    for weights, fakeIndex, genuineWeight, fakeWeight in zip(batch.weights, batch.fakeIndices,
+                                                             batch.genuineWeights, batch.fakeWeights):
+        ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=1, weights=weights)
+        weighings = []
+
+        def weigh(groupL, groupR):
+            weighings.append(1)
+            return ck.balance(groupL, groupR)
+
+        direction = 1 if fakeWeight > genuineWeight else -1
+        assert optimalAlgorithm(coinsNumber, weigh) == (fakeIndex, direction)
+        assert len(weighings) <= minWeighingsNumber(coinsNumber)
@@ -0,0 +1,168 @@
+import asyncio
+import struct
+
+import numpy as np
+import pytest
+
+from AsyncCoinsDetector import solveAsync
+from CoinsKeeper import CoinsKeeper
+from ScaleClient import ProtocolError, RemoteCoinsKeeper
+from ScaleServer import (OP_STATE, REQUEST_HEADER, RESPONSE_HEADER, STATE, STATUS_ERROR, STATUS_OK, ScaleServer,
+                         encodeStateRequest)
+
+
+def serve(ck: CoinsKeeper, path: str, client):
+    async def run():
+        server = await ScaleServer(ck).start(path=path)
+        async with server:
+            return await client()
+
+    return asyncio.run(run())
+
+
+def test_remote_keeper_finds_fake_coin(tmp_path):
+    ck = CoinsKeeper(n_gen=999, seed=0)
+
+    async def client():
+        async with RemoteCoinsKeeper(path=str(tmp_path / "scale"), poolSize=2) as keeper:
+            return await solveAsync(keeper)
+
+    index, indicator, _ = serve(ck, str(tmp_path / "scale"), client)
+    assert ck.weights[index] != np.median(ck.weights)
+    assert indicator == (1 if ck.weights[index] > np.median(ck.weights) else -1)
+
+
+def test_unknown_operation_with_payload_closes_connection(tmp_path):
+    path = str(tmp_path / "scale")
+
+    async def client():
+        reader, writer = await asyncio.open_unix_connection(path)
+        # payload could be mistaken for the next request, if it wasn't rejected
+        writer.write(REQUEST_HEADER.pack(9, 5, 1) + encodeStateRequest(6))
+        requestId, status, count = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+        message = (await reader.readexactly(count)).decode()
+        rest = await reader.read()
+        writer.close()
+        return requestId, status, message, rest
+
+    requestId, status, message, rest = serve(CoinsKeeper(n_gen=9, seed=0), path, client)
+    assert (requestId, status) == (5, STATUS_ERROR)
+    assert "operation 9" in message
+    assert rest == b""
+
+
+def test_unknown_operation_without_payload_keeps_connection(tmp_path):
+    path = str(tmp_path / "scale")
+
+    async def client():
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(REQUEST_HEADER.pack(9, 5, 0) + encodeStateRequest(6))
+        _, status, count = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+        await reader.readexactly(count)
+        requestId, stateStatus, _ = RESPONSE_HEADER.unpack(await reader.readexactly(RESPONSE_HEADER.size))
+        state = STATE.unpack(await reader.readexactly(STATE.size))
+        writer.close()
+        return status, requestId, stateStatus, state
+
+    status, requestId, stateStatus, state = serve(CoinsKeeper(n_gen=9, seed=0), path, client)
+    assert status == STATUS_ERROR
+    assert (requestId, stateStatus, state[0]) == (6, STATUS_OK, 10)
+
+
+def test_response_to_unknown_request_fails_futures(tmp_path):
+    path = str(tmp_path / "scale")
+
+    async def handleConnection(reader, writer):
+        # coins state is answered, weightings are answered with wrong request id
+        while True:
+            operation, requestId, count = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+            if operation == OP_STATE:
+                writer.write(RESPONSE_HEADER.pack(requestId, STATUS_OK, 1) + STATE.pack(10, 9, 1, 0, 0))
+            else:
+                await reader.readexactly(count * 32)
+                writer.write(RESPONSE_HEADER.pack(requestId + 1000, STATUS_OK, count) + struct.pack(f"<{count}b",
+                                                                                                    *[0] * count))
+
+    async def run():
+        server = await asyncio.start_unix_server(handleConnection, path=path)
+        async with server:
+            async with RemoteCoinsKeeper(path=path, poolSize=1) as keeper:
+                with pytest.raises(ProtocolError):
+                    await keeper.weighOnScale(range(0, 1), range(1, 2))
+                # connection can't be used after protocol error, so next weightings fail at once
+                with pytest.raises(ProtocolError):
+                    await asyncio.wait_for(keeper.weighOnScale(range(0, 1), range(1, 2)), 1)
+
+    asyncio.run(run())
+
+
+def test_short_response_fails_every_future(tmp_path):
+    path = str(tmp_path / "scale")
+
+    async def handleConnection(reader, writer):
+        # weightings are answered with one outcome less than requested
+        while True:
+            operation, requestId, count = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+            if operation == OP_STATE:
+                writer.write(RESPONSE_HEADER.pack(requestId, STATUS_OK, 1) + STATE.pack(10, 9, 1, 0, 0))
+            else:
+                await reader.readexactly(count * 32)
+                writer.write(RESPONSE_HEADER.pack(requestId, STATUS_OK, count - 1) + bytes(count - 1))
+
+    async def run():
+        server = await asyncio.start_unix_server(handleConnection, path=path)
+        async with server:
+            async with RemoteCoinsKeeper(path=path, poolSize=1) as keeper:
+                results = await asyncio.wait_for(asyncio.gather(
+                    *(keeper.weighOnScale(range(i, i + 1), range(i + 1, i + 2)) for i in range(3)),
+                    return_exceptions=True), 1)
+                assert all(isinstance(result, ProtocolError) for result in results)
+
+    asyncio.run(run())
+
+
+def test_lost_connection_is_skipped(tmp_path):
+    path = str(tmp_path / "scale")
+    ck = CoinsKeeper(n_gen=999, seed=0)
+    scaleServer = ScaleServer(ck)
+    accepted = []
+
+    async def handleConnection(reader, writer):
+        accepted.append(writer)
+        if len(accepted) > 1:
+            await scaleServer.handleConnection(reader, writer)
+            return
+        # the first connection answers coins state, which is requested by connect, and is closed
+        operation, requestId, _ = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+        writer.write(scaleServer.respond(operation, requestId, b""))
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_unix_server(handleConnection, path=path)
+        async with server:
+            async with RemoteCoinsKeeper(path=path, poolSize=2) as keeper:
+                while keeper.connections[0].error is None:
+                    await asyncio.sleep(0.01)
+                return await asyncio.wait_for(solveAsync(keeper), 5)
+
+    index, indicator, _ = asyncio.run(run())
+    assert ck.weights[index] != np.median(ck.weights)
+
+
+def test_weightings_fail_without_live_connections(tmp_path):
+    path = str(tmp_path / "scale")
+    ck = CoinsKeeper(n_gen=99, seed=0)
+
+    async def run():
+        server = await ScaleServer(ck).start(path=path)
+        async with server:
+            async with RemoteCoinsKeeper(path=path, poolSize=2) as keeper:
+                for connection in keeper.connections:
+                    connection.writer.close()
+                while any(connection.error is None for connection in keeper.connections):
+                    await asyncio.sleep(0.01)
+                with pytest.raises(ConnectionError):
+                    await asyncio.wait_for(keeper.weighOnScale(range(0, 1), range(1, 2)), 1)
+
+    asyncio.run(run())
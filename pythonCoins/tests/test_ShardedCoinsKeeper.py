@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+from ShardedCoinsKeeper import ShardedCoinsKeeper
+
+
+@pytest.fixture(scope="module")
+def keepers():
+    # small threshold makes workers sum almost every group
+    with ShardedCoinsKeeper(n_gen=999, n_fake=1, seed=3, workers=3, parallelThreshold=4) as sck:
+        yield sck, CoinsKeeper(weights=np.array(sck.weights))
+
+
+def test_groups_match_coins_keeper(keepers):
+    sck, ck = keepers
+    coinsNumber = len(ck.weights)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        start, stop = sorted(int(i) for i in rng.integers(-coinsNumber, coinsNumber + 1, size=2))
+        group = range(start, stop)
+        indices = rng.integers(-coinsNumber, coinsNumber, size=int(rng.integers(1, 40))).tolist()
+        assert sck.groupWeight(group) == ck.groupWeight(group)
+        assert sck.groupWeight(indices) == ck.groupWeight(indices)
+        assert sck.groupWeights([group, indices, range(0)]) == [ck.groupWeight(group), ck.groupWeight(indices), 0]
+        assert sck.balance(group, indices) == ck.balance(group, indices)
+
+        bounds = sorted(int(i) for i in rng.integers(coinsNumber + 1, size=4))
+        assert sck.rangeWeight(bounds[0], bounds[1]) == ck.rangeWeight(bounds[0], bounds[1])
+        assert sck.balanceRanges(*bounds) == ck.balanceRanges(*bounds)
+
+
+def test_ranges_do_not_use_prefix_sums(keepers):
+    sck, _ = keepers
+    sck.rangeWeight(0, len(sck.weights))
+    sck.balanceRanges(0, 10, 10, 20)
+    assert sck._prefixSums is None
+
+
+def test_negative_range_matches_coins_keeper(keepers):
+    sck, ck = keepers
+    assert sck.groupWeight(range(-5, 0)) == ck.groupWeight(range(-5, 0)) == int(ck.weights[-5:].sum())
+
+
+@pytest.mark.parametrize("start, stop", [(-1, 3), (2, 1001), (5, 4)])
+def test_range_out_of_coins_is_rejected(keepers, start, stop):
+    sck, _ = keepers
+    with pytest.raises(IndexError):
+        sck.rangeWeight(start, stop)
+    if start >= 0 and stop > start:
+        with pytest.raises(IndexError):
+            sck.groupWeight(range(start, stop))
+
+
+def test_fake_coin_is_found_and_workers_are_stopped():
+    sck = ShardedCoinsKeeper(n_gen=4999, n_fake=0, n_fake_l=1, seed=1, workers=2, parallelThreshold=16)
+    processes = list(sck.processes)
+    try:
+        fakeIndex = int(np.flatnonzero(sck.weights != np.median(sck.weights))[0])
+        with pytest.raises(ValueError):
+            sck.weights[0] = 0
+        assert solve(sck, "compiled")[:2] == (fakeIndex, -1)
+        assert solve(sck)[:2] == (fakeIndex, -1)
+    finally:
+        sck.close()
+    assert not any(process.is_alive() for process in processes)
+    assert sck.processes == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from CoinsKeeper import CoinsKeeper
+from StaticSchedule import buildSchedule, decodeOutcomes, getSyndrome, staticAlgorithm, staticWeighingsNumber
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+FAKE_MODES = (FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER)
+DIRECTIONS = {FAKE_MODE_UNKNOWN: (-1, 1), FAKE_MODE_LIGHTER: (-1,), FAKE_MODE_HEAVIER: (1,)}
+
+
+def scheduleOutcomes(pans: np.ndarray, direction: int) -> np.ndarray:
+    """
+    Function returns outcomes of every weighting for every position of fake coin, which are computed from masses
+    of pans as CoinsKeeper.balance does.
+    """
+    coinsNumber = len(pans)
+    weights = 10 + direction * np.eye(coinsNumber, dtype=np.int64)
+    left = weights @ (pans == -1).astype(np.int64)
+    right = weights @ (pans == 1).astype(np.int64)
+    return np.sign(right - left)
+
+
+@pytest.mark.parametrize("fakeMode", FAKE_MODES)
+def test_every_fake_coin_is_decoded(fakeMode):
+    # exhaustive check of every coins number up to 399, every fake coin and every direction allowed by fake mode
+    for coinsNumber in range(3 if fakeMode == FAKE_MODE_UNKNOWN else 1, 400):
+        schedule = buildSchedule(coinsNumber, fakeMode)
+        assert schedule.weighingsNumber == staticWeighingsNumber(coinsNumber, fakeMode)
+        for direction in DIRECTIONS[fakeMode]:
+            outcomes = scheduleOutcomes(schedule.pans, direction)
+            syndromes = getSyndrome(outcomes) if schedule.weighingsNumber else np.zeros(coinsNumber, dtype=np.int64)
+            assert (schedule.coins[syndromes] == np.arange(coinsNumber)).all(), (coinsNumber, direction)
+            assert (schedule.directions[syndromes] == direction).all(), (coinsNumber, direction)
+
+
+@pytest.mark.parametrize("fakeMode", FAKE_MODES)
+@pytest.mark.parametrize("coinsNumber", [3, 12, 13, 39, 40, 121, 1000])
+def test_static_algorithm_finds_fake_coin(coinsNumber, fakeMode):
+    for seed in range(3):
+        ck = CoinsKeeper(n_gen=coinsNumber - 1, n_fake=int(fakeMode == FAKE_MODE_UNKNOWN),
+                         n_fake_l=int(fakeMode == FAKE_MODE_LIGHTER), n_fake_h=int(fakeMode == FAKE_MODE_HEAVIER),
+                         seed=seed)
+        weights = np.asarray(ck.weights)
+        genuineWeight = np.median(weights)
+        index, indicator = staticAlgorithm(coinsNumber, ck.balance, fakeMode)
+        assert weights[index] != genuineWeight
+        assert indicator == (1 if weights[index] > genuineWeight else -1)
+
+
+def test_inconsistent_outcomes_are_rejected():
+    schedule = buildSchedule(12)
+    # all weightings are equal only if there is no fake coin
+    with pytest.raises(ValueError):
+        decodeOutcomes(schedule, [0] * schedule.weighingsNumber)
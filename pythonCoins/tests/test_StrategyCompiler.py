@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+from StrategyCompiler import STRATEGY_CACHE_VERSION, compileStrategy, getStrategy
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+
+def cachePath(cacheDir, coinsNumber, fakeMode):
+    return os.path.join(cacheDir, f"strategy-v{STRATEGY_CACHE_VERSION}-{fakeMode}-{coinsNumber}.npz")
+
+
+@pytest.fixture(autouse=True)
+def clearCache():
+    getStrategy.cache_clear()
+    yield
+    getStrategy.cache_clear()
+
+
+@pytest.mark.parametrize("fakeMode", [FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER])
+@pytest.mark.parametrize("coinsNumber", [3, 4, 12, 1000, 10 ** 9])
+def test_cached_strategy_equals_compiled(tmp_path, coinsNumber, fakeMode):
+    strategy = getStrategy(coinsNumber, fakeMode, str(tmp_path))
+    assert os.path.exists(cachePath(tmp_path, coinsNumber, fakeMode))
+    getStrategy.cache_clear()
+    assert getStrategy(coinsNumber, fakeMode, str(tmp_path)) == strategy == compileStrategy(coinsNumber, fakeMode)
+
+
+def test_cache_file_holds_no_pickled_objects(tmp_path):
+    getStrategy(100, FAKE_MODE_UNKNOWN, str(tmp_path))
+    with np.load(cachePath(tmp_path, 100, FAKE_MODE_UNKNOWN), allow_pickle=False) as data:
+        assert all(data[name].dtype == np.int64 for name in data.files)
+        assert int(data["version"]) == STRATEGY_CACHE_VERSION
+
+
+def test_file_of_other_version_is_replaced(tmp_path):
+    path = cachePath(tmp_path, 100, FAKE_MODE_LIGHTER)
+    getStrategy(100, FAKE_MODE_LIGHTER, str(tmp_path))
+    with np.load(path, allow_pickle=False) as data:
+        arrays = dict(data)
+    arrays["version"] = np.int64(STRATEGY_CACHE_VERSION + 1)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+    getStrategy.cache_clear()
+
+    assert getStrategy(100, FAKE_MODE_LIGHTER, str(tmp_path)) == compileStrategy(100, FAKE_MODE_LIGHTER)
+    with np.load(path, allow_pickle=False) as data:
+        assert int(data["version"]) == STRATEGY_CACHE_VERSION
+
+
+@pytest.mark.parametrize("content", [b"", b"garbage", b"\x80\x04\x95 pickled strategy"])
+def test_unreadable_file_is_replaced(tmp_path, content):
+    path = cachePath(tmp_path, 100, FAKE_MODE_UNKNOWN)
+    with open(path, "wb") as f:
+        f.write(content)
+    assert getStrategy(100, FAKE_MODE_UNKNOWN, str(tmp_path)) == compileStrategy(100, FAKE_MODE_UNKNOWN)
+    getStrategy.cache_clear()
+    assert getStrategy(100, FAKE_MODE_UNKNOWN, str(tmp_path)) == compileStrategy(100, FAKE_MODE_UNKNOWN)
@@ -0,0 +1,54 @@
+import io
+
+import numpy as np
+import pytest
+
+from CoinsDetector import CoinsDetector, solve
+from CoinsKeeper import CoinsKeeper
+from OptimalSolver import minWeighingsNumber
+from StrategySearch import MAX_SEARCH_COINS, StrategySearch
+from WeighingEvents import Verbosity
+
+
+def fakeCoin(ck: CoinsKeeper):
+    weights = np.asarray(ck.weights, dtype=np.int64)
+    genuineWeight = int(np.bincount(weights - weights.min()).argmax() + weights.min())
+    index = int(np.flatnonzero(weights != genuineWeight)[0])
+    return index, 1 if weights[index] > genuineWeight else -1
+
+
+@pytest.mark.parametrize("coinsNumber", [3, 4, 12, 13, 39, 100])
+def test_search_finds_fake_coin_in_optimal_number_of_weightings(coinsNumber):
+    for seed in range(5):
+        ck = CoinsKeeper(n_gen=coinsNumber - 1, seed=seed)
+        index, indicator, weightingCount = solve(ck, "search")
+        assert (index, indicator) == fakeCoin(ck)
+        assert weightingCount <= minWeighingsNumber(coinsNumber)
+
+
+def test_search_falls_back_to_optimal_solver_above_cap():
+    coinsNumber = 10 * MAX_SEARCH_COINS["worst"]
+    ck = CoinsKeeper(n_gen=coinsNumber - 1, seed=0)
+    out = io.StringIO()
+    cd = CoinsDetector(ck, verbosity=Verbosity.SUMMARY, strategy="search")
+    cd.renderer.out = out
+    assert cd.solver() == fakeCoin(ck)
+    assert cd.weightingCount <= minWeighingsNumber(coinsNumber)
+    assert "optimalAlgorithm is used" in out.getvalue()
+
+
+def test_search_statistics_are_written_by_renderer(capsys):
+    ck = CoinsKeeper(n_gen=11, seed=0)
+    out = io.StringIO()
+    cd = CoinsDetector(ck, verbosity=Verbosity.SUMMARY, strategy="search")
+    cd.renderer.out = out
+    cd.solver()
+    assert "states in" in out.getvalue()
+    assert "search:" not in capsys.readouterr().out
+
+
+def test_unknown_objective_is_rejected():
+    with pytest.raises(ValueError):
+        CoinsDetector(CoinsKeeper(), strategy="search", searchObjective="best")
+    with pytest.raises(ValueError, match="Unknown search objective: best"):
+        StrategySearch("best")
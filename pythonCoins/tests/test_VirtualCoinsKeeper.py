@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from CoinsDetector import solve
+from CoinsKeeper import CoinsKeeper
+from VirtualCoinsKeeper import VirtualCoinsKeeper
+
+FAKE_COUNTS = ({"n_fake": 1}, {"n_fake": 0, "n_fake_l": 1}, {"n_fake": 0, "n_fake_h": 1})
+
+
+@pytest.mark.parametrize("counts", FAKE_COUNTS)
+def test_weights_equal_materialized_keeper(counts):
+    rng = np.random.default_rng(0)
+    for seed in range(5):
+        vck = VirtualCoinsKeeper(n_gen=49, seed=seed, **counts)
+        ck = CoinsKeeper(n_gen=49, weights=vck.weights[:], **counts)
+        assert list(vck.weights) == ck.weights.tolist()
+        assert vck.weights[-1] == ck.weights[-1] and vck.weightsVersion == 1
+        for _ in range(200):
+            start, stop = sorted(rng.integers(0, 51, size=2).tolist())
+            indices = rng.integers(-50, 50, size=int(rng.integers(0, 6))).tolist()
+            multiplicities = rng.integers(0, 5, size=len(indices)).tolist()
+            assert vck.rangeWeight(start, stop) == ck.rangeWeight(start, stop)
+            assert vck.groupWeight(range(start, stop)) == ck.groupWeight(range(start, stop))
+            assert vck.groupWeight(indices) == ck.groupWeight(indices)
+            assert vck.weigh(indices, multiplicities) == ck.weigh(indices, multiplicities)
+            assert vck.balanceRanges(start, stop, 50 - stop, 50 - start) == \
+                ck.balanceRanges(start, stop, 50 - stop, 50 - start)
+            assert vck.balance(indices, range(start, stop)) == ck.balance(indices, range(start, stop))
+
+
+def test_range_out_of_coins_is_rejected():
+    vck = VirtualCoinsKeeper(n_gen=9, seed=0)
+    with pytest.raises(IndexError):
+        vck.rangeWeight(-5, 0)
+    with pytest.raises(IndexError):
+        vck.groupWeight(range(5, 11))
+
+
+def test_given_values_are_kept():
+    vck = VirtualCoinsKeeper(n_gen=9, genuineCoinWeight=5, fakeCoinWeight=7, fakeCoinIndex=3, seed=0)
+    assert list(vck.weights) == [5, 5, 5, 7, 5, 5, 5, 5, 5, 5]
+
+
+@pytest.mark.parametrize("counts", FAKE_COUNTS)
+@pytest.mark.parametrize("strategy", ["compiled", "optimal", "static"])
+def test_detection_of_huge_coins_number(counts, strategy):
+    # optimal and static strategies keep arrays of all coins
+    coinsNumber = 10 ** 12 if strategy == "compiled" else 10 ** 5
+    for seed in range(3):
+        vck = VirtualCoinsKeeper(n_gen=coinsNumber - 1, seed=seed, **counts)
+        index, indicator, _ = solve(vck, strategy)
+        assert index == vck.fakeCoinIndex
+        assert indicator == (1 if vck.fakeCoinWeight > vck.genuineCoinWeight else -1)
+
+
+def test_negative_range_counts_coins_from_the_end():
+    ck = VirtualCoinsKeeper(n_gen=9, genuineCoinWeight=5, fakeCoinWeight=3, fakeCoinIndex=8)
+    assert ck.groupWeight(range(-5, 0)) == 4 * 5 + 3
+    assert ck.groupWeight(range(-2, 2)) == 3 * 5 + 3
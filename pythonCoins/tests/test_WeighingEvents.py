@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from WeighingEvents import Verbosity, WeighingEvent, WeighingRenderer, formatGroup
+
+
+def render(verbosity: Verbosity, event: WeighingEvent, coinsNumber: int = 10) -> str:
+    out = io.StringIO()
+    WeighingRenderer(coinsNumber, verbosity, out).render(event)
+    return out.getvalue()
+
+
+def test_format_group():
+    assert formatGroup(range(0)) == "[]"
+    assert formatGroup(range(3, 4)) == "[3]"
+    assert formatGroup(range(3, 7)) == "[3..6]"
+    assert formatGroup([1, 5]) == "[1, 5]"
+
+
+@pytest.mark.parametrize("groupL, groupR", [(range(0), range(0)), (range(0), range(2, 3)), ([], [4, 6]),
+                                            (range(0, 3), [])])
+def test_empty_pan_is_rendered(groupL, groupR):
+    event = WeighingEvent(1, groupL, groupR, 0)
+    assert "Left group is equal to right group by weight" in render(Verbosity.FULL, event)
+    assert render(Verbosity.WINDOWED, event).startswith("Weighting 1: ")
+
+
+def test_silent_renderer_writes_nothing():
+    assert render(Verbosity.SILENT, WeighingEvent(1, range(0, 3), range(3, 6), 1)) == ""
+    assert render(Verbosity.SUMMARY, WeighingEvent(1, range(0, 3), range(3, 6), 1)) == ""
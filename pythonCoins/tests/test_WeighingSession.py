@@ -0,0 +1,81 @@
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from CoinsKeeper import CoinsKeeper
+from WeighingSession import SessionState, WeighingSession, runSession, solveSteps
+from WeightsIO import FAKE_MODE_HEAVIER, FAKE_MODE_LIGHTER, FAKE_MODE_UNKNOWN
+
+FAKE_MODES = (FAKE_MODE_UNKNOWN, FAKE_MODE_LIGHTER, FAKE_MODE_HEAVIER)
+
+
+def makeKeeper(coinsNumber: int, fakeMode: int, seed: int) -> CoinsKeeper:
+    return CoinsKeeper(n_gen=coinsNumber - 1, n_fake=int(fakeMode == FAKE_MODE_UNKNOWN),
+                       n_fake_l=int(fakeMode == FAKE_MODE_LIGHTER), n_fake_h=int(fakeMode == FAKE_MODE_HEAVIER),
+                       seed=seed)
+
+
+@pytest.mark.parametrize("fakeMode", FAKE_MODES)
+@pytest.mark.parametrize("coinsNumber", [3, 12, 100, 1000])
+def test_session_finds_fake_coin(coinsNumber, fakeMode):
+    for seed in range(5):
+        ck = makeKeeper(coinsNumber, fakeMode, seed)
+        weights = np.asarray(ck.weights)
+        index, indicator = runSession(WeighingSession(coinsNumber, fakeMode), ck.balance)
+        assert weights[index] != np.median(weights)
+        assert indicator in (None, 1 if weights[index] > np.median(weights) else -1)
+
+
+def test_generator_form_gives_the_same_result():
+    ck = makeKeeper(1000, FAKE_MODE_UNKNOWN, 0)
+    steps = solveSteps(1000)
+    request = next(steps)
+    with pytest.raises(StopIteration) as stop:
+        while True:
+            request = steps.send(ck.balance(*request))
+    assert stop.value.value == runSession(WeighingSession(1000), ck.balance)
+
+
+@pytest.mark.parametrize("checkpoint", [
+    lambda session: WeighingSession.fromState(session.getState()),
+    lambda session: WeighingSession.fromState(json.loads(json.dumps(session.getState()))),
+    lambda session: pickle.loads(pickle.dumps(session)),
+])
+def test_restored_session_continues(checkpoint):
+    ck = makeKeeper(1000, FAKE_MODE_UNKNOWN, 1)
+    uninterrupted = WeighingSession(1000)
+    expected = runSession(uninterrupted, ck.balance)
+    for stepsBeforeCheckpoint in range(8):
+        session = WeighingSession(1000)
+        for _ in range(stepsBeforeCheckpoint):
+            if not session.done:
+                session.send(ck.balance(*session.nextRequest()))
+        restored = checkpoint(session)
+        assert restored.getState() == session.getState()
+        assert isinstance(restored.getState(), SessionState)
+        assert runSession(restored, ck.balance) == expected
+        assert restored.weightingCount == uninterrupted.weightingCount
+
+
+@pytest.mark.parametrize("managingItem", [2, -2, None, "1"])
+def test_invalid_outcome_leaves_session_unchanged(managingItem):
+    ck = makeKeeper(100, FAKE_MODE_UNKNOWN, 2)
+    session = WeighingSession(100)
+    session.send(ck.balance(*session.nextRequest()))
+    state = session.getState()
+    with pytest.raises(ValueError):
+        session.send(managingItem)
+    assert session.getState() == state
+    assert runSession(session, ck.balance) == runSession(WeighingSession(100), ck.balance)
+
+
+def test_inconsistent_outcomes_leave_session_unchanged():
+    session = WeighingSession(3)
+    # each of 3 coins is compared with the others, so one of two weightings must be unequal
+    session.send(0)
+    state = session.getState()
+    with pytest.raises(ValueError):
+        session.send(0)
+    assert session.getState() == state
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from CoinsKeeper import CoinsKeeper
+from WeightsIO import convertTxtToBin, loadBinWeights, loadTxtWeights, saveBinWeights, saveTxtWeights
+
+
+def writeText(tmp_path, text: bytes) -> str:
+    filename = str(tmp_path / "weights.txt")
+    with open(filename, "wb") as f:
+        f.write(text)
+    return filename
+
+
+@pytest.mark.parametrize("chunkSize", [1, 3, 7, 1 << 22])
+@pytest.mark.parametrize("text, weights", [
+    (b"5,5,4,5", [5, 5, 4, 5]),
+    (b"5,5,4,5\n", [5, 5, 4, 5]),
+    (b"5, 6 ;7\r\n8\n", [5, 6, 7, 8]),
+    (b"-3,+2,300", [-3, 2, 300]),
+    (b"", []),
+    (b" \n", []),
+])
+def test_valid_text(tmp_path, chunkSize, text, weights):
+    assert loadTxtWeights(writeText(tmp_path, text), chunkSize)[0].tolist() == weights
+
+
+@pytest.mark.parametrize("chunkSize", [1, 2, 5, 1 << 22])
+@pytest.mark.parametrize("text, offset", [
+    (b"5,,6,5", 2),
+    (b"5,6,5,5,5,5 , ,6", 14),
+    (b",5", 0),
+    (b"5,6,a,5", 4),
+    (b"5,6,5.5,5", 4),
+    (b"5,6,7x", 4),
+    (b"5,99999999999999999999", 2),
+])
+def test_malformed_text(tmp_path, chunkSize, text, offset):
+    with pytest.raises(ValueError, match=f"at byte {offset}$"):
+        loadTxtWeights(writeText(tmp_path, text), chunkSize)
+
+
+@pytest.mark.parametrize("chunkSize", [1, 3, 1 << 22])
+@pytest.mark.parametrize("text", [b"5;6;", b"5,6,   \n", b"5,6,\n\n"])
+def test_trailing_delimiter(tmp_path, chunkSize, text):
+    with pytest.raises(ValueError, match="after the last delimiter"):
+        loadTxtWeights(writeText(tmp_path, text), chunkSize)
+
+
+def test_text_round_trip(tmp_path):
+    weights = np.random.default_rng(0).integers(-300, 300, size=10000)
+    for lineSize in (None, 7):
+        filename = str(tmp_path / f"weights-{lineSize}.txt")
+        saveTxtWeights(filename, weights, lineSize=lineSize)
+        assert loadTxtWeights(filename, chunkSize=1000)[0].tolist() == weights.tolist()
+
+
+def test_bin_round_trip(tmp_path):
+    ck = CoinsKeeper(n_gen=999, n_fake=0, n_fake_l=1, seed=0)
+    filename = str(tmp_path / "weights.bin")
+    saveBinWeights(filename, ck.weights, n_fake=0, n_fake_l=1)
+    weights, coinsState, _ = loadBinWeights(filename)
+    assert weights.tolist() == ck.weights.tolist()
+    assert coinsState == ck.getCoinsState()
+
+
+@pytest.mark.parametrize("chunkSize", [5, 64, 1 << 22])
+def test_weights_are_widened_when_large_weight_is_met(tmp_path, chunkSize):
+    weights = [5] * 40 + [300] + [4] * 10 + [-70000]
+    filename = writeText(tmp_path, ",".join(map(str, weights)).encode())
+    loaded, stats = loadTxtWeights(filename, chunkSize)
+    assert loaded.tolist() == weights and loaded.dtype == np.int32 and stats.coins == len(weights)
+
+
+@pytest.mark.parametrize("chunkSize", [5, 64, 1 << 22])
+@pytest.mark.parametrize("weights, itemSize", [([5] * 40, 1), ([5] * 40 + [300] + [4] * 10, 2)])
+def test_text_is_converted_to_bin(tmp_path, chunkSize, weights, itemSize):
+    txtFilename = writeText(tmp_path, ",".join(map(str, weights)).encode())
+    binFilename = str(tmp_path / "weights.bin")
+    stats = convertTxtToBin(txtFilename, binFilename, n_fake=0, n_fake_l=1, chunkSize=chunkSize)
+    loaded, coinsState, _ = loadBinWeights(binFilename)
+    assert loaded.tolist() == weights and loaded.itemsize == itemSize and stats.coins == len(weights)
+    assert coinsState == {"n_gen": len(weights) - 1, "n_fake": 0, "n_fake_l": 1, "n_fake_h": 0}
+
+
+def test_too_large_weights_are_not_converted(tmp_path):
+    txtFilename = writeText(tmp_path, b"5,5,5,70000")
+    binFilename = str(tmp_path / "weights.bin")
+    with pytest.raises(ValueError, match="don't fit"):
+        convertTxtToBin(txtFilename, binFilename, chunkSize=4)
+    assert not (tmp_path / "weights.bin").exists()
@@ -0,0 +1,58 @@
+import io
+import itertools
+
+import numpy as np
+import pytest
+
+from WeightsTable import formatWeightRun, iterWeightRuns, writeWeights, writeWeightsSummary, writeWeightsTable
+
+
+def naiveRuns(weights):
+    runs, start = [], 0
+    for weight, group in itertools.groupby(weights):
+        length = len(list(group))
+        runs.append((start, start + length, weight))
+        start += length
+    return runs
+
+
+@pytest.mark.parametrize("chunkSize", [1, 2, 3, 7, 1 << 20])
+def test_runs_match_naive_run_length_encoding(chunkSize):
+    rng = np.random.default_rng(chunkSize)
+    for coinsNumber in (0, 1, 2, 5, 50, 333):
+        # few distinct weights make long runs crossing chunk boundaries
+        weights = rng.choice([4, 5, 5, 5, 5, 8], size=coinsNumber).astype(np.int8)
+        assert list(iterWeightRuns(weights, chunkSize)) == naiveRuns(weights.tolist())
+        assert list(iterWeightRuns(weights.tolist(), chunkSize)) == naiveRuns(weights.tolist())
+
+
+def test_summary_of_one_fake_coin():
+    weights = np.full(100001, 5, dtype=np.int8)
+    weights[50000] = 8
+    out = io.StringIO()
+    writeWeightsSummary(weights, out, chunkSize=4096)
+    assert out.getvalue() == "coins 0..49999 weight 5, coin 50000 weight 8, coins 50001..100000 weight 5\n"
+    assert formatWeightRun(3, 4, 7) == "coin 3 weight 7"
+
+
+def test_table_is_split_into_pages():
+    out = io.StringIO()
+    writeWeightsTable(list(range(5, 10)) + [12], out, pageSize=4)
+    assert out.getvalue() == (
+        "| indices | 0 | 1 | 2 | 3 |\n"
+        "|:--------|--:|--:|--:|--:|\n"
+        "| weights | 5 | 6 | 7 | 8 |\n"
+        "\n"
+        "| indices | 4 |  5 |\n"
+        "|:--------|--:|---:|\n"
+        "| weights | 9 | 12 |\n"
+        "\n")
+
+
+def test_views():
+    out = io.StringIO()
+    writeWeights([5, 5, 4], "summary", out)
+    writeWeights([5, 5, 4], None, out)
+    assert out.getvalue() == "coins 0..1 weight 5, coin 2 weight 4\n"
+    with pytest.raises(ValueError):
+        writeWeights([5], "chart", out)
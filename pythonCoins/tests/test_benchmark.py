@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmark import BenchmarkResult, formatResult, loadJson, main, percentile, saveJson, summarize
+
+
+@pytest.mark.parametrize("q", [0, 10, 50, 90, 99, 100])
+def test_percentile_matches_numpy(q):
+    values = sorted(np.random.default_rng(q).integers(0, 1000, size=17).tolist())
+    assert percentile(values, q) == pytest.approx(np.percentile(values, q))
+
+
+def test_summarize():
+    result = summarize("balance", 100, "unknown", [40, 10, 30, 20], weightings=5, coinsPerWeighting=66.0)
+    assert result == BenchmarkResult("balance", 100, "unknown", 4, 10, 25.0, 25.0, 37.0, 39.7, 5, 66.0)
+    assert result.key == "balance/100/unknown"
+    assert result.weightingsPerSecond == pytest.approx(5 / 25.0 * 1e9)
+    assert summarize("construct", 10, "lighter", [7]).weightingsPerSecond == 0.0
+
+
+def test_results_are_loaded_by_key(tmp_path):
+    results = [summarize("balance", 10, "unknown", [100]), summarize("detect", 10, "lighter", [200], 3, 4.0)]
+    filename = str(tmp_path / "results.json")
+    saveJson(filename, results, {"commit": None})
+    baselines = loadJson(filename)
+    assert sorted(baselines) == ["balance/10/unknown", "detect/10/lighter"]
+    assert baselines["detect/10/lighter"]["weightingsPerSecond"] == results[1].weightingsPerSecond
+
+    # speedup is baseline p50 over current p50, missing baseline is marked with dash
+    faster = summarize("balance", 10, "unknown", [50])
+    assert formatResult(faster, baselines[faster.key]).endswith(" 2.00 |")
+    assert formatResult(faster, {}).endswith(" - |")
+    assert formatResult(faster).endswith(f" {faster.coinsPerWeighting:.1f} |")
+
+
+def test_compare_with_previous_run(tmp_path, capsys):
+    filename = str(tmp_path / "results.json")
+    arguments = ["--min-exponent", "1", "--max-exponent", "2", "--modes", "lighter", "--cases", "construct",
+                 "balance", "detect", "--repeats", "2", "--warmup", "0"]
+    main(arguments + ["--json", filename])
+    lines = capsys.readouterr().out.splitlines()
+    with open(filename) as f:
+        saved = json.load(f)
+    assert "p50 speedup" not in lines[0]
+    assert len(saved["results"]) == len(lines) - 2 and "numpy" in saved["metadata"]
+
+    main(arguments + ["--compare", filename])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].endswith(" p50 speedup |")
+    rows = lines[2:]
+    assert len(rows) == len(saved["results"])
+    for row in rows:
+        speedup = row.rstrip(" |").rsplit("| ", 1)[1]
+        assert float(speedup) > 0